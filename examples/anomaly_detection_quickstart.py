@@ -24,9 +24,9 @@ def monitor_error_rate():
     base_time = datetime.now()
     
     # Normal values (build baseline)
-    for i in range(20):
-        value = 10 + (i % 3)  # Normal: 10-12
-        detector.add_value(value, base_time + timedelta(minutes=i*5))
+    values = [10 + (i % 3) for i in range(20)]  # Normal: 10-12
+    timestamps = [base_time + timedelta(minutes=i*5) for i in range(20)]
+    detector.add_values(values, timestamps)
     
     # Add a spike
     anomaly = detector.add_value(30, base_time + timedelta(minutes=100))
@@ -45,10 +45,9 @@ def monitor_multiple_metrics():
     
     # Build baselines
     base_time = datetime.now()
-    for i in range(15):
-        timestamp = base_time + timedelta(minutes=i*5)
-        detector.add_metric_value('error_count', 10 + i % 3, timestamp)
-        detector.add_metric_value('response_time', 100 + i * 2, timestamp)
+    timestamps = [base_time + timedelta(minutes=i*5) for i in range(15)]
+    detector.add_metric_series('error_count', [10 + i % 3 for i in range(15)], timestamps)
+    detector.add_metric_series('response_time', [100 + i * 2 for i in range(15)], timestamps)
     
     # Check current values
     current_metrics = {
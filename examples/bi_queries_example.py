@@ -8,9 +8,46 @@ complex analytical queries.
 """
 
 from datetime import datetime, timedelta
-from loglens.models import LogEvent
+
+import numpy as np
+
+from loglens.models import LogEvent, LogLevel
 from loglens.storage import LogStorage, create_query, TimeBucket
-from loglens.analytics import Metric, MetricProcessor
+from loglens.analytics import Metric, MetricProcessor, FieldEq
+
+
+def generate_sample_batches(base_time, days):
+    """
+    Yield sample events one day at a time as parallel columns.
+    
+    Only a single day's columns are alive at once, so the generator scales
+    to long ranges without building the whole event list up front.
+    
+    Yields:
+        Tuple of (timestamps, levels, sources, messages, metadata) lists
+    """
+    # Categorical values come from small shared tuples instead of per-event strings
+    level_cycle = (LogLevel.INFO, LogLevel.WARNING, LogLevel.ERROR)
+    source_cycle = ('app1', 'app2', 'app3')
+    
+    # The 48 half-hour slots are the same every day: build their offsets
+    # and string pieces once, then only concatenate per event
+    slots = [(hour, minute) for hour in range(24) for minute in [0, 30]]  # Every 30 minutes
+    slot_offsets = np.arange(len(slots)) * np.timedelta64(30, 'm')
+    slot_times = [f'{hour:02d}:{minute:02d}' for hour, minute in slots]
+    slot_ids = [f'{hour}_{minute}' for hour, minute in slots]
+    
+    for day in range(days):
+        day_start = base_time + timedelta(days=day)
+        message_prefix = 'Event at ' + day_start.strftime('%Y-%m-%d') + ' '
+        request_prefix = f'req_{day}_'
+        
+        timestamps = (np.datetime64(day_start, 'us') + slot_offsets).tolist()
+        levels = [level_cycle[hour % 3] for hour, _ in slots]
+        sources = [source_cycle[(day + hour) % 3] for hour, _ in slots]
+        messages = [message_prefix + slot_time for slot_time in slot_times]
+        metadata = [{'request_id': request_prefix + slot_id} for slot_id in slot_ids]
+        yield timestamps, levels, sources, messages, metadata
 
 
 def main():
@@ -26,48 +63,39 @@ def main():
     print("\n1. Setting up sample data...")
     print("-" * 70)
     
-    # Generate sample events over 7 days
+    # Stream sample events over 7 days into storage, one day of columns at a time
     base_time = datetime(2024, 1, 1, 0, 0, 0)
-    events = []
-    
-    for day in range(7):
-        for hour in range(24):
-            for minute in [0, 30]:  # Every 30 minutes
-                timestamp = base_time + timedelta(days=day, hours=hour, minutes=minute)
-                level = ('INFO', 'WARNING', 'ERROR')[hour % 3]
-                source = f'app{(day + hour) % 3 + 1}'
-                
-                events.append(LogEvent(
-                    timestamp=timestamp,
-                    level=level,
-                    source=source,
-                    message=f'Event at {timestamp.strftime("%Y-%m-%d %H:%M")}',
-                    metadata={'request_id': f'req_{day}_{hour}_{minute}'}
-                ))
-    
-    # Batch insert
-    storage.insert_events(events)
-    print(f"  Inserted {len(events)} events")
+    total_events = 0
+    events = []  # First 100 events, fed to the metric processor below
+    
+    batches = generate_sample_batches(base_time, days=7)
+    for timestamps, levels, sources, messages, metadata in batches:
+        # Columnar batch insert (no LogEvent objects needed)
+        storage.insert_event_columns(timestamps, levels, sources, messages, metadata)
+        total_events += len(timestamps)
+        
+        # Only the subset fed to the metric processor needs LogEvent objects
+        needed = 100 - len(events)
+        events.extend(
+            LogEvent(timestamp=ts, level=level, source=source, message=message)
+            for ts, level, source, message in zip(
+                timestamps[:needed], levels[:needed], sources[:needed], messages[:needed]
+            )
+        )
+    
+    print(f"  Inserted {total_events} events")
     
     # Compute and store metrics
     metrics_def = [
-        Metric(name='error_count', filter=lambda e: e.level == 'ERROR',
+        Metric(name='error_count', filter=FieldEq('level', 'ERROR'),
                aggregation='count', window='1h'),
         Metric(name='events_by_source', filter=lambda e: True,
                aggregation='count', window='1h', group_by=lambda e: e.source),
     ]
     
     processor = MetricProcessor(metrics_def)
-    for event in events[:100]:  # Process subset for demo
-        updated = processor.add_event(event)
-        for metric_name, result in updated.items():
-            storage.insert_metric(
-                metric_name=result.metric_name,
-                window_start=result.window_start,
-                window_end=result.window_end,
-                value=result.value,
-                grouped_values=result.grouped_values
-            )
+    results = processor.add_events(events)  # Process subset for demo
+    storage.insert_metrics(results)
     
     print("  Computed and stored metrics")
     
@@ -127,13 +155,12 @@ def main():
     print("-" * 70)
     custom_sql = """
         SELECT 
-            DATE_TRUNC('day', timestamp) AS day,
+            day,
             source,
             COUNT(*) AS total_events,
-            COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-            COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count,
-            CAST(COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS DOUBLE) / 
-                NULLIF(COUNT(*), 0) * 100.0 AS error_rate
+            COUNT_IF(level = 'ERROR') AS error_count,
+            COUNT_IF(level = 'WARNING') AS warning_count,
+            error_count * 100.0 / total_events AS error_rate
         FROM events
         WHERE timestamp >= ? AND timestamp <= ?
         GROUP BY day, source
@@ -200,11 +227,11 @@ def main():
     print("-" * 70)
     advanced_sql = """
         SELECT 
-            EXTRACT(HOUR FROM timestamp) AS hour_of_day,
+            hour_of_day,
             COUNT(*) AS total_events,
-            COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-            COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count,
-            COUNT(CASE WHEN level = 'INFO' THEN 1 END) AS info_count
+            COUNT_IF(level = 'ERROR') AS error_count,
+            COUNT_IF(level = 'WARNING') AS warning_count,
+            COUNT_IF(level = 'INFO') AS info_count
         FROM events
         WHERE timestamp >= ? AND timestamp <= ?
         GROUP BY hour_of_day
@@ -16,6 +16,10 @@ def example_queries():
     storage = LogStorage("your_database.db")
     query = create_query(storage)
     
+    # Queries over events_hourly (one row per hour, source and level)
+    # take whole-hour bounds
+    this_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+    
     # ========================================================================
     # 1. ERROR RATES BY TIME BUCKET (Hourly)
     # ========================================================================
@@ -60,21 +64,20 @@ def example_queries():
     
     sql = """
         SELECT 
-            DATE_TRUNC('day', timestamp) AS day,
+            CAST(hour AS DATE) AS day,
             source,
-            COUNT(*) AS total_events,
-            COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-            CAST(COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS DOUBLE) / 
-                NULLIF(COUNT(*), 0) * 100.0 AS error_rate
-        FROM events
-        WHERE timestamp >= ? AND timestamp <= ?
+            SUM(event_count) AS total_events,
+            COALESCE(SUM(event_count) FILTER (WHERE level = 'ERROR'), 0) AS error_count,
+            error_count * 100.0 / total_events AS error_rate
+        FROM events_hourly
+        WHERE hour >= ? AND hour < ?
         GROUP BY day, source
         ORDER BY day, error_rate DESC
     """
     
     results = query.query_custom(
         sql,
-        (datetime.now() - timedelta(days=7), datetime.now())
+        (this_hour - timedelta(days=7), this_hour)
     )
     
     # ========================================================================
@@ -85,19 +88,19 @@ def example_queries():
     
     sql = """
         SELECT 
-            EXTRACT(HOUR FROM timestamp) AS hour_of_day,
-            COUNT(*) AS total_events,
-            COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-            COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count
-        FROM events
-        WHERE timestamp >= ? AND timestamp <= ?
+            EXTRACT(HOUR FROM hour) AS hour_of_day,
+            SUM(event_count) AS total_events,
+            COALESCE(SUM(event_count) FILTER (WHERE level = 'ERROR'), 0) AS error_count,
+            COALESCE(SUM(event_count) FILTER (WHERE level = 'WARNING'), 0) AS warning_count
+        FROM events_hourly
+        WHERE hour >= ? AND hour < ?
         GROUP BY hour_of_day
         ORDER BY hour_of_day
     """
     
     results = query.query_custom(
         sql,
-        (datetime.now() - timedelta(days=7), datetime.now())
+        (this_hour - timedelta(days=7), this_hour)
     )
     
     # ========================================================================
@@ -159,13 +162,12 @@ def example_queries():
     sql = """
         SELECT 
             source,
-            COUNT(*) AS total_events,
-            COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-            CAST(COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS DOUBLE) / 
-                NULLIF(COUNT(*), 0) * 100.0 AS error_percentage,
-            COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count
-        FROM events
-        WHERE timestamp >= ? AND timestamp <= ?
+            SUM(event_count) AS total_events,
+            COALESCE(SUM(event_count) FILTER (WHERE level = 'ERROR'), 0) AS error_count,
+            error_count * 100.0 / total_events AS error_percentage,
+            COALESCE(SUM(event_count) FILTER (WHERE level = 'WARNING'), 0) AS warning_count
+        FROM events_hourly
+        WHERE hour >= ? AND hour < ?
         GROUP BY source
         HAVING error_count > 0
         ORDER BY error_count DESC
@@ -174,7 +176,7 @@ def example_queries():
     
     results = query.query_custom(
         sql,
-        (datetime.now() - timedelta(days=7), datetime.now())
+        (this_hour - timedelta(days=7), this_hour)
     )
     
     # ========================================================================
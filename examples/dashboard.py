@@ -6,24 +6,35 @@ Creates a matplotlib-based dashboard showing metrics, trends, and anomalies.
 This demonstrates how to visualize LogLens++ data.
 """
 
-import matplotlib.pyplot as plt
+import matplotlib
 import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 from datetime import datetime, timedelta
-from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Union
 import numpy as np
 
 from loglens.models import LogEvent
 from loglens.storage import LogStorage, create_query
 from loglens.analytics import Metric, MetricProcessor
 
+# Relative output paths are resolved against the examples directory
+_SCRIPT_DIR = Path(__file__).resolve().parent
 
-def create_dashboard(db_path: str = "loglens.db", output_file: str = "dashboard.png"):
+
+def create_dashboard(db_path: str = "loglens.db",
+                     output_file: Union[str, Path] = "dashboard.png"):
     """
     Create a dashboard visualization from LogLens++ data.
     
     Args:
         db_path: Path to database
-        output_file: Output file for dashboard image
+        output_file: Output file for dashboard image, relative to the
+            examples directory unless absolute
     """
     storage = LogStorage(db_path)
     query = create_query(storage)
@@ -32,91 +43,249 @@ def create_dashboard(db_path: str = "loglens.db", output_file: str = "dashboard.
     end_time = datetime.now()
     start_time = end_time - timedelta(hours=24)
     
-    # Create figure with subplots
-    fig = plt.figure(figsize=(16, 10))
-    gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
-    
-    # 1. Error Rate Over Time (top, full width)
-    ax1 = fig.add_subplot(gs[0, :])
-    plot_error_rate_trend(query, ax1, start_time, end_time)
-    
-    # 2. Events by Level (pie chart)
-    ax2 = fig.add_subplot(gs[1, 0])
-    plot_events_by_level(storage, ax2, start_time, end_time)
-    
-    # 3. Events by Source (bar chart)
-    ax3 = fig.add_subplot(gs[1, 1])
-    plot_events_by_source(storage, ax3, start_time, end_time)
-    
-    # 4. Error Rate by Source (bar chart)
-    ax4 = fig.add_subplot(gs[1, 2])
-    plot_error_rate_by_source(query, ax4, start_time, end_time)
-    
-    # 5. Metric Trends (line chart)
-    ax5 = fig.add_subplot(gs[2, :])
-    plot_metric_trends(query, ax5, start_time, end_time)
-    
-    # Add title
-    fig.suptitle('LogLens++ Dashboard', fontsize=16, fontweight='bold', y=0.995)
+    dashboard = DashboardFigure()
+    dashboard.update(
+        # One query over the hourly rollup feeds the first four panels
+        fetch_dashboard_aggregates(query, start_time, end_time),
+        fetch_metric_trends(query, start_time, end_time)
+    )
     
     # Save to examples directory if not absolute path
-    if not Path(output_file).is_absolute():
-        output_path = Path(__file__).parent / output_file
-    else:
-        output_path = Path(output_file)
+    output_path = Path(output_file)
+    if not output_path.is_absolute():
+        output_path = _SCRIPT_DIR / output_path
     
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    dashboard.save(output_path)
     print(f"Dashboard saved to: {output_path}")
-    plt.close()
 
 
-def plot_error_rate_trend(query, ax, start_time, end_time):
-    """Plot error rate trend over time."""
+class DashboardFigure:
+    """
+    Dashboard figure that is built once and refreshed in place.
+    
+    The first update() draws every panel. Later updates push the new data
+    into the existing artists (line segments, marker offsets, bar widths)
+    and only redraw a panel from scratch when its shape changed, e.g. a new
+    source appeared, so a timer-driven refresh skips rebuilding the figure.
+    """
+    
+    def __init__(self):
+        """Create the figure and its five panels."""
+        # Rendered straight to PNG through Agg (no pyplot state machine or
+        # GUI backend involved)
+        self.fig = Figure(figsize=(16, 10))
+        FigureCanvasAgg(self.fig)
+        gs = self.fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
+        
+        self.axes = {
+            'error_rate_trend': self.fig.add_subplot(gs[0, :]),        # full width
+            'events_by_level': self.fig.add_subplot(gs[1, 0]),         # pie chart
+            'events_by_source': self.fig.add_subplot(gs[1, 1]),        # bar chart
+            'error_rate_by_source': self.fig.add_subplot(gs[1, 2]),    # bar chart
+            'metric_trends': self.fig.add_subplot(gs[2, :]),           # line chart
+        }
+        self.fig.suptitle('LogLens++ Dashboard', fontsize=16, fontweight='bold', y=0.995)
+        
+        # Artist handles per panel, None until the panel shows data
+        self._handles = dict.fromkeys(self.axes)
+    
+    def update(self, aggregates, metric_trends):
+        """
+        Show new data on every panel.
+        
+        Args:
+            aggregates: Result of fetch_dashboard_aggregates()
+            metric_trends: Result of fetch_metric_trends()
+        """
+        panels = [
+            ('error_rate_trend', aggregates['by_hour'],
+             plot_error_rate_trend, update_error_rate_trend,
+             lambda ax: _style_time_axis(ax, hour_interval=2)),
+            ('events_by_level', aggregates['by_level'], plot_events_by_level, None, None),
+            ('events_by_source', aggregates['by_source'],
+             plot_events_by_source, update_events_by_source, _style_bar_axis),
+            ('error_rate_by_source', aggregates['by_source'],
+             plot_error_rate_by_source, update_error_rate_by_source, _style_bar_axis),
+            ('metric_trends', metric_trends,
+             plot_metric_trends, update_metric_trends, _style_time_axis),
+        ]
+        for name, data, plot, update_in_place, style in panels:
+            ax = self.axes[name]
+            handles = self._handles[name]
+            if handles is not None and update_in_place is not None \
+                    and update_in_place(data, ax, handles):
+                continue
+            
+            # Grid and tick styling survive in-place updates, so they are only
+            # applied when a panel is redrawn with data
+            ax.clear()
+            handles = self._handles[name] = plot(data, ax)
+            if handles is not None and style is not None:
+                style(ax)
+        
+        self.fig.canvas.draw_idle()
+    
+    def save(self, output_path):
+        """Render the figure to an image file."""
+        self.fig.savefig(output_path, dpi=150, bbox_inches='tight')
+
+
+def fetch_dashboard_aggregates(query, start_time, end_time):
+    """
+    Fetch the hourly, per-level and per-source event counts in one query.
+    
+    The counts come from the events_hourly rollup (one row per hour, source
+    and level) rather than the raw events table, so the cost depends on the
+    number of hours shown, not the number of events. The range is widened
+    to whole hours. GROUPING SETS computes all three breakdowns in one
+    pass; the result comes back as NumPy columns, which are split back out
+    by their grouping ID.
+    
+    Returns:
+        Dictionary with 'by_hour' ((N, 3) array of (date number, total,
+        errors) in time order), 'by_level' ({level: count}, largest first)
+        and 'by_source' ({source: (total, errors)})
+    """
     sql = """
         SELECT 
-            DATE_TRUNC('hour', timestamp) AS hour,
-            COUNT(*) AS total_events,
-            COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS error_count,
-            CAST(COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS DOUBLE) / 
-                NULLIF(COUNT(*), 0) * 100.0 AS error_rate
-        FROM events
-        WHERE timestamp >= ? AND timestamp <= ?
-        GROUP BY hour
-        ORDER BY hour
+            hour,
+            level,
+            source,
+            GROUPING(hour, level, source) AS grouping_id,
+            SUM(event_count) AS total_events,
+            COALESCE(SUM(event_count) FILTER (
+                WHERE level IN ('ERROR', 'CRITICAL', 'FATAL')
+            ), 0) AS error_count
+        FROM events_hourly
+        WHERE hour >= DATE_TRUNC('hour', ?) AND hour <= ?
+        GROUP BY GROUPING SETS ((hour), (level), (source))
     """
     
-    results = query.execute_sql(sql, (start_time, end_time))
+    columns = query.execute_numpy(sql, (start_time, end_time))
+    grouping_id = columns['grouping_id']
+    # SUM over BIGINT is a HUGEINT, which arrives as float64
+    totals = columns['total_events'].astype(np.int64)
+    errors = columns['error_count'].astype(np.int64)
+    
+    # Each breakdown's key column is NULL (masked) on the other rows
+    hour_rows = np.flatnonzero(grouping_id == 0b011)
+    hours = mdates.date2num(np.ma.getdata(columns['hour'])[hour_rows])
+    order = np.argsort(hours)
+    by_hour = np.column_stack([hours, totals[hour_rows], errors[hour_rows]])[order]
+    
+    level_rows = np.flatnonzero(grouping_id == 0b101)
+    level_rows = level_rows[np.argsort(-totals[level_rows], kind='stable')]
+    by_level = dict(zip(
+        np.ma.getdata(columns['level'])[level_rows].tolist(), totals[level_rows].tolist()
+    ))
+    
+    source_rows = np.flatnonzero(grouping_id == 0b110)
+    by_source = dict(zip(
+        np.ma.getdata(columns['source'])[source_rows].tolist(),
+        zip(totals[source_rows].tolist(), errors[source_rows].tolist())
+    ))
+    
+    return {'by_hour': by_hour, 'by_level': by_level, 'by_source': by_source}
+
+
+def fetch_metric_trends(query, start_time, end_time):
+    """Fetch hourly averages of every stored metric as NumPy columns."""
+    sql = """
+        SELECT 
+            DATE_TRUNC('hour', window_start) AS hour,
+            metric_name,
+            AVG(value) AS avg_value
+        FROM metrics
+        WHERE window_start >= ? AND window_end <= ?
+        AND value IS NOT NULL
+        GROUP BY hour, metric_name
+        ORDER BY hour, metric_name
+    """
     
-    if not results:
+    return query.execute_numpy(sql, (start_time, end_time))
+
+
+def _style_time_axis(ax, hour_interval=None):
+    """Date axis with a grid and rotated HH:MM tick labels."""
+    ax.xaxis_date()
+    ax.grid(True, alpha=0.3)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    if hour_interval is not None:
+        ax.xaxis.set_major_locator(mdates.HourLocator(interval=hour_interval))
+    # New ticks copy their label properties from the first major tick, so
+    # this also covers ticks added when the axis is rescaled later
+    for label in ax.xaxis.get_majorticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+
+def _style_bar_axis(ax):
+    """Value grid for a horizontal bar chart."""
+    ax.grid(True, alpha=0.3, axis='x')
+
+
+def _rescale(ax, points):
+    """Fit the axes' data limits to new points (relim() ignores collections)."""
+    ax.ignore_existing_data_limits = True
+    ax.update_datalim(points)
+    ax.autoscale_view()
+
+
+def _error_rate_points(by_hour):
+    """Error rate per hour as an (N, 2) array of (date number, percent)."""
+    return np.column_stack([by_hour[:, 0], by_hour[:, 2] * 100.0 / by_hour[:, 1]])
+
+
+def plot_error_rate_trend(by_hour, ax):
+    """Plot error rate trend over time."""
+    if not len(by_hour):
         ax.text(0.5, 0.5, 'No data available', ha='center', va='center', transform=ax.transAxes)
         ax.set_title('Error Rate Over Time', fontweight='bold')
-        return
+        return None
     
-    hours = [datetime.fromisoformat(str(r['hour'])) for r in results]
-    error_rates = [r['error_rate'] for r in results]
+    points = _error_rate_points(by_hour)
     
-    ax.plot(hours, error_rates, marker='o', linewidth=2, markersize=6, color='#e74c3c')
-    ax.fill_between(hours, error_rates, alpha=0.3, color='#e74c3c')
+    # One collection for the line and one scatter for the markers
+    line = LineCollection([points], colors='#e74c3c', linewidths=2, rasterized=True)
+    ax.add_collection(line)
+    markers = ax.scatter(points[:, 0], points[:, 1], s=36, color='#e74c3c', zorder=3)
+    fill = ax.fill_between(points[:, 0], points[:, 1], alpha=0.3, color='#e74c3c')
+    ax.autoscale_view()
     ax.set_title('Error Rate Over Time', fontweight='bold', fontsize=12)
     ax.set_xlabel('Time')
     ax.set_ylabel('Error Rate (%)')
-    ax.grid(True, alpha=0.3)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    ax.xaxis.set_major_locator(mdates.HourLocator(interval=2))
-    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    
+    return {'line': line, 'markers': markers, 'fill': fill}
+
 
+def update_error_rate_trend(by_hour, ax, handles):
+    """Move the error rate trend to new data; False if it must be redrawn."""
+    if not len(by_hour):
+        return False
+    
+    points = _error_rate_points(by_hour)
+    handles['line'].set_segments([points])
+    handles['markers'].set_offsets(points)
+    handles['fill'].remove()
+    handles['fill'] = ax.fill_between(points[:, 0], points[:, 1], alpha=0.3, color='#e74c3c')
+    _rescale(ax, points)
+    return True
 
-def plot_events_by_level(storage, ax, start_time, end_time):
+
+def plot_events_by_level(by_level, ax):
     """Plot events distribution by log level."""
-    stats = storage.get_event_stats(start_time=start_time, end_time=end_time)
-    
-    if not stats['by_level']:
+    if not by_level:
         ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
         ax.set_title('Events by Level', fontweight='bold')
-        return
+        return None
     
-    levels = list(stats['by_level'].keys())
-    counts = list(stats['by_level'].values())
+    levels = list(by_level.keys())
+    counts = np.fromiter(by_level.values(), dtype=np.float64, count=len(by_level))
+    
+    # Put the percentage in the label itself rather than using autopct, which
+    # formats each wedge through a callback and adds a second Text per slice
+    percents = counts / counts.sum() * 100.0
+    labels = [f'{level}\n{percent:.1f}%' for level, percent in zip(levels, percents)]
     
     # Color mapping
     colors = {
@@ -130,105 +299,157 @@ def plot_events_by_level(storage, ax, start_time, end_time):
     
     pie_colors = [colors.get(level, '#95a5a6') for level in levels]
     
-    ax.pie(counts, labels=levels, autopct='%1.1f%%', colors=pie_colors, startangle=90)
+    wedges, _ = ax.pie(counts, labels=labels, colors=pie_colors, startangle=90)
     ax.set_title('Events by Level', fontweight='bold', fontsize=12)
+    return {'wedges': wedges}
+
 
+def _top_sources(by_source):
+    """Top 10 sources by event count as (names, counts)."""
+    sources = sorted(by_source.items(), key=lambda x: x[1][0], reverse=True)[:10]
+    return [s[0] for s in sources], [s[1][0] for s in sources]
 
-def plot_events_by_source(storage, ax, start_time, end_time):
+
+def plot_events_by_source(by_source, ax):
     """Plot events count by source."""
-    stats = storage.get_event_stats(start_time=start_time, end_time=end_time)
-    
-    if not stats['by_source']:
+    if not by_source:
         ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
         ax.set_title('Events by Source', fontweight='bold')
-        return
+        return None
     
-    # Get top 10 sources
-    sources = sorted(stats['by_source'].items(), key=lambda x: x[1], reverse=True)[:10]
-    source_names = [s[0] for s in sources]
-    source_counts = [s[1] for s in sources]
+    source_names, source_counts = _top_sources(by_source)
     
-    ax.barh(source_names, source_counts, color='#3498db')
+    bars = ax.barh(source_names, source_counts, color='#3498db')
     ax.set_title('Top Sources by Event Count', fontweight='bold', fontsize=12)
     ax.set_xlabel('Event Count')
-    ax.grid(True, alpha=0.3, axis='x')
+    return {'names': source_names, 'bars': bars}
+
+
+def update_events_by_source(by_source, ax, handles):
+    """Resize the source bars in place; False if the sources changed."""
+    source_names, source_counts = _top_sources(by_source)
+    if source_names != handles['names']:
+        return False
+    
+    for bar, count in zip(handles['bars'], source_counts):
+        bar.set_width(count)
+    ax.relim()
+    ax.autoscale_view()
+    return True
+
+
+def _error_rate_colors(error_rates):
+    """Bar colors by error rate severity."""
+    return [
+        '#e74c3c' if rate > 10 else '#f39c12' if rate > 5 else '#f1c40f'
+        for rate in error_rates
+    ]
+
 
+def _top_error_rates(by_source):
+    """Top 10 sources with any errors, highest error rate first, as (names, rates)."""
+    rates = sorted(
+        ((source, errors * 100.0 / total)
+         for source, (total, errors) in by_source.items() if errors > 0),
+        key=lambda x: x[1], reverse=True
+    )[:10]
+    return [source for source, _ in rates], [rate for _, rate in rates]
 
-def plot_error_rate_by_source(query, ax, start_time, end_time):
+
+def plot_error_rate_by_source(by_source, ax):
     """Plot error rate by source."""
-    sql = """
-        SELECT 
-            source,
-            COUNT(*) AS total_events,
-            COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS error_count,
-            CAST(COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS DOUBLE) / 
-                NULLIF(COUNT(*), 0) * 100.0 AS error_rate
-        FROM events
-        WHERE timestamp >= ? AND timestamp <= ?
-        GROUP BY source
-        HAVING error_count > 0
-        ORDER BY error_rate DESC
-        LIMIT 10
-    """
-    
-    results = query.execute_sql(sql, (start_time, end_time))
+    sources, error_rates = _top_error_rates(by_source)
     
-    if not results:
+    if not sources:
         ax.text(0.5, 0.5, 'No errors', ha='center', va='center', transform=ax.transAxes)
         ax.set_title('Error Rate by Source', fontweight='bold')
-        return
+        return None
     
-    sources = [r['source'] for r in results]
-    error_rates = [r['error_rate'] for r in results]
-    
-    colors = ['#e74c3c' if rate > 10 else '#f39c12' if rate > 5 else '#f1c40f' for rate in error_rates]
-    
-    ax.barh(sources, error_rates, color=colors)
+    bars = ax.barh(sources, error_rates, color=_error_rate_colors(error_rates))
     ax.set_title('Error Rate by Source (%)', fontweight='bold', fontsize=12)
     ax.set_xlabel('Error Rate (%)')
-    ax.grid(True, alpha=0.3, axis='x')
+    return {'names': sources, 'bars': bars}
+
+
+def update_error_rate_by_source(by_source, ax, handles):
+    """Resize and recolor the error rate bars in place; False if the sources changed."""
+    sources, error_rates = _top_error_rates(by_source)
+    if sources != handles['names']:
+        return False
+    
+    for bar, rate, color in zip(handles['bars'], error_rates, _error_rate_colors(error_rates)):
+        bar.set_width(rate)
+        bar.set_color(color)
+    ax.relim()
+    ax.autoscale_view()
+    return True
+
 
+def _metric_segments(results):
+    """Split hourly metric columns into (metric names, one (N, 2) segment per metric)."""
+    names = np.ma.getdata(results['metric_name'])
+    hours = mdates.date2num(np.ma.getdata(results['hour']))
+    values = np.ma.getdata(results['avg_value']).astype(np.float64)
+    
+    # Sort by (name, hour) once, then cut the arrays where the name changes
+    order = np.lexsort((hours, names))
+    names, points = names[order], np.column_stack([hours[order], values[order]])
+    boundaries = np.flatnonzero(names[1:] != names[:-1]) + 1
+    
+    segments = np.split(points, boundaries)
+    return names[np.r_[0, boundaries]].tolist(), segments
 
-def plot_metric_trends(query, ax, start_time, end_time):
+
+def plot_metric_trends(results, ax):
     """Plot multiple metric trends."""
-    sql = """
-        SELECT 
-            DATE_TRUNC('hour', window_start) AS hour,
-            metric_name,
-            AVG(value) AS avg_value
-        FROM metrics
-        WHERE window_start >= ? AND window_end <= ?
-        AND value IS NOT NULL
-        GROUP BY hour, metric_name
-        ORDER BY hour, metric_name
-    """
-    
-    results = query.execute_sql(sql, (start_time, end_time))
-    
-    if not results:
+    if not len(results['metric_name']):
         ax.text(0.5, 0.5, 'No metrics available', ha='center', va='center', transform=ax.transAxes)
         ax.set_title('Metric Trends', fontweight='bold')
-        return
-    
-    # Group by metric name
-    metric_data = defaultdict(list)
-    for r in results:
-        hour = datetime.fromisoformat(str(r['hour']))
-        metric_data[r['metric_name']].append((hour, r['avg_value']))
-    
-    # Plot each metric
-    colors = plt.cm.tab10(np.linspace(0, 1, len(metric_data)))
-    for (metric_name, data), color in zip(metric_data.items(), colors):
-        hours, values = zip(*sorted(data))
-        ax.plot(hours, values, marker='o', label=metric_name, linewidth=2, color=color)
+        return None
+    
+    metric_names, segments = _metric_segments(results)
+    
+    # Draw every metric as one LineCollection plus a single scatter for the
+    # markers, instead of a Line2D per metric
+    colors = matplotlib.colormaps['tab10'](np.linspace(0, 1, len(metric_names)))
+    lines = LineCollection(segments, colors=colors, linewidths=2, rasterized=True)
+    ax.add_collection(lines)
+    markers = ax.scatter(
+        np.concatenate([segment[:, 0] for segment in segments]),
+        np.concatenate([segment[:, 1] for segment in segments]),
+        s=36,
+        color=np.repeat(colors, [len(segment) for segment in segments], axis=0),
+        zorder=3
+    )
+    ax.autoscale_view()
     
     ax.set_title('Metric Trends Over Time', fontweight='bold', fontsize=12)
     ax.set_xlabel('Time')
     ax.set_ylabel('Metric Value')
-    ax.legend(loc='best')
-    ax.grid(True, alpha=0.3)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+    ax.legend(handles=[
+        Line2D([0], [0], color=color, marker='o', linewidth=2, label=metric_name)
+        for metric_name, color in zip(metric_names, colors)
+    ], loc='best')
+    
+    return {'names': metric_names, 'colors': colors, 'lines': lines, 'markers': markers}
+
+
+def update_metric_trends(results, ax, handles):
+    """Move the metric lines to new data; False if the set of metrics changed."""
+    if not len(results['metric_name']):
+        return False
+    metric_names, segments = _metric_segments(results)
+    if metric_names != handles['names']:
+        return False
+    
+    points = np.concatenate(segments)
+    handles['lines'].set_segments(segments)
+    handles['markers'].set_offsets(points)
+    handles['markers'].set_color(
+        np.repeat(handles['colors'], [len(segment) for segment in segments], axis=0)
+    )
+    _rescale(ax, points)
+    return True
 
 
 def generate_sample_data(db_path: str = "dashboard_demo.db"):
@@ -238,34 +459,39 @@ def generate_sample_data(db_path: str = "dashboard_demo.db"):
     storage = LogStorage(db_path)
     ingestor = LogIngestor()
     
-    # Generate events over last 24 hours
+    # Generate events over last 24 hours, one every 15 minutes. All random
+    # draws and timestamps are made as whole arrays up front, from one seeded
+    # generator so the demo dashboard is reproducible.
+    rng = np.random.default_rng(seed=42)
     base_time = datetime.now() - timedelta(hours=24)
-    events = []
+    n = 24 * 4
+    slots = np.arange(n)
+    hours = slots // 4
+    minutes = (slots % 4) * 15
+    timestamps = (
+        np.datetime64(base_time, 'us') + (hours * 60 + minutes) * np.timedelta64(1, 'm')
+    ).tolist()
+    
+    # Vary error rate (higher during "business hours")
+    error_prob = np.where((hours >= 9) & (hours <= 17), 0.1, 0.05)
+    levels = np.where(rng.random(n) < error_prob, 'ERROR',
+                      np.where(rng.random(n) < 0.2, 'WARNING', 'INFO')).tolist()
+    sources = rng.integers(1, 4, n).tolist()
+    
+    # Build events lazily; only one batch of LogEvent objects is alive at a time
+    events = (
+        LogEvent(
+            timestamp=timestamp,
+            level=level,
+            source=f'app{source}',
+            message=f'Event at {timestamp.strftime("%H:%M")}',
+            metadata={'request_id': f'req_{hour}_{minute}'}
+        )
+        for timestamp, level, source, hour, minute in zip(
+            timestamps, levels, sources, hours.tolist(), minutes.tolist()
+        )
+    )
     
-    for hour in range(24):
-        for minute in [0, 15, 30, 45]:
-            timestamp = base_time + timedelta(hours=hour, minutes=minute)
-            
-            # Vary error rate (higher during "business hours")
-            error_prob = 0.1 if 9 <= hour <= 17 else 0.05
-            level = 'ERROR' if np.random.random() < error_prob else \
-                   'WARNING' if np.random.random() < 0.2 else 'INFO'
-            
-            source = f'app{np.random.randint(1, 4)}'
-            
-            events.append(LogEvent(
-                timestamp=timestamp,
-                level=level,
-                source=source,
-                message=f'Event at {timestamp.strftime("%H:%M")}',
-                metadata={'request_id': f'req_{hour}_{minute}'}
-            ))
-    
-    # Insert events
-    for event in events:
-        storage.insert_event(event)
-    
-    # Compute and store metrics
     metrics = [
         Metric(name='error_count', filter=lambda e: e.level == 'ERROR',
                aggregation='count', window='1h'),
@@ -274,16 +500,15 @@ def generate_sample_data(db_path: str = "dashboard_demo.db"):
     ]
     
     processor = MetricProcessor(metrics)
-    for event in events:
-        updated = processor.add_event(event)
-        for metric_name, result in updated.items():
-            storage.insert_metric(
-                metric_name=result.metric_name,
-                window_start=result.window_start,
-                window_end=result.window_end,
-                value=result.value,
-                grouped_values=result.grouped_values
-            )
+    
+    # Each batch is inserted and fed to the processor before the next is built
+    while True:
+        batch = list(islice(events, 1000))
+        if not batch:
+            break
+        
+        storage.insert_events(batch)
+        storage.insert_metrics(processor.add_events(batch))
     
     storage.close()
     print(f"Generated sample data in {db_path}")
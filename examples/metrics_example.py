@@ -9,7 +9,17 @@ internal BI tooling.
 
 from datetime import datetime, timedelta
 from loglens.models import LogEvent
-from loglens.analytics import Metric, MetricProcessor, AggregationType
+from loglens.analytics import Metric, MetricProcessor, AggregationType, FieldEq, FieldIn
+
+
+# Weight of each error level in the severity score
+SEVERITY_WEIGHTS = {"ERROR": 1, "CRITICAL": 3, "FATAL": 5}
+
+
+def severity_score(events):
+    """Sum the severity weights of a window's events with one table lookup each."""
+    weights = SEVERITY_WEIGHTS
+    return sum(weights[e.level] for e in events)
 
 
 def main():
@@ -20,7 +30,7 @@ def main():
         # Simple count metric
         Metric(
             name="error_rate",
-            filter=lambda e: e.level == "ERROR",
+            filter=FieldEq("level", "ERROR"),
             aggregation="count",
             window="5m"
         ),
@@ -28,7 +38,7 @@ def main():
         # Rate metric
         Metric(
             name="warning_rate",
-            filter=lambda e: e.level == "WARNING",
+            filter=FieldEq("level", "WARNING"),
             aggregation="rate",
             window="5m",
             description="Warnings per second"
@@ -67,11 +77,8 @@ def main():
         # Custom aggregation function
         Metric(
             name="error_severity_score",
-            filter=lambda e: e.level in ("ERROR", "CRITICAL", "FATAL"),
-            aggregation=lambda events: sum(
-                3 if e.level == "CRITICAL" else 5 if e.level == "FATAL" else 1
-                for e in events
-            ),
+            filter=FieldIn("level", SEVERITY_WEIGHTS),
+            aggregation=severity_score,
             window="10m",
             description="Custom severity score for errors"
         ),
@@ -6,7 +6,8 @@ This file demonstrates how easy it is to add new metrics
 without changing any core logic - just define them declaratively!
 """
 
-from loglens.analytics import Metric, MetricProcessor
+from loglens.analytics import Metric, MetricProcessor, FieldEq
+from loglens.models import LogLevel
 
 # ============================================================================
 # EXAMPLE: Adding a new metric is as simple as defining it!
@@ -15,7 +16,7 @@ from loglens.analytics import Metric, MetricProcessor
 # Want to track API errors? Just add this:
 api_error_metric = Metric(
     name="api_error_count",
-    filter=lambda e: e.source == "api" and e.level == "ERROR",
+    filter=lambda e: e.level_code == LogLevel.ERROR and e.source == "api",
     aggregation="count",
     window="5m"
 )
@@ -41,7 +42,7 @@ unique_users_metric = Metric(
 # Want to track errors by service? Just add this:
 errors_by_service_metric = Metric(
     name="errors_by_service",
-    filter=lambda e: e.level == "ERROR",
+    filter=FieldEq("level_code", LogLevel.ERROR),
     aggregation="count",
     window="15m",
     group_by=lambda e: e.source  # Group by source (service name)
@@ -10,9 +10,9 @@ This example shows how to:
 """
 
 from datetime import datetime, timedelta
-from loglens.models import LogEvent
+from loglens.models import LogEvent, LogLevel
 from loglens.storage import LogStorage
-from loglens.analytics import Metric, MetricProcessor
+from loglens.analytics import Metric, MetricProcessor, FieldEq
 
 
 def main():
@@ -71,7 +71,7 @@ def main():
     metrics_def = [
         Metric(
             name='error_count',
-            filter=lambda e: e.level == 'ERROR',
+            filter=FieldEq('level_code', LogLevel.ERROR),
             aggregation='count',
             window='5m'
         ),
@@ -86,17 +86,9 @@ def main():
     
     processor = MetricProcessor(metrics_def)
     
-    # Process events and store metrics
-    for event in events:
-        updated = processor.add_event(event)
-        for metric_name, result in updated.items():
-            storage.insert_metric(
-                metric_name=result.metric_name,
-                window_start=result.window_start,
-                window_end=result.window_end,
-                value=result.value,
-                grouped_values=result.grouped_values
-            )
+    # Process events as one batch, then store every metric update
+    results = processor.add_events(events)
+    storage.insert_metrics(results)
     
     print("  Metrics computed and stored")
     
@@ -12,9 +12,9 @@ import time
 import sys
 import json
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
-from loglens.models import LogEvent
 from loglens.ingestion import LogIngestor
 from loglens.storage import LogStorage, create_query
 from loglens.analytics import Metric, MetricProcessor, create_detector
@@ -41,26 +41,24 @@ def workflow_demo():
     # ========================================================================
     # STEP 1: INGESTION
     # ========================================================================
-    print_step(1, "INGESTION", "Ingesting logs from file...")
+    print_step(1, "INGESTION", "Ingesting logs from file and computing metrics...")
     
     # Create sample log file
     log_file = Path("demo_logs.json")
-    import json
+    base_time = datetime(2024, 1, 1, 12, 0, 0)
+    interval = timedelta(seconds=30)
+    lines = [
+        json.dumps({
+            "timestamp": (base_time + interval * i).isoformat(),
+            "level": 'ERROR' if i % 10 == 0 else 'WARNING' if i % 5 == 0 else 'INFO',
+            "source": f'app{i%3+1}',
+            "message": f"Request {i} processed",
+            "metadata": {"request_id": f"req_{i}"}
+        }) + "\n"
+        for i in range(50)
+    ]
     with open(log_file, 'w') as f:
-        base_time = datetime(2024, 1, 1, 12, 0, 0)
-        for i in range(50):
-            timestamp = base_time + timedelta(seconds=i*30)
-            level = 'ERROR' if i % 10 == 0 else 'WARNING' if i % 5 == 0 else 'INFO'
-            source = f'app{i%3+1}'
-            
-            log_entry = {
-                "timestamp": timestamp.isoformat(),
-                "level": level,
-                "source": source,
-                "message": f"Request {i} processed",
-                "metadata": {"request_id": f"req_{i}"}
-            }
-            f.write(json.dumps(log_entry) + "\n")
+        f.write("".join(lines))
     
     print(f"📄 Created log file: {log_file}")
     print(f"   Contains 50 log events")
@@ -69,63 +67,47 @@ def workflow_demo():
     storage = LogStorage(db_path)
     ingestor = LogIngestor()
     
-    event_count = 0
-    print("\n🔄 Processing logs...")
-    for event in ingestor.ingest_file(log_file, format='json'):
-        storage.insert_event(event)
-        event_count += 1
-        if event_count % 10 == 0:
-            print(f"   Processed {event_count} events...", end='\r')
-    
-    print(f"\n✅ Ingested {event_count} events into database")
-    storage.close()
-    
-    time.sleep(1)
-    
-    # ========================================================================
-    # STEP 2: METRICS & QUERY
-    # ========================================================================
-    print_step(2, "METRICS & QUERY", "Computing metrics and querying data...")
-    
-    storage = LogStorage(db_path)
-    query = create_query(storage)
-    
-    # Define and compute metrics
-    print("📊 Computing metrics...")
     metrics = [
         Metric(name='error_count', filter=lambda e: e.level == 'ERROR',
                aggregation='count', window='5m'),
         Metric(name='events_by_source', filter=lambda e: True,
                aggregation='count', window='5m', group_by=lambda e: e.source),
     ]
-    
     processor = MetricProcessor(metrics)
     
-    # Re-process events to compute metrics
-    events = storage.query_events(limit=None)
-    from loglens.models import LogEvent as LE
-    
+    print("\n🔄 Processing logs...")
+    # One pass over the file: each batch of parsed events is stored and fed
+    # to the metric processor while it is still in memory, so nothing has to
+    # be read back from the database
+    events = ingestor.ingest_file(log_file, format='json')
+    event_count = 0
     metric_count = 0
-    for event_data in events:
-        event = LE(
-            timestamp=datetime.fromisoformat(str(event_data['timestamp'])),
-            level=event_data['level'],
-            source=event_data['source'],
-            message=event_data['message'],
-            metadata=event_data.get('metadata', {})
-        )
-        updated = processor.add_event(event)
-        for metric_name, result in updated.items():
-            storage.insert_metric(
-                metric_name=result.metric_name,
-                window_start=result.window_start,
-                window_end=result.window_end,
-                value=result.value,
-                grouped_values=result.grouped_values
-            )
-            metric_count += 1
+    while True:
+        batch = list(islice(events, 500))
+        if not batch:
+            break
+        
+        storage.insert_events(batch)
+        event_count += len(batch)
+        
+        # Every metric update from the batch is written in one statement
+        results = processor.add_events(batch)
+        storage.insert_metrics(results)
+        metric_count += len(results)
     
+    print(f"✅ Ingested {event_count} events into database")
     print(f"✅ Computed {metric_count} metric values")
+    storage.close()
+    
+    time.sleep(1)
+    
+    # ========================================================================
+    # STEP 2: QUERY
+    # ========================================================================
+    print_step(2, "QUERY", "Querying stored events and metrics...")
+    
+    storage = LogStorage(db_path)
+    query = create_query(storage)
     
     # Query 1: Error events
     print("\n📝 Query 1: Get error events")
@@ -163,39 +145,30 @@ def workflow_demo():
     
     storage = LogStorage(db_path)
     
-    # Get metric values
-    metrics_list = storage.query_metrics(metric_name='error_count', limit=20)
+    # Get metric values: only the two columns replay needs, oldest first
+    timestamps, values = storage.query_metric_values('error_count', limit=20)
     
-    if metrics_list:
+    if values:
         print("🔍 Building baseline from historical data...")
         
         # Create detector
         detector = create_detector('error_count', window_size=15, threshold=2.0)
         
-        # Build baseline
-        for m in reversed(metrics_list[:10]):
-            if m['value'] is not None:
-                window_start = datetime.fromisoformat(str(m['window_start']))
-                detector.add_value(m['value'], window_start)
+        # Build baseline in one batch call
+        detector.add_values(values[:10], timestamps[:10])
         
         print("✅ Baseline established")
         
-        # Check for anomalies in recent values
+        # Check for anomalies in recent values, again as one batch
         print("\n🔍 Checking for anomalies...")
-        anomalies_found = []
+        anomalies_found = detector.add_values(values[10:], timestamps[10:])
         
-        for m in reversed(metrics_list[10:]):
-            if m['value'] is not None:
-                window_start = datetime.fromisoformat(str(m['window_start']))
-                anomaly = detector.add_value(m['value'], window_start)
-                
-                if anomaly:
-                    anomalies_found.append(anomaly)
-                    print(f"\n🚨 ANOMALY DETECTED!")
-                    print(f"   {anomaly.explanation}")
-                    print(f"   Timestamp: {anomaly.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"   Severity: {anomaly.severity.upper()}")
-                    print(f"   Z-score: {anomaly.z_score:.2f}")
+        for anomaly in anomalies_found:
+            print(f"\n🚨 ANOMALY DETECTED!")
+            print(f"   {anomaly.explanation}")
+            print(f"   Timestamp: {anomaly.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"   Severity: {anomaly.severity.upper()}")
+            print(f"   Z-score: {anomaly.z_score:.2f}")
         
         if not anomalies_found:
             print("✅ No anomalies detected - all metrics within normal range")
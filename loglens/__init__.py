@@ -4,7 +4,7 @@ LogLens++ - A streaming log analytics engine.
 
 __version__ = "0.1.0"
 
-from loglens.models import LogEvent
+from loglens.models import LogEvent, LogLevel
 
-__all__ = ['LogEvent']
+__all__ = ['LogEvent', 'LogLevel']
 
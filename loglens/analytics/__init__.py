@@ -9,6 +9,11 @@ from loglens.analytics.metrics import (
     MetricResult,
     MetricProcessor,
     AggregationType,
+    FieldPredicate,
+    FieldEq,
+    FieldIn,
+    FieldGt,
+    FieldGe,
     error_rate_metric,
     warning_rate_metric,
     events_by_source_metric,
@@ -29,6 +34,11 @@ __all__ = [
     'MetricResult',
     'MetricProcessor',
     'AggregationType',
+    'FieldPredicate',
+    'FieldEq',
+    'FieldIn',
+    'FieldGt',
+    'FieldGe',
     'error_rate_metric',
     'warning_rate_metric',
     'events_by_source_metric',
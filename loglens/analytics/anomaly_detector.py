@@ -5,15 +5,26 @@ This module provides anomaly detection using rolling statistics
 (mean and standard deviation) to flag sudden spikes or drops in metrics.
 """
 
+from array import array
+from bisect import bisect_right
 from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Callable
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Callable, Sequence, Tuple, Union
 from enum import Enum
+from itertools import compress
 
+import atexit
+import json
 import math
 
 
+# Lower z-score bounds of the medium, high and critical severities
+_SEVERITY_THRESHOLDS = (2.5, 3.0, 4.0)
+_SEVERITY_LEVELS = ("low", "medium", "high", "critical")
+
+
 class AnomalyType(Enum):
     """Type of anomaly detected."""
     SPIKE = "spike"
@@ -21,6 +32,65 @@ class AnomalyType(Enum):
     NONE = "none"
 
 
+class _Derived:
+    """
+    Dataclass field whose value is derived from the instance when left as None.
+    
+    Used as a field default: dataclasses reads the default through __get__
+    on the class (None), and __init__ stores through __set__. A stored None
+    is replaced by compute(instance) on first read, and the result is kept.
+    """
+    
+    def __init__(self, compute: Callable[[Any], Any]):
+        self.compute = compute
+    
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.attr = f"_{name}"
+    
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return None
+        value = instance.__dict__.get(self.attr)
+        if value is None:
+            value = instance.__dict__[self.attr] = self.compute(instance)
+        return value
+    
+    def __set__(self, instance: Any, value: Any) -> None:
+        instance.__dict__[self.attr] = value
+
+
+def _explain(anomaly: 'Anomaly') -> str:
+    """Human-readable explanation of an anomaly."""
+    name = anomaly.metric_name
+    value = anomaly.value
+    mean = anomaly.baseline_mean
+    abs_z = abs(anomaly.z_score)
+    
+    if anomaly.anomaly_type == AnomalyType.SPIKE:
+        verb, direction = "spiked", "above"
+        multiplier = value / mean if mean > 0 else None
+    else:  # DROP
+        verb, direction = "dropped", "below"
+        if mean > 0:
+            multiplier = mean / value if value > 0 else float('inf')
+        else:
+            multiplier = None
+    
+    if multiplier is None:
+        return (f"{name} {verb} to {value:.2f} "
+                f"({abs_z:.1f} standard deviations {direction} baseline)")
+    if multiplier >= 2.0:
+        return (f"{name} {verb} {multiplier:.1f}x {direction} baseline "
+                f"({value:.2f} vs {mean:.2f} average)")
+    return (f"{name} {verb} {abs_z:.1f} standard deviations {direction} baseline "
+            f"({value:.2f} vs {mean:.2f} average)")
+
+
+def _severity(anomaly: 'Anomaly') -> str:
+    """Severity level (low, medium, high, critical) based on the z-score."""
+    return _SEVERITY_LEVELS[bisect_right(_SEVERITY_THRESHOLDS, abs(anomaly.z_score))]
+
+
 @dataclass
 class Anomaly:
     """
@@ -36,6 +106,11 @@ class Anomaly:
         anomaly_type: Type of anomaly (spike or drop)
         explanation: Human-readable explanation
         severity: Severity level (low, medium, high, critical)
+    
+    ``explanation`` and ``severity`` may be passed in; when left as None
+    they are derived from the other attributes on first access, so
+    anomalies that are only counted or stored as numbers never pay for the
+    string formatting.
     """
     
     metric_name: str
@@ -45,8 +120,8 @@ class Anomaly:
     baseline_std: float
     z_score: float
     anomaly_type: AnomalyType
-    explanation: str
-    severity: str
+    explanation: str = _Derived(_explain)  # type: ignore[assignment]
+    severity: str = _Derived(_severity)  # type: ignore[assignment]
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -96,11 +171,42 @@ class AnomalyDetector:
         self.threshold = threshold
         self.min_samples = min_samples
         
-        # Rolling window of values
-        self.values: deque = deque(maxlen=window_size)
+        # Rolling window of values: a ring buffer of unboxed doubles. _head is
+        # the next slot to write, which is also the oldest value once full.
+        self._buffer = array('d', bytes(8 * window_size))
+        self._head = 0
         
         # Rolling window of timestamps
         self.timestamps: deque = deque(maxlen=window_size)
+        
+        # Running moments of the rolling window (Welford's algorithm)
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        
+        # Standard deviation computed by the last _push(), reused when the
+        # value it scored turns out to be an anomaly
+        self._std = 0.0
+        
+        # Evictions since the moments were last recomputed from the window
+        self._evictions = 0
+        
+        # Appends a value and returns its z-score; see _compile_push()
+        self._push = self._compile_push()
+    
+    @property
+    def values(self) -> Tuple[float, ...]:
+        """
+        Values in the rolling window, oldest first.
+        
+        This is a read-only snapshot: the window lives in a ring buffer, so
+        it is no longer a deque that can be changed in place. Use
+        add_value(), add_values() or reset() to change it.
+        """
+        buffer, head = self._buffer, self._head
+        if len(self.timestamps) < self.window_size:
+            return tuple(buffer[:head])
+        return tuple(buffer[head:] + buffer[:head])
     
     def add_value(self, value: float, timestamp: Optional[datetime] = None) -> Optional[Anomaly]:
         """
@@ -116,122 +222,305 @@ class AnomalyDetector:
         if timestamp is None:
             timestamp = datetime.now()
         
-        # Add to rolling window
-        self.values.append(value)
-        self.timestamps.append(timestamp)
-        
-        # Need minimum samples before detecting
-        if len(self.values) < self.min_samples:
+        z_score = self._push(value, timestamp)
+        if z_score is None or abs(z_score) < self.threshold:
             return None
         
-        # Calculate statistics
-        mean = self._calculate_mean()
-        std = self._calculate_std(mean)
+        return self._build_anomaly(value, timestamp, z_score)
+    
+    def add_values(
+        self,
+        values: Sequence[float],
+        timestamps: Optional[Sequence[datetime]] = None
+    ) -> List[Anomaly]:
+        """
+        Add a batch of values in order and check each for anomalies.
         
-        # Skip if std is too small (constant values)
-        if std < 1e-10:
-            return None
+        Equivalent to calling add_value() for every element, but the batch
+        runs through the same fused loop as detect_batch() and Anomaly objects
+        are only built for flagged values.
         
-        # Calculate z-score
-        z_score = (value - mean) / std
+        Args:
+            values: Metric values, oldest first (any sequence of numbers)
+            timestamps: Matching timestamps (defaults to now for every value)
         
-        # Check if anomaly
-        if abs(z_score) >= self.threshold:
-            anomaly_type = AnomalyType.SPIKE if z_score > 0 else AnomalyType.DROP
-            explanation = self._generate_explanation(value, mean, std, z_score, anomaly_type)
-            severity = self._calculate_severity(abs(z_score))
-            
-            return Anomaly(
-                metric_name=self.metric_name,
-                timestamp=timestamp,
-                value=value,
-                baseline_mean=mean,
-                baseline_std=std,
-                z_score=z_score,
-                anomaly_type=anomaly_type,
-                explanation=explanation,
-                severity=severity
+        Returns:
+            List of anomalies detected within the batch, in input order
+        """
+        if timestamps is None:
+            timestamps = [datetime.now()] * len(values)
+        elif len(timestamps) != len(values):
+            raise ValueError(
+                f"Got {len(values)} values but {len(timestamps)} timestamps"
             )
         
-        return None
-    
-    def _calculate_mean(self) -> float:
-        """Calculate mean of values in rolling window."""
-        if not self.values:
-            return 0.0
-        return sum(self.values) / len(self.values)
-    
-    def _calculate_std(self, mean: Optional[float] = None) -> float:
-        """Calculate standard deviation of values in rolling window."""
-        if len(self.values) < 2:
-            return 0.0
-        
-        if mean is None:
-            mean = self._calculate_mean()
+        values = [float(value) for value in values]
+        baselines = []
+        mask, z_scores = self._scan(values, baselines)
+        self.timestamps.extend(timestamps)
         
-        variance = sum((x - mean) ** 2 for x in self.values) / len(self.values)
-        return math.sqrt(variance)
+        flagged = compress(range(len(values)), mask)
+        return [
+            self._build_anomaly(values[i], timestamps[i], z_scores[i], mean, std)
+            for i, (mean, std) in zip(flagged, baselines)
+        ]
     
-    def _generate_explanation(
+    def detect_batch(
         self,
-        value: float,
-        mean: float,
-        std: float,
-        z_score: float,
-        anomaly_type: AnomalyType
-    ) -> str:
+        values: Sequence[float],
+        timestamps: Optional[Sequence[datetime]] = None
+    ) -> Tuple[List[bool], List[float]]:
         """
-        Generate human-readable explanation for the anomaly.
+        Stream a batch of values through the detector, returning raw flags.
+        
+        Unlike add_values(), no Anomaly objects are built; callers get a mask
+        and the z-scores and can look at the flagged positions only. The
+        whole batch runs through one fused loop that keeps the running
+        moments in local variables, which suits large backfills.
         
         Args:
-            value: The anomalous value
-            mean: Baseline mean
-            std: Baseline standard deviation
-            z_score: Z-score
-            anomaly_type: Type of anomaly
+            values: Metric values, oldest first (any sequence of numbers)
+            timestamps: Matching timestamps (defaults to now for every value)
         
         Returns:
-            Human-readable explanation string
+            Tuple of (anomaly mask, z-scores), one entry per input value.
+            The z-score is 0.0 while the baseline is not yet established or
+            the window is constant.
+        """
+        if timestamps is None:
+            timestamps = [datetime.now()] * len(values)
+        elif len(timestamps) != len(values):
+            raise ValueError(
+                f"Got {len(values)} values but {len(timestamps)} timestamps"
+            )
+        
+        # Convert up front so a bad value cannot leave the window half-updated
+        result = self._scan([float(value) for value in values])
+        self.timestamps.extend(timestamps)
+        return result
+    
+    def _scan(
+        self,
+        values: List[float],
+        baselines: Optional[List[Tuple[float, float]]] = None
+    ) -> Tuple[List[bool], List[float]]:
         """
-        abs_z = abs(z_score)
+        Push a batch of values and return (anomaly mask, z-scores) for it.
+        
+        Same arithmetic as _push(), but the running moments stay in local
+        variables for the whole batch and are written back once at the end.
+        The caller appends the matching timestamps afterwards. If baselines
+        is given, the (mean, std) each flagged value was scored against is
+        appended to it, in order.
+        """
+        threshold = self.threshold
+        window_size = self.window_size
+        min_samples = max(self.min_samples, 2)
+        buffer = self._buffer
+        fsum = math.fsum
+        sqrt = math.sqrt
+        
+        n = self._n
+        mean = self._mean
+        m2 = self._m2
+        std = self._std
+        head = self._head
+        evictions = self._evictions
+        count = len(self.timestamps)
         
-        if anomaly_type == AnomalyType.SPIKE:
-            if mean > 0:
-                multiplier = value / mean
-                if multiplier >= 2.0:
-                    return f"{self.metric_name} spiked {multiplier:.1f}x above baseline ({value:.2f} vs {mean:.2f} average)"
+        mask = []
+        z_scores = []
+        flag = mask.append
+        append = z_scores.append
+        for value in values:
+            # Evict the oldest value (reverse Welford update)
+            evicting = count == window_size
+            if evicting:
+                evicted = buffer[head]
+                n -= 1
+                if n:
+                    delta = evicted - mean
+                    mean -= delta / n
+                    m2 -= delta * (evicted - mean)
                 else:
-                    return f"{self.metric_name} spiked {abs_z:.1f} standard deviations above baseline ({value:.2f} vs {mean:.2f} average)"
+                    mean = m2 = 0.0
             else:
-                return f"{self.metric_name} spiked to {value:.2f} ({abs_z:.1f} standard deviations above baseline)"
-        else:  # DROP
-            if mean > 0:
-                multiplier = mean / value if value > 0 else float('inf')
-                if multiplier >= 2.0:
-                    return f"{self.metric_name} dropped {multiplier:.1f}x below baseline ({value:.2f} vs {mean:.2f} average)"
-                else:
-                    return f"{self.metric_name} dropped {abs_z:.1f} standard deviations below baseline ({value:.2f} vs {mean:.2f} average)"
+                count += 1
+            
+            buffer[head] = value
+            head += 1
+            if head == window_size:
+                head = 0
+            n += 1
+            delta = value - mean
+            mean += delta / n
+            m2 += delta * (value - mean)
+            
+            # Exact resync once per full turn of the window (the buffer is full)
+            if evicting:
+                evictions += 1
+                if evictions >= window_size:
+                    mean = fsum(buffer) / n
+                    m2 = fsum((x - mean) ** 2 for x in buffer)
+                    evictions = 0
+            
+            if n < min_samples:
+                flag(False)
+                append(0.0)
+                continue
+            
+            std = sqrt(m2 / n) if m2 > 0.0 else 0.0
+            if std < 1e-10:
+                flag(False)
+                append(0.0)
+                continue
+            
+            z_score = (value - mean) / std
+            if abs(z_score) >= threshold:
+                flag(True)
+                if baselines is not None:
+                    baselines.append((mean, std))
             else:
-                return f"{self.metric_name} dropped to {value:.2f} ({abs_z:.1f} standard deviations below baseline)"
+                flag(False)
+            append(z_score)
+        
+        self._n = n
+        self._mean = mean
+        self._m2 = m2
+        self._std = std
+        self._head = head
+        self._evictions = evictions
+        return mask, z_scores
     
-    def _calculate_severity(self, abs_z_score: float) -> str:
+    def _compile_push(self) -> Callable[[float, datetime], Optional[float]]:
         """
-        Calculate severity based on z-score.
+        Build the _push() function for this detector.
         
-        Args:
-            abs_z_score: Absolute z-score
+        The window size, minimum sample count, value buffer and timestamp
+        deque are fixed for the detector's lifetime, so they are bound as
+        closure variables instead of being looked up on every value, and the
+        Welford updates are inlined.
         
         Returns:
-            Severity level (low, medium, high, critical)
-        """
-        if abs_z_score >= 4.0:
-            return "critical"
-        elif abs_z_score >= 3.0:
-            return "high"
-        elif abs_z_score >= 2.5:
-            return "medium"
-        else:
-            return "low"
+            Function taking (value, timestamp) that appends the value to the
+            rolling window and returns its z-score against the updated
+            window, or None if there are too few samples or the window is
+            (near) constant
+        """
+        detector = self
+        window_size = self.window_size
+        min_samples = max(self.min_samples, 2)
+        buffer = self._buffer
+        timestamps = self.timestamps
+        append_timestamp = timestamps.append
+        recompute_stats = self._recompute_stats
+        sqrt = math.sqrt
+        
+        def push(value: float, timestamp: datetime) -> Optional[float]:
+            n = detector._n
+            mean = detector._mean
+            m2 = detector._m2
+            head = detector._head
+            
+            # Evict the oldest value from the running moments before it is
+            # overwritten (reverse Welford update)
+            evicting = len(timestamps) == window_size
+            if evicting:
+                evicted = buffer[head]
+                n -= 1
+                if n:
+                    delta = evicted - mean
+                    mean -= delta / n
+                    m2 -= delta * (evicted - mean)
+                else:
+                    mean = m2 = 0.0
+            
+            # Add to rolling window and fold into the running moments
+            buffer[head] = value
+            head += 1
+            detector._head = head if head < window_size else 0
+            append_timestamp(timestamp)
+            n += 1
+            delta = value - mean
+            mean += delta / n
+            m2 += delta * (value - mean)
+            detector._n = n
+            detector._mean = mean
+            detector._m2 = m2
+            
+            # Reverse updates accumulate rounding error, so once per full turn
+            # of the window the moments are recomputed exactly (O(1) amortized)
+            if evicting:
+                evictions = detector._evictions + 1
+                if evictions >= window_size:
+                    recompute_stats()
+                    mean = detector._mean
+                    m2 = detector._m2
+                else:
+                    detector._evictions = evictions
+            
+            # Need minimum samples before detecting
+            if n < min_samples:
+                return None
+            
+            # M2 can drift marginally below zero after many reverse updates
+            std = detector._std = sqrt(m2 / n) if m2 > 0.0 else 0.0
+            
+            # Skip if std is too small (constant values)
+            if std < 1e-10:
+                return None
+            
+            return (value - mean) / std
+        
+        return push
+    
+    def _build_anomaly(
+        self,
+        value: float,
+        timestamp: datetime,
+        z_score: float,
+        baseline_mean: Optional[float] = None,
+        baseline_std: Optional[float] = None
+    ) -> Anomaly:
+        """
+        Build an Anomaly for a scored value.
+        
+        The baseline defaults to the current running moments, i.e. those of
+        the value just scored by _push().
+        """
+        return Anomaly(
+            metric_name=self.metric_name,
+            timestamp=timestamp,
+            value=value,
+            baseline_mean=self._mean if baseline_mean is None else baseline_mean,
+            baseline_std=self._std if baseline_std is None else baseline_std,
+            z_score=z_score,
+            anomaly_type=AnomalyType.SPIKE if z_score > 0 else AnomalyType.DROP
+        )
+    
+    def _recompute_stats(self) -> None:
+        """Recompute the running moments exactly from the values in the window."""
+        # Order does not matter for the sums, so read the buffer as it is laid out
+        n = len(self.timestamps)
+        values = self._buffer[:n]
+        mean = math.fsum(values) / n if n else 0.0
+        self._n = n
+        self._mean = mean
+        self._m2 = math.fsum((value - mean) ** 2 for value in values)
+        self._evictions = 0
+    
+    def _calculate_mean(self) -> float:
+        """Calculate mean of values in rolling window."""
+        return self._mean if self._n else 0.0
+    
+    def _calculate_std(self, mean: Optional[float] = None) -> float:
+        """Calculate (population) standard deviation of values in rolling window."""
+        if self._n < 2:
+            return 0.0
+        
+        # M2 can drift marginally below zero after many reverse updates
+        variance = max(self._m2, 0.0) / self._n
+        return math.sqrt(variance)
     
     def get_baseline_stats(self) -> Dict[str, float]:
         """
@@ -245,13 +534,71 @@ class AnomalyDetector:
         return {
             'mean': mean,
             'std': std,
-            'sample_count': len(self.values)
+            'sample_count': len(self.timestamps)
         }
     
     def reset(self) -> None:
         """Reset the detector (clear rolling window)."""
-        self.values.clear()
+        self._head = 0
         self.timestamps.clear()
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._std = 0.0
+        self._evictions = 0
+    
+    def save_state(self, path: Union[str, Path]) -> None:
+        """
+        Persist the rolling window to a JSON state file.
+        
+        The file holds one entry per metric name, so several detectors can
+        share it. It is rewritten atomically.
+        
+        Args:
+            path: Path to the state file
+        """
+        path = Path(path)
+        state = _read_state_file(path)
+        state[self.metric_name] = {
+            'values': self.values,
+            'timestamps': [timestamp.isoformat() for timestamp in self.timestamps],
+        }
+        
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(json.dumps(state))
+        tmp_path.replace(path)
+    
+    def load_state(self, path: Union[str, Path]) -> bool:
+        """
+        Restore the rolling window saved by save_state().
+        
+        The running moments are rebuilt from the restored values, so the
+        baseline is warm immediately without accumulating drift across runs.
+        
+        Args:
+            path: Path to the state file
+        
+        Returns:
+            True if state for this metric was found and loaded
+        """
+        entry = _read_state_file(Path(path)).get(self.metric_name)
+        if not entry:
+            return False
+        
+        self.reset()
+        values = entry['values'][-self.window_size:]
+        timestamps = entry['timestamps'][-self.window_size:]
+        for value, timestamp in zip(values, timestamps):
+            self._push(value, datetime.fromisoformat(timestamp))
+        
+        return True
+
+
+def _read_state_file(path: Path) -> Dict[str, Any]:
+    """Read a detector state file, treating a missing file as empty."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
 
 
 class MultiMetricAnomalyDetector:
@@ -280,6 +627,8 @@ class MultiMetricAnomalyDetector:
         self.threshold = threshold
         self.min_samples = min_samples
         self.detectors: Dict[str, AnomalyDetector] = {}
+        # Bound _push methods by metric name, for the per-timestep hot path
+        self._pushers: Dict[str, Callable[[float, datetime], Optional[float]]] = {}
     
     def add_metric_value(
         self,
@@ -298,17 +647,83 @@ class MultiMetricAnomalyDetector:
         Returns:
             Anomaly if detected, None otherwise
         """
-        # Get or create detector for this metric
-        if metric_name not in self.detectors:
-            self.detectors[metric_name] = AnomalyDetector(
+        return self._get_detector(metric_name).add_value(value, timestamp)
+    
+    def add_metric_series(
+        self,
+        metric_name: str,
+        values: Sequence[float],
+        timestamps: Optional[Sequence[datetime]] = None
+    ) -> List[Anomaly]:
+        """
+        Add a series of values for one metric and check each for anomalies.
+        
+        Args:
+            metric_name: Name of the metric
+            values: Metric values, oldest first
+            timestamps: Matching timestamps (defaults to now)
+        
+        Returns:
+            List of detected anomalies, in input order
+        """
+        return self._get_detector(metric_name).add_values(values, timestamps)
+    
+    def add_metrics_series(
+        self,
+        series: Dict[str, Sequence[float]],
+        timestamps: Optional[Sequence[datetime]] = None
+    ) -> List[Anomaly]:
+        """
+        Add aligned series for several metrics at once.
+        
+        Metrics are independent, so each series is run through its own
+        detector in one tight pass (metric by metric) rather than
+        interleaving metrics at every timestep. Results are the same as
+        calling add_metric_values() once per timestep.
+        
+        Args:
+            series: Dictionary of metric_name -> values, oldest first
+            timestamps: Timestamps shared by all series (defaults to now)
+        
+        Returns:
+            List of detected anomalies ordered by timestep, then metric
+        """
+        lengths = {len(values) for values in series.values()}
+        if len(lengths) > 1:
+            raise ValueError("All metric series must have the same length")
+        length = lengths.pop() if lengths else 0
+        if timestamps is None:
+            timestamps = [datetime.now()] * length
+        elif len(timestamps) != length:
+            raise ValueError(f"Got {length} values per metric but {len(timestamps)} timestamps")
+        
+        flagged = []
+        for metric_index, (metric_name, values) in enumerate(series.items()):
+            detector = self._get_detector(metric_name)
+            push = detector._push
+            threshold = detector.threshold
+            for i, (value, timestamp) in enumerate(zip(values, timestamps)):
+                value = float(value)
+                z_score = push(value, timestamp)
+                if z_score is not None and abs(z_score) >= threshold:
+                    anomaly = detector._build_anomaly(value, timestamp, z_score)
+                    flagged.append((i, metric_index, anomaly))
+        
+        flagged.sort(key=lambda item: item[:2])
+        return [anomaly for _, _, anomaly in flagged]
+    
+    def _get_detector(self, metric_name: str) -> AnomalyDetector:
+        """Get or create the detector for a metric."""
+        detector = self.detectors.get(metric_name)
+        if detector is None:
+            detector = self.detectors[metric_name] = AnomalyDetector(
                 metric_name=metric_name,
                 window_size=self.window_size,
                 threshold=self.threshold,
                 min_samples=self.min_samples
             )
         
-        detector = self.detectors[metric_name]
-        return detector.add_value(value, timestamp)
+        return detector
     
     def get_all_anomalies(
         self,
@@ -325,11 +740,41 @@ class MultiMetricAnomalyDetector:
         Returns:
             List of detected anomalies
         """
+        return self.add_metric_values(metric_values, timestamp)
+    
+    def add_metric_values(
+        self,
+        metric_values: Dict[str, float],
+        timestamp: Optional[datetime] = None
+    ) -> List[Anomaly]:
+        """
+        Add one value per metric for a single timestep.
+        
+        All metrics share one timestamp and one threshold. Each metric costs
+        a dict lookup and an O(1) update of its running moments, and Anomaly
+        objects are only built for metrics whose z-score crosses the threshold.
+        
+        Args:
+            metric_values: Dictionary of metric_name -> value
+            timestamp: Timestamp shared by all values (defaults to now)
+        
+        Returns:
+            List of detected anomalies, in metric_values order
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+        
         anomalies = []
+        pushers = self._pushers
+        threshold = self.threshold
         for metric_name, value in metric_values.items():
-            anomaly = self.add_metric_value(metric_name, value, timestamp)
-            if anomaly:
-                anomalies.append(anomaly)
+            push = pushers.get(metric_name)
+            if push is None:
+                push = pushers[metric_name] = self._get_detector(metric_name)._push
+            z_score = push(value, timestamp)
+            if z_score is not None and abs(z_score) >= threshold:
+                detector = self.detectors[metric_name]
+                anomalies.append(detector._build_anomaly(value, timestamp, z_score))
         
         return anomalies
     
@@ -353,8 +798,9 @@ class MultiMetricAnomalyDetector:
             metric_name: If provided, reset only this metric. Otherwise reset all.
         """
         if metric_name:
-            if metric_name in self.detectors:
-                self.detectors[metric_name].reset()
+            detector = self.detectors.get(metric_name)
+            if detector is not None:
+                detector.reset()
         else:
             for detector in self.detectors.values():
                 detector.reset()
@@ -363,7 +809,8 @@ class MultiMetricAnomalyDetector:
 def create_detector(
     metric_name: str,
     window_size: int = 20,
-    threshold: float = 2.0
+    threshold: float = 2.0,
+    state_path: Optional[Union[str, Path]] = None
 ) -> AnomalyDetector:
     """
     Create an anomaly detector for a single metric.
@@ -372,11 +819,18 @@ def create_detector(
         metric_name: Name of the metric
         window_size: Rolling window size
         threshold: Z-score threshold
+        state_path: Optional JSON state file. If given, the detector starts
+            from the baseline saved there and saves its window back at
+            interpreter exit, so repeated runs keep a warm baseline.
     
     Returns:
         AnomalyDetector instance
     """
-    return AnomalyDetector(metric_name, window_size, threshold)
+    detector = AnomalyDetector(metric_name, window_size, threshold)
+    if state_path is not None:
+        detector.load_state(state_path)
+        atexit.register(detector.save_state, state_path)
+    return detector
 
 
 def create_multi_detector(
@@ -5,14 +5,19 @@ This module provides a flexible, declarative way to define metrics
 that can be computed over log events without changing core logic.
 """
 
+import heapq
+import operator
+from bisect import bisect_left, insort
 import re
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Callable, Optional, Dict, Any, List, Union
-from collections import defaultdict
+from typing import Callable, Deque, Optional, Dict, Any, List, Mapping, Sequence, Union
+from collections import Counter, defaultdict, deque
+from itertools import compress, repeat
 from enum import Enum
+from types import MappingProxyType
 
-from loglens.models import LogEvent
+from loglens.models import _SLOTS, LogEvent, LogLevel
 
 
 class AggregationType(Enum):
@@ -27,7 +32,162 @@ class AggregationType(Enum):
     UNIQUE_COUNT = "unique_count"
 
 
-@dataclass
+# Window strings such as '5m': an amount and a unit suffix
+_WINDOW_RE = re.compile(r'^(\d+)([smhd])$')
+_WINDOW_UNITS = {
+    's': 'seconds',
+    'm': 'minutes',
+    'h': 'hours',
+    'd': 'days'
+}
+
+
+@dataclass(frozen=True)
+class FieldPredicate:
+    """
+    Declarative event filter on a single LogEvent attribute.
+    
+    Predicates are callable, so they can be used anywhere a filter lambda
+    is accepted. When events are processed in batches, the processor reads
+    each attribute once per batch and evaluates the predicate over the
+    whole column instead of calling a filter per event.
+    
+    Attributes:
+        field: Name of the LogEvent attribute to test (e.g. 'level')
+        value: Value to compare against
+    """
+    
+    field: str
+    value: Any
+    
+    def __post_init__(self):
+        """Hook for subclasses to normalize ``value``."""
+    
+    def __call__(self, event: LogEvent) -> bool:
+        """Evaluate the predicate against a single event."""
+        raise NotImplementedError
+    
+    def mask(self, column: List[Any]) -> List[bool]:
+        """
+        Evaluate the predicate over a column of attribute values.
+        
+        Args:
+            column: Values of ``field`` for a batch of events
+        
+        Returns:
+            List of booleans, one per value
+        """
+        raise NotImplementedError
+    
+    def compile(self) -> Callable[[LogEvent], bool]:
+        """
+        Build a plain function equivalent to calling the predicate.
+        
+        The function reads the attribute with ``operator.attrgetter`` and
+        closes over the value, skipping the instance call and the lookups
+        of ``field`` and ``value`` that ``__call__`` makes per event.
+        """
+        raise NotImplementedError
+
+
+class FieldEq(FieldPredicate):
+    """Matches events where ``field == value``."""
+    
+    def __call__(self, event: LogEvent) -> bool:
+        """Evaluate the predicate against a single event."""
+        return getattr(event, self.field) == self.value
+    
+    def mask(self, column: List[Any]) -> List[bool]:
+        """Evaluate the predicate over a column of attribute values."""
+        value = self.value
+        return [v == value for v in column]
+    
+    def compile(self) -> Callable[[LogEvent], bool]:
+        """Build a plain function equivalent to calling the predicate."""
+        get = operator.attrgetter(self.field)
+        value = self.value
+        
+        def matches(event: LogEvent) -> bool:
+            return get(event) == value
+        return matches
+
+
+class FieldIn(FieldPredicate):
+    """Matches events where ``field`` is one of ``value`` (any iterable)."""
+    
+    def __post_init__(self):
+        """Freeze the allowed values into a set for O(1) membership tests."""
+        object.__setattr__(self, 'value', frozenset(self.value))
+    
+    def __call__(self, event: LogEvent) -> bool:
+        """Evaluate the predicate against a single event."""
+        return getattr(event, self.field) in self.value
+    
+    def mask(self, column: List[Any]) -> List[bool]:
+        """Evaluate the predicate over a column of attribute values."""
+        values = self.value
+        return [v in values for v in column]
+    
+    def compile(self) -> Callable[[LogEvent], bool]:
+        """Build a plain function equivalent to calling the predicate."""
+        get = operator.attrgetter(self.field)
+        values = self.value
+        
+        def matches(event: LogEvent) -> bool:
+            return get(event) in values
+        return matches
+
+
+class FieldGt(FieldPredicate):
+    """Matches events where ``field > value``."""
+    
+    def __call__(self, event: LogEvent) -> bool:
+        """Evaluate the predicate against a single event."""
+        return getattr(event, self.field) > self.value
+    
+    def mask(self, column: List[Any]) -> List[bool]:
+        """Evaluate the predicate over a column of attribute values."""
+        value = self.value
+        return [v > value for v in column]
+    
+    def compile(self) -> Callable[[LogEvent], bool]:
+        """Build a plain function equivalent to calling the predicate."""
+        get = operator.attrgetter(self.field)
+        value = self.value
+        
+        def matches(event: LogEvent) -> bool:
+            return get(event) > value
+        return matches
+
+
+class FieldGe(FieldPredicate):
+    """
+    Matches events where ``field >= value``.
+    
+    Combined with ``LogEvent.level_code`` this selects a level and everything
+    more severe, e.g. ``FieldGe('level_code', LogLevel.ERROR)``.
+    """
+    
+    def __call__(self, event: LogEvent) -> bool:
+        """Evaluate the predicate against a single event."""
+        return getattr(event, self.field) >= self.value
+    
+    def mask(self, column: List[Any]) -> List[bool]:
+        """Evaluate the predicate over a column of attribute values."""
+        value = self.value
+        return [v >= value for v in column]
+    
+    def compile(self) -> Callable[[LogEvent], bool]:
+        """Build a plain function equivalent to calling the predicate."""
+        get = operator.attrgetter(self.field)
+        value = self.value
+        
+        def matches(event: LogEvent) -> bool:
+            return get(event) >= value
+        return matches
+
+
+@dataclass(**_SLOTS)
 class Metric:
     """
     Declarative metric definition.
@@ -97,8 +257,7 @@ class Metric:
         Raises:
             ValueError: If window string is invalid
         """
-        pattern = r'^(\d+)([smhd])$'
-        match = re.match(pattern, window_str.lower())
+        match = _WINDOW_RE.match(window_str.lower())
         if not match:
             raise ValueError(
                 f"Invalid window format: {window_str}. "
@@ -108,17 +267,10 @@ class Metric:
         value = int(match.group(1))
         unit = match.group(2)
         
-        unit_map = {
-            's': 'seconds',
-            'm': 'minutes',
-            'h': 'hours',
-            'd': 'days'
-        }
-        
-        return timedelta(**{unit_map[unit]: value})
+        return timedelta(**{_WINDOW_UNITS[unit]: value})
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class MetricResult:
     """Result of computing a metric."""
     
@@ -149,6 +301,520 @@ class MetricResult:
         return f"MetricResult({self.metric_name}={self.value})"
 
 
+def _compile_aggregation(metric: Metric) -> Callable[[Sequence[LogEvent]], Any]:
+    """
+    Build the aggregation function for a metric once, up front.
+    
+    The returned function closes over the metric's value extractor and
+    percentile, so aggregating a window neither re-dispatches on the
+    aggregation type nor re-reads metric attributes on every update.
+    
+    Args:
+        metric: Metric definition
+    
+    Returns:
+        Function mapping a non-empty window of events to a value
+    """
+    agg_type = metric.aggregation
+    
+    # Custom aggregation function; windows are deques, so hand it a list as documented
+    if callable(agg_type):
+        def custom(events: Sequence[LogEvent]) -> Any:
+            return agg_type(list(events))
+        return custom
+    
+    if agg_type == AggregationType.COUNT:
+        return len
+    
+    if agg_type == AggregationType.RATE:
+        def rate(events: Sequence[LogEvent]) -> float:
+            # Rate per second
+            time_span = (events[-1].timestamp - events[0].timestamp).total_seconds()
+            if time_span == 0:
+                return float(len(events))
+            return len(events) / time_span if time_span > 0 else 0.0
+        return rate
+    
+    # Every remaining aggregation works on extracted values
+    extract = metric.value_extractor
+    if not extract:
+        def missing_extractor(events: Sequence[LogEvent]) -> Any:
+            raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
+        return missing_extractor
+    
+    reduce = _compile_reduction(metric)
+    if reduce is None:
+        raise ValueError(f"Unsupported aggregation type: {agg_type}")
+    
+    def aggregate(events: Sequence[LogEvent]) -> Any:
+        return reduce(list(map(extract, events)))
+    return aggregate
+
+
+def _compile_reduction(metric: Metric) -> Optional[Callable[[List[Any]], Any]]:
+    """
+    Build the reduction from a metric's extracted values to its aggregate.
+    
+    Args:
+        metric: Metric definition
+    
+    Returns:
+        Function mapping a non-empty list of extracted values to a value
+        (it may reorder the list), or None if the aggregation does not work
+        on extracted values
+    """
+    agg_type = metric.aggregation
+    
+    if agg_type == AggregationType.AVERAGE:
+        def average(values: List[Any]) -> float:
+            return sum(values) / len(values)
+        return average
+    
+    if agg_type == AggregationType.SUM:
+        return sum
+    
+    if agg_type == AggregationType.MIN:
+        return min
+    
+    if agg_type == AggregationType.MAX:
+        return max
+    
+    if agg_type == AggregationType.PERCENTILE:
+        fraction = metric.percentile / 100.0
+        
+        def percentile(values: List[Any]) -> Any:
+            values.sort()
+            return values[int(fraction * (len(values) - 1))]
+        return percentile
+    
+    if agg_type == AggregationType.UNIQUE_COUNT:
+        def unique_count(values: List[Any]) -> int:
+            return len(set(values))
+        return unique_count
+    
+    return None
+
+
+class _WindowState:
+    """
+    Incremental aggregation state for one metric's window.
+    
+    The processor reports every event entering and leaving the window, so
+    the aggregate is kept up to date instead of recomputed from the window
+    on each update. Events leave in the order they arrived.
+    """
+    
+    __slots__ = ()
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        raise NotImplementedError
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        raise NotImplementedError
+    
+    def value(self) -> Any:
+        """Aggregate of the (non-empty) window."""
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        raise NotImplementedError
+    
+    def result(self, name: str, window_start: datetime, window_end: datetime) -> MetricResult:
+        """Build the metric's result for the current window."""
+        return MetricResult(
+            metric_name=name,
+            value=self.value(),
+            window_start=window_start,
+            window_end=window_end
+        )
+
+
+class _WindowExtreme(_WindowState):
+    """
+    Running minimum or maximum of a metric's window (monotonic deque).
+    
+    Keeps only the values that can still become the extreme once older
+    events expire, each tagged with its position in the window's arrival
+    order. Adding and evicting an event are amortized O(1), and the current
+    extreme is always at the front.
+    """
+    
+    __slots__ = ('_extract', '_dominated', '_candidates', '_added', '_evicted')
+    
+    def __init__(self, extract: Callable[[LogEvent], Any], maximum: bool):
+        """
+        Initialize the tracker.
+        
+        Args:
+            extract: The metric's value extractor
+            maximum: Track the maximum if True, otherwise the minimum
+        """
+        self._extract = extract
+        # A newer value makes an older candidate redundant when it is at least as extreme
+        self._dominated = operator.le if maximum else operator.ge
+        self._candidates: Deque[tuple] = deque()
+        self._added = 0
+        self._evicted = 0
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        value = self._extract(event)
+        candidates = self._candidates
+        dominated = self._dominated
+        while candidates and dominated(candidates[-1][0], value):
+            candidates.pop()
+        candidates.append((value, self._added))
+        self._added += 1
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        if self._candidates[0][1] == self._evicted:
+            self._candidates.popleft()
+        self._evicted += 1
+    
+    def value(self) -> Any:
+        """Current extreme of the (non-empty) window."""
+        return self._candidates[0][0]
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        self._candidates.clear()
+        self._added = 0
+        self._evicted = 0
+
+
+class _WindowSum(_WindowState):
+    """
+    Running sum (or mean) of a metric's window.
+    
+    Each update adds the new value and subtracts evicted ones, so the
+    aggregate costs O(1) regardless of window length. Float rounding from
+    the subtractions is discarded by re-summing the window exactly once
+    per window's worth of evictions, which keeps the amortized cost O(1).
+    """
+    
+    __slots__ = ('_extract', '_mean', '_values', '_total', '_evictions')
+    
+    def __init__(self, extract: Callable[[LogEvent], Any], mean: bool):
+        """
+        Initialize the tracker.
+        
+        Args:
+            extract: The metric's value extractor
+            mean: Report the mean of the window instead of its sum
+        """
+        self._extract = extract
+        self._mean = mean
+        # Values in arrival order, so evicting does not re-run the extractor
+        self._values: Deque[Any] = deque()
+        # Starts as int 0 so integer values keep an exact integer sum
+        self._total: Any = 0
+        self._evictions = 0
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        value = self._extract(event)
+        self._total += value
+        self._values.append(value)
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        values = self._values
+        self._total -= values.popleft()
+        self._evictions += 1
+        if self._evictions >= len(values):
+            self._total = sum(values)
+            self._evictions = 0
+    
+    def value(self) -> Any:
+        """Sum or mean of the (non-empty) window."""
+        if self._mean:
+            return self._total / len(self._values)
+        return self._total
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        self._values.clear()
+        self._total = 0
+        self._evictions = 0
+
+
+class _WindowDistinct(_WindowState):
+    """
+    Number of distinct values in a metric's window.
+    
+    Keeps a count per distinct value, so each update is O(1) instead of
+    building a set from the whole window. The count is exact.
+    """
+    
+    __slots__ = ('_extract', '_values', '_counts')
+    
+    def __init__(self, extract: Callable[[LogEvent], Any]):
+        """
+        Initialize the tracker.
+        
+        Args:
+            extract: The metric's value extractor
+        """
+        self._extract = extract
+        # Values in arrival order, so evicting does not re-run the extractor
+        self._values: Deque[Any] = deque()
+        self._counts: Dict[Any, int] = {}
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        value = self._extract(event)
+        counts = self._counts
+        counts[value] = counts.get(value, 0) + 1
+        self._values.append(value)
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        value = self._values.popleft()
+        counts = self._counts
+        remaining = counts[value] - 1
+        if remaining:
+            counts[value] = remaining
+        else:
+            del counts[value]
+    
+    def value(self) -> int:
+        """Distinct values in the (non-empty) window."""
+        return len(self._counts)
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        self._values.clear()
+        self._counts.clear()
+
+
+class _WindowPercentile(_WindowState):
+    """
+    Percentile of a metric's window, kept in a sorted list.
+    
+    Each update is a binary search plus one list insert or delete, instead
+    of extracting and sorting every value in the window.
+    """
+    
+    __slots__ = ('_extract', '_fraction', '_values', '_sorted')
+    
+    def __init__(self, extract: Callable[[LogEvent], Any], percentile: float):
+        """
+        Initialize the tracker.
+        
+        Args:
+            extract: The metric's value extractor
+            percentile: Percentile to report (0-100)
+        """
+        self._extract = extract
+        self._fraction = percentile / 100.0
+        # Values in arrival order, so evicting does not re-run the extractor
+        self._values: Deque[Any] = deque()
+        self._sorted: List[Any] = []
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        value = self._extract(event)
+        insort(self._sorted, value)
+        self._values.append(value)
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        value = self._values.popleft()
+        del self._sorted[bisect_left(self._sorted, value)]
+    
+    def value(self) -> Any:
+        """Percentile of the (non-empty) window."""
+        values = self._sorted
+        return values[int(self._fraction * (len(values) - 1))]
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        self._values.clear()
+        self._sorted.clear()
+
+
+class _WindowGroups(_WindowState):
+    """
+    Per-group aggregates of a metric's window.
+    
+    Keeps the number of window events in each group and, for value
+    aggregations, one incremental state per group, so a grouped update
+    costs O(1) plus O(groups) to report, instead of regrouping the whole
+    window.
+    """
+    
+    __slots__ = ('_group_by', '_make_state', '_keys', '_counts', '_states')
+    
+    def __init__(self, group_by: Callable[[LogEvent], Any],
+                 make_state: Optional[Callable[[], _WindowState]]):
+        """
+        Initialize the tracker.
+        
+        Args:
+            group_by: The metric's group key function
+            make_state: Factory for each group's state, or None to count events
+        """
+        self._group_by = group_by
+        self._make_state = make_state
+        # Group keys in arrival order, so evicting does not re-run group_by
+        self._keys: Deque[Any] = deque()
+        self._counts: Dict[Any, int] = {}
+        self._states: Dict[Any, _WindowState] = {}
+    
+    def add(self, event: LogEvent) -> None:
+        """Add the newest event of the window."""
+        key = self._group_by(event)
+        if self._make_state is not None:
+            state = self._states.get(key)
+            if state is None:
+                state = self._make_state()
+                state.add(event)
+                self._states[key] = state
+            else:
+                state.add(event)
+        counts = self._counts
+        counts[key] = counts.get(key, 0) + 1
+        self._keys.append(key)
+    
+    def evict(self, event: LogEvent) -> None:
+        """Remove the oldest event of the window."""
+        key = self._keys.popleft()
+        counts = self._counts
+        remaining = counts[key] - 1
+        if remaining:
+            counts[key] = remaining
+            if self._make_state is not None:
+                self._states[key].evict(event)
+        else:
+            del counts[key]
+            self._states.pop(key, None)
+    
+    def value(self) -> Dict[Any, Any]:
+        """Aggregate of each group in the (non-empty) window."""
+        if self._make_state is None:
+            return dict(self._counts)
+        return {key: state.value() for key, state in self._states.items()}
+    
+    def clear(self) -> None:
+        """Forget every event."""
+        self._keys.clear()
+        self._counts.clear()
+        self._states.clear()
+    
+    def result(self, name: str, window_start: datetime, window_end: datetime) -> MetricResult:
+        """Build the metric's grouped result for the current window."""
+        return MetricResult(
+            metric_name=name,
+            value=None,  # No single value when grouped
+            window_start=window_start,
+            window_end=window_end,
+            grouped_values=self.value()
+        )
+
+
+def _compile_window_state(metric: Metric) -> Optional[_WindowState]:
+    """
+    Build incremental window state for metrics that can keep one.
+    
+    MIN, MAX and PERCENTILE metrics update their aggregate as events
+    enter and leave the window instead of scanning (or sorting) the whole
+    window per update, and UNIQUE_COUNT keeps a count per distinct value.
+    SUM and AVERAGE keep a running total. Grouped metrics keep one such
+    state per group; grouped COUNT keeps a count per group.
+    
+    Args:
+        metric: Metric definition
+    
+    Returns:
+        State object, or None if the metric is aggregated from its window
+    """
+    make_state = _window_state_factory(metric)
+    if metric.group_by is None:
+        return make_state() if make_state is not None else None
+    if make_state is None and metric.aggregation != AggregationType.COUNT:
+        return None
+    return _WindowGroups(metric.group_by, make_state)
+
+
+def _window_state_factory(metric: Metric) -> Optional[Callable[[], _WindowState]]:
+    """
+    Factory for the incremental state of one (ungrouped) window.
+    
+    Args:
+        metric: Metric definition
+    
+    Returns:
+        Zero-argument state factory, or None if the aggregation has no state
+    """
+    extract = metric.value_extractor
+    if extract is None:
+        return None
+    if metric.aggregation == AggregationType.MIN:
+        return lambda: _WindowExtreme(extract, maximum=False)
+    if metric.aggregation == AggregationType.MAX:
+        return lambda: _WindowExtreme(extract, maximum=True)
+    if metric.aggregation == AggregationType.PERCENTILE:
+        return lambda: _WindowPercentile(extract, metric.percentile)
+    if metric.aggregation == AggregationType.UNIQUE_COUNT:
+        return lambda: _WindowDistinct(extract)
+    if metric.aggregation == AggregationType.SUM:
+        return lambda: _WindowSum(extract, mean=False)
+    if metric.aggregation == AggregationType.AVERAGE:
+        return lambda: _WindowSum(extract, mean=True)
+    return None
+
+
+def _evict_expired(
+    window: Deque[LogEvent],
+    state: Optional[_WindowState],
+    window_start: datetime
+) -> None:
+    """
+    Remove expired events from the start of a window and its state.
+    
+    Events are popped from the front until the oldest one is inside the
+    window, so no timestamp order is assumed: an event is only evicted once
+    every event that arrived before it has been.
+    
+    Args:
+        window: Events in the window, in arrival order
+        state: The metric's incremental state, if it keeps one
+        window_start: Oldest timestamp still inside the window
+    """
+    popleft = window.popleft
+    if state is None:
+        while window and window[0].timestamp < window_start:
+            popleft()
+    else:
+        while window and window[0].timestamp < window_start:
+            state.evict(popleft())
+
+
+def _filter_key(predicate: Callable[[LogEvent], bool]) -> Any:
+    """Sharing key for a filter: predicates by field and value, callables by identity."""
+    return predicate if isinstance(predicate, FieldPredicate) else id(predicate)
+
+
+def _compile_filter(predicate: Callable[[LogEvent], bool]) -> Callable[[LogEvent], bool]:
+    """Per-event form of a metric filter: compiled if declarative, else as given."""
+    if isinstance(predicate, FieldPredicate):
+        return predicate.compile()
+    return predicate
+
+
+def _match_all(event: LogEvent) -> bool:
+    """Filter of the built-in metrics over every event; batches skip calling it."""
+    return True
+
+
+# Returned by MetricProcessor.add_event when no metric matched the event
+_NO_UPDATES: Mapping[str, MetricResult] = MappingProxyType({})
+
+
 class MetricProcessor:
     """
     Processor that computes multiple declarative metrics.
@@ -165,10 +831,35 @@ class MetricProcessor:
             metrics: List of Metric definitions to compute
         """
         self.metrics = metrics
-        self.metric_windows: Dict[str, List[LogEvent]] = defaultdict(list)
+        # Matching events per metric, oldest first; expired events leave from the left
+        self.metric_windows: Dict[str, Deque[LogEvent]] = defaultdict(deque)
         self.metric_results: Dict[str, MetricResult] = {}
+        self._aggregators: Dict[str, Callable[[Sequence[LogEvent]], Any]] = {
+            metric.name: _compile_aggregation(metric) for metric in metrics
+        }
+        # Per-event filters as (metric, compiled filter, slot). Metrics sharing
+        # a filter share a slot in add_event's per-event memo, so the filter
+        # runs once per event; the slot is None for a filter used once.
+        keys = [_filter_key(metric.filter) for metric in metrics]
+        uses = Counter(keys)
+        compiled = {}
+        slots = {}
+        self._filters: List[tuple] = []
+        for metric, key in zip(metrics, keys):
+            if key not in compiled:
+                compiled[key] = _compile_filter(metric.filter)
+                if uses[key] > 1:
+                    slots[key] = len(slots)
+            self._filters.append((metric, compiled[key], slots.get(key)))
+        self._shared_filters = len(slots)
+        # Incremental aggregation state, for metrics that support it
+        self._window_states: Dict[str, _WindowState] = {}
+        for metric in metrics:
+            state = _compile_window_state(metric)
+            if state is not None:
+                self._window_states[metric.name] = state
     
-    def add_event(self, event: LogEvent) -> Dict[str, MetricResult]:
+    def add_event(self, event: LogEvent) -> Mapping[str, MetricResult]:
         """
         Add a new event and update all relevant metrics.
         
@@ -176,36 +867,245 @@ class MetricProcessor:
             event: LogEvent to process
         
         Returns:
-            Dictionary of metric_name -> MetricResult for updated metrics
+            Mapping of metric_name -> MetricResult for updated metrics. When
+            no metric matched the event, a shared read-only empty mapping is
+            returned instead of a new dict.
         """
-        updated_metrics = {}
-        now = event.timestamp
+        updated_metrics = None
+        memo: List[Optional[bool]] = [None] * self._shared_filters
+        
+        for metric, matches, slot in self._filters:
+            # Check if event matches filter, once per shared filter
+            if slot is None:
+                if not matches(event):
+                    continue
+            else:
+                matched = memo[slot]
+                if matched is None:
+                    matched = memo[slot] = matches(event)
+                if not matched:
+                    continue
+            
+            if updated_metrics is None:
+                updated_metrics = {}
+            updated_metrics[metric.name] = self._update_metric(metric, event)
+        
+        return _NO_UPDATES if updated_metrics is None else updated_metrics
+    
+    def add_events(self, events) -> List[MetricResult]:
+        """
+        Add a batch of events and collect every metric update in order.
+        
+        Filters are evaluated once per batch: declarative predicates
+        (FieldEq, FieldIn, FieldGt, FieldGe) run over a column of attribute
+        values shared by all metrics filtering on the same field. Metrics do
+        not share state, so each one then consumes its matching events in a
+        single pass, and the per-metric updates are merged back into event
+        order.
+        
+        Args:
+            events: Iterable of LogEvent objects
         
+        Returns:
+            Flat list of MetricResult updates, in the order they were produced
+        """
+        events = list(events)
+        
+        streams = []
+        for position, (metric, mask) in enumerate(self._filter_masks(events)):
+            indices = list(compress(range(len(events)), mask))
+            results = self._process_metric(metric, [events[i] for i in indices])
+            streams.append(zip(indices, repeat(position), results))
+        
+        # (event index, metric position) is unique, so results are never compared
+        return [result for _, _, result in heapq.merge(*streams)]
+    
+    def add_events_latest(self, events) -> Dict[str, MetricResult]:
+        """
+        Add a batch of events and return only each metric's final result.
+        
+        For callers that only need the metrics as of the end of the batch.
+        Each metric takes in all of its matching events and then expires and
+        aggregates its window once, instead of building a result after every
+        event, which matters most for grouped metrics that aggregate the
+        whole window. Windows end up exactly as after add_events.
+        
+        Args:
+            events: Iterable of LogEvent objects, in arrival order
+        
+        Returns:
+            Dictionary of metric_name -> MetricResult, for metrics that
+            matched at least one event, in the order add_events would first
+            have updated them
+        """
+        events = list(events)
+        
+        updated = []
+        for position, (metric, mask) in enumerate(self._filter_masks(events)):
+            result = self._advance_metric(metric, compress(events, mask))
+            if result is not None:
+                updated.append((mask.index(True), position, result))
+        
+        updated.sort()
+        return {result.metric_name: result for _, _, result in updated}
+    
+    def _filter_masks(self, events: List[LogEvent]) -> List[tuple]:
+        """
+        Evaluate every metric's filter over a batch of events.
+        
+        Each distinct filter is evaluated once per batch: metrics with equal
+        declarative predicates, or sharing the same filter function, reuse
+        one mask.
+        
+        Args:
+            events: Batch of events
+        
+        Returns:
+            List of (metric, mask) pairs in metric order
+        """
+        columns = {}
+        shared_masks = {}
+        masks = []
         for metric in self.metrics:
-            # Check if event matches filter
-            if not metric.filter(event):
-                continue
+            predicate = metric.filter
+            key = _filter_key(predicate)
+            mask = shared_masks.get(key)
+            if mask is None:
+                if predicate is _match_all:
+                    mask = [True] * len(events)
+                elif isinstance(predicate, FieldPredicate):
+                    column = columns.get(predicate.field)
+                    if column is None:
+                        column = columns[predicate.field] = [
+                            getattr(e, predicate.field) for e in events
+                        ]
+                    mask = predicate.mask(column)
+                else:
+                    mask = [predicate(e) for e in events]
+                shared_masks[key] = mask
+            masks.append((metric, mask))
+        
+        return masks
+    
+    def _update_metric(self, metric: Metric, event: LogEvent) -> MetricResult:
+        """
+        Add an event that passed the metric's filter and recompute the metric.
+        
+        Args:
+            metric: Metric definition
+            event: Matching event
+        
+        Returns:
+            Updated MetricResult
+        """
+        return self._process_metric(metric, (event,))[0]
+    
+    def _process_metric(self, metric: Metric, events) -> List[MetricResult]:
+        """
+        Add events that passed the metric's filter, recomputing after each.
+        
+        Metrics share no state, so this is the whole unit of work for one
+        metric in a batch; its window, state and settings are looked up once
+        rather than per event.
+        
+        Args:
+            metric: Metric definition
+            events: Iterable of matching events, in arrival order
+        
+        Returns:
+            One updated MetricResult per event
+        """
+        name = metric.name
+        window = metric.window
+        state = self._window_states.get(name)
+        window_events = self.metric_windows[name]
+        popleft = window_events.popleft
+        metric_results = self.metric_results
+        # Stateless ungrouped metrics (COUNT, RATE, custom) call their aggregator directly
+        aggregate = None
+        if state is None and metric.group_by is None:
+            aggregate = self._aggregators[name]
+        
+        results = []
+        for event in events:
+            now = event.timestamp
             
-            # Add event to metric's window
-            window_events = self.metric_windows[metric.name]
+            # Add event to metric's window (state first, in case extraction fails)
+            if state is not None:
+                state.add(event)
             window_events.append(event)
             
-            # Remove events outside the window
-            window_start = now - metric.window
-            while window_events and window_events[0].timestamp < window_start:
-                window_events.pop(0)
+            # Remove events outside the window; a steady stream expires about
+            # one event per new one, so that case stays inline
+            window_start = now - window
+            if window_events[0].timestamp < window_start:
+                expired = popleft()
+                if state is not None:
+                    state.evict(expired)
+                if window_events and window_events[0].timestamp < window_start:
+                    _evict_expired(window_events, state, window_start)
             
             # Compute metric value
-            result = self._compute_metric(metric, window_events, window_start, now)
-            self.metric_results[metric.name] = result
-            updated_metrics[metric.name] = result
+            if state is not None:
+                result = state.result(name, window_start, now)
+            elif aggregate is not None and window_events:
+                result = MetricResult(
+                    metric_name=name,
+                    value=aggregate(window_events),
+                    window_start=window_start,
+                    window_end=now
+                )
+            else:
+                result = self._compute_metric(metric, window_events, window_start, now)
+            metric_results[name] = result
+            results.append(result)
+        
+        return results
+    
+    def _advance_metric(self, metric: Metric, events) -> Optional[MetricResult]:
+        """
+        Add events that passed the metric's filter and recompute once at the end.
+        
+        Args:
+            metric: Metric definition
+            events: Iterable of matching events, in arrival order
+        
+        Returns:
+            MetricResult as of the last event, or None if there were no events
+        """
+        name = metric.name
+        window = metric.window
+        state = self._window_states.get(name)
+        window_events = self.metric_windows[name]
+        
+        last = None
+        for last in events:
+            # State first, in case extraction fails
+            if state is not None:
+                state.add(last)
+            window_events.append(last)
+            
+            # Expire after every event, as _process_metric does, so events
+            # arriving out of timestamp order leave the same window
+            window_start = last.timestamp - window
+            if window_events[0].timestamp < window_start:
+                _evict_expired(window_events, state, window_start)
+        if last is None:
+            return None
         
-        return updated_metrics
+        now = last.timestamp
+        
+        if state is not None:
+            result = state.result(name, window_start, now)
+        else:
+            result = self._compute_metric(metric, window_events, window_start, now)
+        self.metric_results[name] = result
+        return result
     
     def _compute_metric(
         self,
         metric: Metric,
-        events: List[LogEvent],
+        events: Sequence[LogEvent],
         window_start: datetime,
         window_end: datetime
     ) -> MetricResult:
@@ -214,22 +1114,20 @@ class MetricProcessor:
         
         Args:
             metric: Metric definition
-            events: List of events in the window
+            events: Events in the window, oldest first, all of which already
+                passed the metric's filter
             window_start: Start of time window
             window_end: End of time window
         
         Returns:
             MetricResult
         """
-        # Filter events (should already be filtered, but double-check)
-        filtered_events = [e for e in events if metric.filter(e)]
-        
         # Handle grouping
         if metric.group_by:
+            group_by = metric.group_by
             grouped_events = defaultdict(list)
-            for event in filtered_events:
-                group_key = metric.group_by(event)
-                grouped_events[group_key].append(event)
+            for event in events:
+                grouped_events[group_by(event)].append(event)
             
             # Compute value for each group
             grouped_values = {}
@@ -247,7 +1145,7 @@ class MetricProcessor:
             )
         else:
             # Compute single aggregated value
-            value = self._apply_aggregation(metric, filtered_events)
+            value = self._apply_aggregation(metric, events)
             
             return MetricResult(
                 metric_name=metric.name,
@@ -259,14 +1157,14 @@ class MetricProcessor:
     def _apply_aggregation(
         self,
         metric: Metric,
-        events: List[LogEvent]
+        events: Sequence[LogEvent]
     ) -> Any:
         """
         Apply aggregation function to events.
         
         Args:
             metric: Metric definition
-            events: List of events to aggregate
+            events: Events to aggregate
         
         Returns:
             Aggregated value
@@ -274,65 +1172,7 @@ class MetricProcessor:
         if not events:
             return 0 if metric.aggregation == AggregationType.COUNT else None
         
-        # Custom aggregation function
-        if callable(metric.aggregation):
-            return metric.aggregation(events)
-        
-        # Built-in aggregations
-        agg_type = metric.aggregation
-        
-        if agg_type == AggregationType.COUNT:
-            return len(events)
-        
-        elif agg_type == AggregationType.RATE:
-            # Rate per second
-            if not events:
-                return 0.0
-            time_span = (events[-1].timestamp - events[0].timestamp).total_seconds()
-            if time_span == 0:
-                return float(len(events))
-            return len(events) / time_span if time_span > 0 else 0.0
-        
-        elif agg_type == AggregationType.AVERAGE:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            values = [metric.value_extractor(e) for e in events]
-            return sum(values) / len(values) if values else 0.0
-        
-        elif agg_type == AggregationType.SUM:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            return sum(metric.value_extractor(e) for e in events)
-        
-        elif agg_type == AggregationType.MIN:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            values = [metric.value_extractor(e) for e in events]
-            return min(values) if values else None
-        
-        elif agg_type == AggregationType.MAX:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            values = [metric.value_extractor(e) for e in events]
-            return max(values) if values else None
-        
-        elif agg_type == AggregationType.PERCENTILE:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            values = sorted([metric.value_extractor(e) for e in events])
-            if not values:
-                return None
-            index = int((metric.percentile / 100.0) * (len(values) - 1))
-            return values[index]
-        
-        elif agg_type == AggregationType.UNIQUE_COUNT:
-            if not metric.value_extractor:
-                raise ValueError(f"value_extractor required for {agg_type.value} aggregation")
-            unique_values = set(metric.value_extractor(e) for e in events)
-            return len(unique_values)
-        
-        else:
-            raise ValueError(f"Unsupported aggregation type: {agg_type}")
+        return self._aggregators[metric.name](events)
     
     def get_metric(self, metric_name: str) -> Optional[MetricResult]:
         """
@@ -357,27 +1197,35 @@ class MetricProcessor:
     
     def process_events(self, events) -> Dict[str, List[MetricResult]]:
         """
-        Process a stream of events and collect all metric updates.
+        Process a batch of events and collect all metric updates.
+        
+        Like add_events, filters are evaluated column-wise over the whole
+        batch, and each metric then consumes its matching events in one
+        pass. Updates are grouped by metric, so no merge is needed.
         
         Args:
-            events: Iterator of LogEvent objects
+            events: Iterable of LogEvent objects
         
         Returns:
-            Dictionary of metric_name -> list of MetricResult updates
+            Dictionary of metric_name -> list of MetricResult updates, for
+            metrics that matched at least one event
         """
-        all_updates = defaultdict(list)
+        events = list(events)
         
-        for event in events:
-            updated = self.add_event(event)
-            for metric_name, result in updated.items():
-                all_updates[metric_name].append(result)
+        all_updates = {}
+        for metric, mask in self._filter_masks(events):
+            updates = self._process_metric(metric, compress(events, mask))
+            if updates:
+                all_updates[metric.name] = updates
         
-        return dict(all_updates)
+        return all_updates
     
     def clear(self) -> None:
         """Clear all metrics and reset state."""
         self.metric_windows.clear()
         self.metric_results.clear()
+        for state in self._window_states.values():
+            state.clear()
 
 
 # Convenience functions for common metric definitions
@@ -386,7 +1234,7 @@ def error_rate_metric(window: Union[str, timedelta] = "5m") -> Metric:
     """Create an error rate metric."""
     return Metric(
         name="error_rate",
-        filter=lambda e: e.level in ("ERROR", "CRITICAL", "FATAL"),
+        filter=FieldGe("level_code", LogLevel.ERROR),
         aggregation="count",
         window=window,
         description="Count of error-level events"
@@ -397,7 +1245,7 @@ def warning_rate_metric(window: Union[str, timedelta] = "5m") -> Metric:
     """Create a warning rate metric."""
     return Metric(
         name="warning_rate",
-        filter=lambda e: e.level == "WARNING",
+        filter=FieldEq("level", "WARNING"),
         aggregation="rate",
         window=window,
         description="Rate of warning events per second"
@@ -408,11 +1256,11 @@ def events_by_source_metric(window: Union[str, timedelta] = "5m") -> Metric:
     """Create a metric that groups events by source."""
     return Metric(
         name="events_by_source",
-        filter=lambda e: True,  # All events
+        filter=_match_all,
         aggregation="count",
         window=window,
         description="Event count grouped by source",
-        group_by=lambda e: e.source
+        group_by=operator.attrgetter('source')
     )
 
 
@@ -420,10 +1268,10 @@ def events_by_level_metric(window: Union[str, timedelta] = "5m") -> Metric:
     """Create a metric that groups events by log level."""
     return Metric(
         name="events_by_level",
-        filter=lambda e: True,  # All events
+        filter=_match_all,
         aggregation="count",
         window=window,
         description="Event count grouped by log level",
-        group_by=lambda e: e.level
+        group_by=operator.attrgetter('level')
     )
 
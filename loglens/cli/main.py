@@ -5,11 +5,14 @@ Provides a command-line interface for ingesting logs, querying metrics,
 and detecting anomalies.
 """
 
+import heapq
 import json
+import shlex
 import sys
 from pathlib import Path
 from typing import Optional, List
 from datetime import datetime, timedelta
+from itertools import islice
 
 import typer
 from rich.console import Console
@@ -38,6 +41,47 @@ console = Console()
 # Default database path
 DEFAULT_DB = "loglens.db"
 
+# Rows written per statement when ingesting. Each insert_events call is one
+# statement plus a rollup update and a commit, so larger batches amortize that
+# fixed cost; past a few thousand rows the gain levels off.
+INSERT_BATCH_SIZE = 5000
+
+# Commands that can run inside `loglens shell`, against its open database
+SHELL_COMMANDS = ("metrics", "query", "anomalies", "stats")
+
+# Read-only storage held open by `loglens shell` for the commands it runs
+_shell_storage: Optional[LogStorage] = None
+
+
+def _open_storage(
+    db_path: str,
+    config: Optional[dict] = None,
+    read_only: bool = True
+) -> LogStorage:
+    """
+    Open a database, reusing the connection held by `loglens shell`.
+    
+    Inside the shell the shared connection is always read-only, whatever
+    read_only asks for.
+    
+    Args:
+        db_path: Database file path
+        config: Optional DuckDB settings, used only for a new connection
+        read_only: Open a new connection read-only
+    
+    Returns:
+        LogStorage instance; release it with _close_storage()
+    """
+    if _shell_storage is not None and Path(db_path).resolve() == _shell_storage.db_path.resolve():
+        return _shell_storage
+    return LogStorage(db_path, config=config, read_only=read_only)
+
+
+def _close_storage(storage: LogStorage) -> None:
+    """Close storage from _open_storage(), leaving the shell's connection open."""
+    if storage is not _shell_storage:
+        storage.close()
+
 
 @app.command()
 def ingest(
@@ -81,39 +125,31 @@ def ingest(
     
     try:
         # Create storage
-        storage = LogStorage(db_path)
+        storage = LogStorage(db_path, config=config_obj.storage.settings if config_obj else None)
         
         # Create ingestor
         ingestor = LogIngestor(default_source=default_source)
         
-        # Ingest file
+        # Compute metrics if config provided
+        processor = None
+        if config_obj and config_obj.metrics:
+            processor = MetricProcessor(config_obj.to_metrics())
+        
+        # Ingest file in one pass: each batch of events is stored and fed
+        # to the metric processor, and its metric updates stored in turn
         event_count = 0
+        metric_count = 0
+        events = ingestor.ingest_file(logfile, format=format)
         with console.status("[bold green]Processing logs..."):
-            for event in ingestor.ingest_file(logfile, format=format):
-                storage.insert_event(event)
-                event_count += 1
+            while True:
+                batch = list(islice(events, INSERT_BATCH_SIZE))
+                if not batch:
+                    break
+                event_count += len(storage.insert_events(batch))
+                if processor:
+                    metric_count += len(storage.insert_metrics(processor.add_events(batch)))
         
-        # Process metrics if config provided
-        if config_obj and config_obj.metrics:
-            console.print(f"[bold]Computing metrics...[/bold]")
-            metrics = config_obj.to_metrics()
-            processor = MetricProcessor(metrics)
-            
-            # Process events as they're ingested (already done above)
-            # Re-process the file to compute metrics
-            metric_count = 0
-            for event in ingestor.ingest_file(logfile, format=format):
-                updated = processor.add_event(event)
-                for metric_name, result in updated.items():
-                    storage.insert_metric(
-                        metric_name=result.metric_name,
-                        window_start=result.window_start,
-                        window_end=result.window_end,
-                        value=result.value,
-                        grouped_values=result.grouped_values
-                    )
-                    metric_count += 1
-            
+        if processor:
             console.print(f"[green]✓[/green] Computed {metric_count} metric values")
         
         storage.close()
@@ -148,21 +184,21 @@ def metrics(
         console.print(f"[red]Error:[/red] Database not found: {db}")
         raise typer.Exit(1)
     
-    storage = LogStorage(db)
+    storage = _open_storage(db)
     query = create_query(storage)
     
     try:
         if action == "list":
-            # List all unique metric names
+            # List all unique metric names, with timestamps formatted in SQL
             sql = """
                 SELECT DISTINCT metric_name, COUNT(*) as count,
-                       MIN(window_start) as first_seen,
-                       MAX(window_end) as last_seen
+                       strftime(MIN(window_start), '%Y-%m-%d %H:%M') as first_seen,
+                       strftime(MAX(window_end), '%Y-%m-%d %H:%M') as last_seen
                 FROM metrics
                 GROUP BY metric_name
                 ORDER BY metric_name
             """
-            results = query.execute_sql(sql)
+            results = list(query.iter_rows(sql)[1])
             
             if not results:
                 console.print("[yellow]No metrics found in database[/yellow]")
@@ -174,15 +210,8 @@ def metrics(
             table.add_column("First Seen", style="blue")
             table.add_column("Last Seen", style="blue")
             
-            for row in results:
-                first_seen = datetime.fromisoformat(str(row['first_seen'])).strftime('%Y-%m-%d %H:%M')
-                last_seen = datetime.fromisoformat(str(row['last_seen'])).strftime('%Y-%m-%d %H:%M')
-                table.add_row(
-                    row['metric_name'],
-                    str(row['count']),
-                    first_seen,
-                    last_seen
-                )
+            for name, count, first_seen, last_seen in results:
+                table.add_row(name, str(count), first_seen, last_seen)
             
             console.print(table)
         
@@ -207,9 +236,10 @@ def metrics(
             table.add_column("Value", justify="right", style="green")
             table.add_column("Grouped Values", style="cyan")
             
+            # DuckDB returns TIMESTAMP columns as datetime objects already
             for m in metrics_list:
-                start = datetime.fromisoformat(str(m['window_start'])).strftime('%Y-%m-%d %H:%M:%S')
-                end = datetime.fromisoformat(str(m['window_end'])).strftime('%Y-%m-%d %H:%M:%S')
+                start = m['window_start'].strftime('%Y-%m-%d %H:%M:%S')
+                end = m['window_end'].strftime('%Y-%m-%d %H:%M:%S')
                 value = str(m['value']) if m['value'] is not None else "N/A"
                 grouped = json.dumps(m['grouped_values']) if m['grouped_values'] else "N/A"
                 
@@ -223,7 +253,7 @@ def metrics(
             raise typer.Exit(1)
     
     finally:
-        storage.close()
+        _close_storage(storage)
 
 
 @app.command()
@@ -244,43 +274,57 @@ def query(
         console.print(f"[red]Error:[/red] Database not found: {db}")
         raise typer.Exit(1)
     
-    storage = LogStorage(db)
+    # Read-write, since queries may modify the database (e.g. DELETE)
+    storage = _open_storage(db, read_only=False)
     query_interface = create_query(storage)
     
     try:
-        results = query_interface.execute_sql(sql)
+        # Stream row tuples from the cursor instead of materializing the result
+        columns, rows = query_interface.iter_rows(sql)
+        first = next(rows, None)
         
-        if not results:
+        if first is None:
             console.print("[yellow]No results[/yellow]")
             return
         
         if format == "json":
-            # JSON output
-            console.print(json.dumps(results, indent=2, default=str))
+            # JSON output, one row at a time; each row is held back until the
+            # next arrives so the last one is printed without a trailing comma
+            console.print("[")
+            previous = first
+            for row in rows:
+                console.print(_indent_json(dict(zip(columns, previous))) + ",")
+                previous = row
+            console.print(_indent_json(dict(zip(columns, previous))))
+            console.print("]")
         else:
             # Table output
-            if not results:
-                console.print("[yellow]No results[/yellow]")
-                return
-            
             table = Table()
             # Add columns
-            for key in results[0].keys():
+            for key in columns:
                 table.add_column(key, style="cyan")
             
             # Add rows
-            for row in results:
-                table.add_row(*[str(v) for v in row.values()])
+            table.add_row(*map(str, first))
+            count = 1
+            for row in rows:
+                table.add_row(*map(str, row))
+                count += 1
             
             console.print(table)
-            console.print(f"\n[dim]{len(results)} row(s)[/dim]")
+            console.print(f"\n[dim]{count} row(s)[/dim]")
     
     except Exception as e:
         console.print(f"[red]Error executing query:[/red] {e}")
         raise typer.Exit(1)
     
     finally:
-        storage.close()
+        _close_storage(storage)
+
+
+def _indent_json(row: dict) -> str:
+    """Format one result row as an element of an indented JSON array."""
+    return "\n".join("  " + line for line in json.dumps(row, indent=2, default=str).splitlines())
 
 
 @app.command()
@@ -321,7 +365,7 @@ def anomalies(
         console.print(f"[red]Error:[/red] Database not found: {db_path}")
         raise typer.Exit(1)
     
-    storage = LogStorage(db_path)
+    storage = _open_storage(db_path, config=config_obj.storage.settings if config_obj else None)
     query_interface = create_query(storage)
     
     try:
@@ -346,13 +390,13 @@ def anomalies(
             anomaly_configs = {a.metric_name: a for a in config_obj.anomalies if a.enabled}
         
         for mname in metric_names:
-            # Get recent metric values
-            metrics_list = storage.query_metrics(
-                metric_name=mname,
+            # Get recent metric values, oldest first
+            timestamps, values = storage.query_metric_values(
+                mname,
                 limit=limit * 2  # Get more to build baseline
             )
             
-            if len(metrics_list) < 5:
+            if len(values) < 5:
                 continue  # Need at least 5 samples
             
             # Get detector config from config file or use defaults
@@ -371,17 +415,8 @@ def anomalies(
                 threshold=detector_threshold
             )
             
-            # Build baseline and detect anomalies
-            for m in reversed(metrics_list):  # Process chronologically
-                value = m['value']
-                if value is None:
-                    continue
-                
-                window_start = datetime.fromisoformat(str(m['window_start']))
-                anomaly = detector.add_value(value, window_start)
-                
-                if anomaly:
-                    all_anomalies.append(anomaly)
+            # Build baseline and detect anomalies in one pass over the series
+            all_anomalies.extend(detector.add_values(values, timestamps))
         
         if not all_anomalies:
             console.print("[green]✓[/green] No anomalies detected")
@@ -396,11 +431,15 @@ def anomalies(
         table.add_column("Explanation", style="yellow")
         table.add_column("Severity", justify="center")
         
-        # Sort by severity and timestamp
+        # Most severe first, then oldest; only the shown rows need ordering
         severity_order = {"critical": 0, "high": 1, "medium": 2, "low": 3}
-        all_anomalies.sort(key=lambda a: (severity_order.get(a.severity, 99), a.timestamp))
+        top_anomalies = heapq.nsmallest(
+            limit,
+            all_anomalies,
+            key=lambda a: (severity_order.get(a.severity, 99), a.timestamp)
+        )
         
-        for anomaly in all_anomalies[:limit]:
+        for anomaly in top_anomalies:
             severity_color = {
                 "critical": "bold red",
                 "high": "red",
@@ -422,7 +461,7 @@ def anomalies(
         raise typer.Exit(1)
     
     finally:
-        storage.close()
+        _close_storage(storage)
 
 
 @app.command()
@@ -441,7 +480,7 @@ def stats(
         console.print(f"[red]Error:[/red] Database not found: {db}")
         raise typer.Exit(1)
     
-    storage = LogStorage(db)
+    storage = _open_storage(db)
     
     try:
         end_time = datetime.now()
@@ -480,7 +519,7 @@ def stats(
         ))
     
     finally:
-        storage.close()
+        _close_storage(storage)
 
 
 @app.command()
@@ -511,6 +550,82 @@ def config(
         raise typer.Exit(1)
 
 
+@app.command()
+def shell(
+    db: str = typer.Option(DEFAULT_DB, "--db", "-d", help="Database file path"),
+):
+    """
+    Run commands interactively against one open database.
+    
+    The database is opened once, read-only, and reused by every metrics,
+    query, anomalies and stats command typed at the prompt, so repeated
+    queries skip connecting and start with DuckDB's caches warm.
+    Type 'exit' or press Ctrl-D to leave.
+    
+    Examples:
+        loglens shell --db logs.db
+        loglens> metrics list
+        loglens> query "SELECT level, COUNT(*) FROM events GROUP BY level"
+    """
+    global _shell_storage
+    
+    if not Path(db).exists():
+        console.print(f"[red]Error:[/red] Database not found: {db}")
+        raise typer.Exit(1)
+    
+    try:
+        import readline  # noqa: F401 - line editing and history for input()
+    except ImportError:
+        pass
+    
+    _shell_storage = LogStorage(db, read_only=True)
+    console.print(f"[bold]LogLens++ shell[/bold] on {db} "
+                  f"[dim](commands: {', '.join(SHELL_COMMANDS)}; 'exit' to quit)[/dim]")
+    
+    try:
+        while True:
+            try:
+                line = console.input("[bold cyan]loglens>[/bold cyan] ")
+            except (EOFError, KeyboardInterrupt):
+                console.print()
+                break
+            
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                console.print(f"[red]Error:[/red] {e}")
+                continue
+            
+            if not args:
+                continue
+            if args[0] in ("exit", "quit"):
+                break
+            if args[0] not in SHELL_COMMANDS:
+                console.print(f"[red]Error:[/red] Unknown shell command: {args[0]}")
+                console.print(f"Available commands: {', '.join(SHELL_COMMANDS)}, exit")
+                continue
+            
+            # Run against the shell's database unless another one is named
+            if not any(arg in ("--db", "-d") or arg.startswith("--db=") for arg in args):
+                args += ["--db", db]
+            
+            try:
+                app(args=args, prog_name="loglens", standalone_mode=False)
+            except KeyboardInterrupt:
+                console.print()
+            except Exception as e:
+                # Usage errors know how to report themselves
+                show = getattr(e, "show", None)
+                if show is not None:
+                    show()
+                else:
+                    console.print(f"[red]Error:[/red] {e}")
+    
+    finally:
+        _shell_storage.close()
+        _shell_storage = None
+
+
 def main():
     """Main entry point for CLI."""
     app()
@@ -8,11 +8,21 @@ supporting both JSON and plain text formats.
 import json
 import re
 from datetime import datetime
-from typing import Iterator, TextIO, Optional, Dict, Any
+from typing import Any, BinaryIO, Dict, Iterator, Optional, TextIO, Union
 from pathlib import Path
 
 from loglens.models import LogEvent
 
+# orjson is an optional, much faster parser; it raises a json.JSONDecodeError
+# subclass, so error handling is the same with either
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Top-level JSON fields mapped onto LogEvent attributes; any others go to metadata
+_KNOWN_JSON_FIELDS = frozenset({'timestamp', 'level', 'source', 'message', 'metadata'})
+
 
 class LogIngestor:
     """
@@ -82,6 +92,13 @@ class LogIngestor:
         if format is None:
             format = self._detect_format(file_path)
         
+        # JSON lines are handed to the parser as raw bytes, which decodes
+        # UTF-8 itself, so the file is not decoded line by line first
+        if format == "json":
+            with open(file_path, 'rb') as f:
+                yield from self._ingest_json(f)
+            return
+        
         with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
             yield from self.ingest_stream(f, format)
     
@@ -113,10 +130,13 @@ class LogIngestor:
         else:
             raise ValueError(f"Unsupported format: {format}. Use 'json' or 'text'")
     
-    def _ingest_json(self, stream: TextIO) -> Iterator[LogEvent]:
+    def _ingest_json(self, stream: Union[TextIO, BinaryIO]) -> Iterator[LogEvent]:
         """
         Ingest JSON format logs.
         
+        Lines may be str or bytes. Bytes that are not valid UTF-8 are decoded
+        with replacement characters, as text-mode files are.
+        
         Each line should be a JSON object with fields:
         - timestamp (ISO format string or datetime)
         - level (optional, defaults to default_level)
@@ -133,7 +153,14 @@ class LogIngestor:
                 continue
             
             try:
-                data = json.loads(line)
+                try:
+                    data = _json_loads(line)
+                except ValueError:
+                    # Invalid UTF-8 fails as a decode error (orjson) or a
+                    # UnicodeDecodeError (json); retry with replacement
+                    if not isinstance(line, bytes):
+                        raise
+                    data = _json_loads(line.decode('utf-8', errors='replace'))
                 
                 # Extract fields
                 timestamp = self._parse_timestamp(data.get('timestamp'))
@@ -143,9 +170,8 @@ class LogIngestor:
                 metadata = data.get('metadata', {})
                 
                 # Add any additional fields to metadata
-                known_fields = {'timestamp', 'level', 'source', 'message', 'metadata'}
                 for key, value in data.items():
-                    if key not in known_fields:
+                    if key not in _KNOWN_JSON_FIELDS:
                         metadata[key] = value
                 
                 event = LogEvent(
@@ -507,7 +533,7 @@ class LogIngestor:
         json_count = 0
         for line in lines:
             try:
-                json.loads(line)
+                _json_loads(line)
                 json_count += 1
             except json.JSONDecodeError:
                 pass
@@ -4,22 +4,83 @@ Data models for LogLens++.
 This module defines the core data structures used throughout the system.
 """
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from enum import IntEnum
+from typing import Optional, Dict, Any, Union
 
 
-@dataclass
+# Slotted dataclasses need Python 3.10+; fall back to a regular __dict__ before that
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+class LogLevel(IntEnum):
+    """
+    Log levels ordered by severity.
+    
+    Members can be passed anywhere a level string is accepted; events
+    always store the (interned) level name.
+    """
+    TRACE = -2
+    DEBUG = -1
+    INFO = 0
+    WARNING = 1
+    ERROR = 2
+    CRITICAL = 3
+    FATAL = 4
+
+
+# Canonical level names keyed by themselves, so lookups return one shared string object
+_LEVEL_NAMES = {sys.intern(level.name): sys.intern(level.name) for level in LogLevel}
+
+# LogLevel members keyed by canonical name
+_LEVELS_BY_NAME = {level.name: level for level in LogLevel}
+
+
+def normalize_level(level: Union[str, LogLevel]) -> str:
+    """
+    Normalize a log level to its canonical uppercase name.
+    
+    Args:
+        level: Level name (case-insensitive) or LogLevel member
+    
+    Returns:
+        Interned uppercase level name (e.g. 'ERROR')
+    
+    Raises:
+        ValueError: If the level is not a string/LogLevel or is unknown
+    """
+    if isinstance(level, LogLevel):
+        return level.name
+    if not isinstance(level, str):
+        raise ValueError(f"level must be a string, got {type(level)}")
+    
+    name = _LEVEL_NAMES.get(level)
+    if name is None:
+        name = _LEVEL_NAMES.get(level.upper())
+        if name is None:
+            raise ValueError(
+                f"level must be one of {set(_LEVEL_NAMES)}, got '{level}'"
+            )
+    return name
+
+
+@dataclass(**_SLOTS)
 class LogEvent:
     """
     Represents a single parsed log entry.
     
     Attributes:
         timestamp: The timestamp when the log event occurred
-        level: The log level (e.g., 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+        level: The log level (e.g., 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL');
+            a LogLevel member is also accepted
         source: The source of the log (e.g., service name, application name)
         message: The log message content
         metadata: Optional dictionary containing additional structured data
+        level_code: The level as a LogLevel member, derived from ``level``.
+            Integer compares such as ``e.level_code >= LogLevel.ERROR``
+            replace string matching on hot filter paths.
     
     Raises:
         ValueError: If required fields are invalid or missing
@@ -30,9 +91,10 @@ class LogEvent:
     source: str
     message: str
     metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
+    level_code: LogLevel = field(init=False, repr=False, compare=False)
     
     # Valid log levels
-    VALID_LEVELS = {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL', 'TRACE', 'FATAL'}
+    VALID_LEVELS = {level.name for level in LogLevel}
     
     def __post_init__(self):
         """
@@ -45,23 +107,17 @@ class LogEvent:
         if not isinstance(self.timestamp, datetime):
             raise ValueError(f"timestamp must be a datetime object, got {type(self.timestamp)}")
         
-        # Validate level
-        if not isinstance(self.level, str):
-            raise ValueError(f"level must be a string, got {type(self.level)}")
-        
-        level_upper = self.level.upper()
-        if level_upper not in self.VALID_LEVELS:
-            raise ValueError(
-                f"level must be one of {self.VALID_LEVELS}, got '{self.level}'"
-            )
-        # Normalize level to uppercase
-        self.level = level_upper
+        # Validate level and normalize it to its canonical uppercase name
+        self.level = normalize_level(self.level)
+        self.level_code = _LEVELS_BY_NAME[self.level]
         
         # Validate source
         if not isinstance(self.source, str):
             raise ValueError(f"source must be a string, got {type(self.source)}")
         if not self.source.strip():
             raise ValueError("source cannot be empty")
+        # Sources repeat across events; share one string object per distinct value
+        self.source = sys.intern(str(self.source))
         
         # Validate message
         if not isinstance(self.message, str):
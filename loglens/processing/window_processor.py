@@ -191,10 +191,11 @@ class RollingWindowProcessor:
                 completed_window = self.current_metrics
                 self.completed_windows.append(completed_window)
             
-            # Start new window(s) until we catch up
-            while event_time >= self.current_window_end:
-                self.current_window_start = self.current_window_end
-                self.current_window_end = self.current_window_start + self.window_size
+            # Skip ahead to the window containing the event in one step; after a
+            # long gap, stepping one window at a time would loop once per window
+            skipped = (event_time - self.current_window_end) // self.window_size
+            self.current_window_start = self.current_window_end + skipped * self.window_size
+            self.current_window_end = self.current_window_start + self.window_size
             
             # Initialize new window
             self.current_metrics = WindowMetrics(
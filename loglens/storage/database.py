@@ -8,11 +8,26 @@ and aggregated metrics using DuckDB, optimized for analytics workloads.
 import json
 import sqlite3
 from contextlib import contextmanager
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Iterator, Union
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Any, Iterator, Sequence, Tuple, Union
 import duckdb
 
+from loglens.models import normalize_level
+
+
+def _to_naive_utc(timestamp: datetime) -> datetime:
+    """Convert timezone-aware timestamps to naive UTC (naive values pass through)."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def _format_timestamp(timestamp: datetime) -> str:
+    """Format a timestamp for the JSON batch payload (aware values become naive UTC)."""
+    return _to_naive_utc(timestamp).isoformat()
+
 
 class LogStorage:
     """
@@ -22,16 +37,29 @@ class LogStorage:
     for time-series analytics workloads.
     """
     
-    def __init__(self, db_path: Union[str, Path] = "loglens.db"):
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "loglens.db",
+        config: Optional[Dict[str, Any]] = None,
+        read_only: bool = False
+    ):
         """
         Initialize the storage layer.
         
         Args:
             db_path: Path to the DuckDB database file
+            config: Optional DuckDB settings applied when the connection is
+                opened, e.g. ``{'threads': 4, 'memory_limit': '2GB'}``
+            read_only: Open an existing database for queries only. DuckDB lets
+                any number of processes hold a database read-only at once,
+                while a read-write connection locks the file for its process.
+                The schema is not created or migrated in this mode.
         """
         self.db_path = Path(db_path)
-        self.conn = duckdb.connect(str(self.db_path))
-        self._initialize_schema()
+        self.read_only = read_only
+        self.conn = duckdb.connect(str(self.db_path), read_only=read_only, config=config or {})
+        if not read_only:
+            self._initialize_schema()
     
     def _initialize_schema(self) -> None:
         """Initialize database schemas for events and metrics."""
@@ -44,9 +72,12 @@ class LogStorage:
                 source VARCHAR NOT NULL,
                 message TEXT NOT NULL,
                 metadata JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hour_of_day TINYINT,
+                day DATE
             )
         """)
+        self._ensure_event_bucket_columns()
         
         # Create index on timestamp for efficient time-range queries
         self.conn.execute("""
@@ -95,6 +126,98 @@ class LogStorage:
             CREATE INDEX IF NOT EXISTS idx_metrics_name_window 
             ON metrics(metric_name, window_start, window_end)
         """)
+        
+        self._ensure_id_sequence('events_id_seq', 'events')
+        self._ensure_id_sequence('metrics_id_seq', 'metrics')
+        
+        self._ensure_events_hourly()
+    
+    def _ensure_id_sequence(self, sequence: str, table: str) -> None:
+        """
+        Create the ID sequence for a table, continuing after its current IDs.
+        
+        Inserts draw IDs with nextval() instead of scanning MAX(id) on every
+        call. Databases created before the sequences existed start them just
+        past their highest stored ID.
+        """
+        exists = self.conn.execute(
+            "SELECT COUNT(*) FROM duckdb_sequences() WHERE sequence_name = ?",
+            (sequence,)
+        ).fetchone()[0]
+        if exists:
+            return
+        
+        start = self.conn.execute(
+            f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}"
+        ).fetchone()[0]
+        self.conn.execute(f"CREATE SEQUENCE {sequence} START WITH {int(start)}")
+    
+    def _ensure_events_hourly(self) -> None:
+        """
+        Create the hourly event rollup, backfilling it on older databases.
+        
+        events_hourly holds one row per (hour, source, level) with the number
+        of events in it. Inserts keep it current incrementally, so breakdowns
+        by source and level over whole hours read a handful of rows per hour
+        instead of scanning the events table.
+        """
+        exists = self.conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'events_hourly'"
+        ).fetchone()[0]
+        if exists:
+            return
+        
+        self.conn.execute("""
+            CREATE TABLE events_hourly (
+                hour TIMESTAMP NOT NULL,
+                source VARCHAR NOT NULL,
+                level VARCHAR NOT NULL,
+                event_count BIGINT NOT NULL,
+                PRIMARY KEY (hour, source, level)
+            )
+        """)
+        self._rollup_events("TRUE")
+    
+    def _rollup_events(self, condition: str, params: Sequence[Any] = ()) -> None:
+        """
+        Add the events matching a condition to the hourly rollup.
+        
+        Args:
+            condition: SQL predicate over the events table
+            params: Parameters for the predicate
+        """
+        self.conn.execute(f"""
+            INSERT INTO events_hourly (hour, source, level, event_count)
+            SELECT DATE_TRUNC('hour', timestamp), source, level, COUNT(*)
+            FROM events
+            WHERE {condition}
+            GROUP BY ALL
+            ON CONFLICT (hour, source, level)
+            DO UPDATE SET event_count = event_count + EXCLUDED.event_count
+        """, params)
+    
+    def _ensure_event_bucket_columns(self) -> None:
+        """
+        Add and backfill the precomputed time-bucket columns on older databases.
+        
+        hour_of_day and day are filled at insert time so BI queries can group
+        on them directly instead of decomposing every timestamp at query time.
+        """
+        columns = {
+            row[1] for row in self.conn.execute("PRAGMA table_info('events')").fetchall()
+        }
+        if {'hour_of_day', 'day'} <= columns:
+            return
+        
+        if 'hour_of_day' not in columns:
+            self.conn.execute("ALTER TABLE events ADD COLUMN hour_of_day TINYINT")
+        if 'day' not in columns:
+            self.conn.execute("ALTER TABLE events ADD COLUMN day DATE")
+        self.conn.execute("""
+            UPDATE events
+            SET hour_of_day = EXTRACT(HOUR FROM timestamp),
+                day = CAST(timestamp AS DATE)
+        """)
     
     def insert_event(self, event) -> int:
         """
@@ -108,46 +231,143 @@ class LogStorage:
         """
         metadata_json = json.dumps(event.metadata) if event.metadata else None
         
-        # DuckDB uses different syntax - need to handle auto-increment
-        # First, get the next ID
-        next_id_result = self.conn.execute("""
-            SELECT COALESCE(MAX(id), 0) + 1 FROM events
-        """).fetchone()
-        next_id = next_id_result[0] if next_id_result else 1
+        timestamp = _to_naive_utc(event.timestamp)
+        self.conn.begin()
+        try:
+            event_id = self.conn.execute("""
+                INSERT INTO events (id, timestamp, level, source, message, metadata,
+                                    hour_of_day, day)
+                VALUES (nextval('events_id_seq'), ?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            """, (
+                timestamp,
+                event.level,
+                event.source,
+                event.message,
+                metadata_json,
+                timestamp.hour,
+                timestamp.date()
+            )).fetchone()[0]
+            self._rollup_events("id = ?", (event_id,))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        return event_id
+    
+    def insert_events(self, events: Iterable, batch_size: int = 10000) -> List[int]:
+        """
+        Insert multiple log events in batches.
         
-        # Insert with explicit ID
-        self.conn.execute("""
-            INSERT INTO events (id, timestamp, level, source, message, metadata)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            next_id,
-            event.timestamp,
-            event.level,
-            event.source,
-            event.message,
-            metadata_json
-        ))
+        Any iterable is accepted, including generators: events are consumed
+        and written batch_size at a time, so the full input never has to be
+        held in memory. Each batch is a single statement.
         
-        return next_id
+        Args:
+            events: Iterable of LogEvent objects
+            batch_size: Maximum number of events written per statement
+        
+        Returns:
+            List of inserted event IDs
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        ids = []
+        iterator = iter(events)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            
+            ids.extend(self.insert_event_columns(
+                timestamps=[event.timestamp for event in batch],
+                levels=[event.level for event in batch],
+                sources=[event.source for event in batch],
+                messages=[event.message for event in batch],
+                metadata=[event.metadata for event in batch]
+            ))
+        
+        return ids
     
-    def insert_events(self, events: List) -> List[int]:
+    def insert_event_columns(
+        self,
+        timestamps: Sequence[datetime],
+        levels: Sequence[str],
+        sources: Sequence[str],
+        messages: Sequence[str],
+        metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[int]:
         """
-        Insert multiple log events in a batch.
+        Insert events given as parallel columns, without building LogEvent objects.
+        
+        The columns are shipped to DuckDB as a single JSON document and
+        unpacked server-side, so the cost per row is a few list appends
+        rather than a bound statement per event.
         
         Args:
-            events: List of LogEvent objects
+            timestamps: Event timestamps (timezone-aware values are stored as UTC)
+            levels: Log levels (case-insensitive names or LogLevel members)
+            sources: Event sources
+            messages: Event messages
+            metadata: Optional metadata dictionaries (or None) per event
         
         Returns:
             List of inserted event IDs
+        
+        Raises:
+            ValueError: If the columns differ in length or a level is invalid
         """
-        if not events:
+        count = len(timestamps)
+        columns = [levels, sources, messages] + ([metadata] if metadata is not None else [])
+        if any(len(column) != count for column in columns):
+            raise ValueError("All event columns must have the same length")
+        if count == 0:
             return []
         
-        # For DuckDB, we'll insert one by one to get IDs
-        # Alternatively, we can use a single transaction
-        ids = []
-        for event in events:
-            ids.append(self.insert_event(event))
+        levels = [normalize_level(level) for level in levels]
+        
+        payload = json.dumps({
+            'timestamp': [_format_timestamp(ts) for ts in timestamps],
+            'level': levels,
+            'source': list(sources),
+            'message': list(messages),
+            'metadata': [m or None for m in metadata] if metadata is not None else [None] * count
+        })
+        
+        self.conn.begin()
+        try:
+            rows = self.conn.execute("""
+                INSERT INTO events (id, timestamp, level, source, message, metadata,
+                                    hour_of_day, day)
+                SELECT nextval('events_id_seq'), ts, level, source, message, metadata,
+                       EXTRACT(HOUR FROM ts), CAST(ts AS DATE)
+                FROM (
+                    SELECT
+                        UNNEST(batch.timestamp) AS ts,
+                        UNNEST(batch.level) AS level,
+                        UNNEST(batch.source) AS source,
+                        UNNEST(batch.message) AS message,
+                        UNNEST(batch.metadata) AS metadata
+                    FROM (
+                        SELECT from_json(?, '{
+                            "timestamp": ["TIMESTAMP"],
+                            "level": ["VARCHAR"],
+                            "source": ["VARCHAR"],
+                            "message": ["VARCHAR"],
+                            "metadata": ["JSON"]
+                        }') AS batch
+                    )
+                )
+                RETURNING id
+            """, (payload,)).fetchall()
+            ids = [row[0] for row in rows]
+            self._rollup_events("id BETWEEN ? AND ?", (min(ids), max(ids)))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
         
         return ids
     
@@ -172,28 +392,81 @@ class LogStorage:
         grouped_json = json.dumps(grouped_values) if grouped_values else None
         metadata_json = json.dumps(metadata) if metadata else None
         
-        # Get next ID for metrics
-        next_id_result = self.conn.execute("""
-            SELECT COALESCE(MAX(id), 0) + 1 FROM metrics
-        """).fetchone()
-        next_id = next_id_result[0] if next_id_result else 1
-        
-        # Insert with explicit ID
-        self.conn.execute("""
+        return self.conn.execute("""
             INSERT INTO metrics (id, metric_name, window_start, window_end, 
                                 value, grouped_values, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            VALUES (nextval('metrics_id_seq'), ?, ?, ?, ?, ?, ?)
+            RETURNING id
         """, (
-            next_id,
             metric_name,
             window_start,
             window_end,
             value,
             grouped_json,
             metadata_json
-        ))
+        )).fetchone()[0]
+    
+    def insert_metrics(self, results) -> List[int]:
+        """
+        Insert multiple metric results with a single statement.
         
-        return next_id
+        Like insert_event_columns, the batch is shipped as one JSON document
+        and unpacked server-side instead of binding a statement per result.
+        
+        Args:
+            results: Iterable of MetricResult objects (anything with
+                metric_name, window_start, window_end, value,
+                grouped_values and metadata attributes)
+        
+        Returns:
+            List of inserted metric IDs
+        """
+        columns = {
+            'metric_name': [],
+            'window_start': [],
+            'window_end': [],
+            'value': [],
+            'grouped_values': [],
+            'metadata': []
+        }
+        for result in results:
+            columns['metric_name'].append(result.metric_name)
+            columns['window_start'].append(_format_timestamp(result.window_start))
+            columns['window_end'].append(_format_timestamp(result.window_end))
+            columns['value'].append(None if result.value is None else float(result.value))
+            columns['grouped_values'].append(result.grouped_values or None)
+            columns['metadata'].append(result.metadata or None)
+        if not columns['metric_name']:
+            return []
+        
+        rows = self.conn.execute("""
+            INSERT INTO metrics (id, metric_name, window_start, window_end,
+                                value, grouped_values, metadata)
+            SELECT nextval('metrics_id_seq'), metric_name, window_start, window_end,
+                   value, grouped_values, metadata
+            FROM (
+                SELECT
+                    UNNEST(batch.metric_name) AS metric_name,
+                    UNNEST(batch.window_start) AS window_start,
+                    UNNEST(batch.window_end) AS window_end,
+                    UNNEST(batch.value) AS value,
+                    UNNEST(batch.grouped_values) AS grouped_values,
+                    UNNEST(batch.metadata) AS metadata
+                FROM (
+                    SELECT from_json(?, '{
+                        "metric_name": ["VARCHAR"],
+                        "window_start": ["TIMESTAMP"],
+                        "window_end": ["TIMESTAMP"],
+                        "value": ["DOUBLE"],
+                        "grouped_values": ["JSON"],
+                        "metadata": ["JSON"]
+                    }') AS batch
+                )
+            )
+            RETURNING id
+        """, (json.dumps(columns),)).fetchall()
+        
+        return [row[0] for row in rows]
     
     def query_events(
         self,
@@ -248,20 +521,20 @@ class LogStorage:
         
         results = self.conn.execute(query, params).fetchall()
         
-        events = []
-        for row in results:
-            event = {
-                'id': row[0],
-                'timestamp': row[1],
-                'level': row[2],
-                'source': row[3],
-                'message': row[4],
-                'metadata': json.loads(row[5]) if row[5] else {},
-                'created_at': row[6]
+        # Unpack each row tuple positionally rather than indexing it field by field
+        loads = json.loads
+        return [
+            {
+                'id': event_id,
+                'timestamp': timestamp,
+                'level': level,
+                'source': source,
+                'message': message,
+                'metadata': loads(metadata) if metadata else {},
+                'created_at': created_at
             }
-            events.append(event)
-        
-        return events
+            for event_id, timestamp, level, source, message, metadata, created_at in results
+        ]
     
     def query_metrics(
         self,
@@ -327,6 +600,61 @@ class LogStorage:
         
         return metrics
     
+    def query_metric_values(
+        self,
+        metric_name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[datetime], List[float]]:
+        """
+        Get one metric's series for replay, oldest window first.
+        
+        Only the window_start and value columns are read, so no JSON columns
+        are decoded. Windows without a scalar value are skipped.
+        
+        Args:
+            metric_name: Name of the metric
+            start_time: Start of time range (inclusive)
+            end_time: End of time range (inclusive)
+            limit: Keep only the most recent windows
+        
+        Returns:
+            Tuple of (window start timestamps, values), oldest first
+        """
+        conditions = ["metric_name = ?", "value IS NOT NULL"]
+        params = [metric_name]
+        
+        if start_time:
+            conditions.append("window_start >= ?")
+            params.append(start_time)
+        
+        if end_time:
+            conditions.append("window_end <= ?")
+            params.append(end_time)
+        
+        where_clause = "WHERE " + " AND ".join(conditions)
+        limit_clause = f"LIMIT {limit}" if limit else ""
+        
+        query = f"""
+            SELECT window_start, value
+            FROM (
+                SELECT window_start, value
+                FROM metrics
+                {where_clause}
+                ORDER BY window_start DESC
+                {limit_clause}
+            )
+            ORDER BY window_start
+        """
+        
+        rows = self.conn.execute(query, params).fetchall()
+        if not rows:
+            return [], []
+        
+        timestamps, values = zip(*rows)
+        return list(timestamps), list(values)
+    
     def get_metric_summary(
         self,
         metric_name: str,
@@ -409,29 +737,25 @@ class LogStorage:
         
         where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
         
-        # Total count
-        count_query = f"SELECT COUNT(*) FROM events {where_clause}"
-        total_count = self.conn.execute(count_query, params).fetchone()[0]
-        
-        # Count by level
-        level_query = f"""
-            SELECT level, COUNT(*) as count
-            FROM events
-            {where_clause}
-            GROUP BY level
-            ORDER BY count DESC
-        """
-        level_counts = dict(self.conn.execute(level_query, params).fetchall())
-        
-        # Count by source
-        source_query = f"""
-            SELECT source, COUNT(*) as count
+        # Total, per-level and per-source counts in a single scan
+        stats_query = f"""
+            SELECT level, source, GROUPING(level, source) AS grouping_id,
+                   COUNT(*) AS count
             FROM events
             {where_clause}
-            GROUP BY source
+            GROUP BY GROUPING SETS ((level), (source), ())
             ORDER BY count DESC
         """
-        source_counts = dict(self.conn.execute(source_query, params).fetchall())
+        total_count = 0
+        level_counts = {}
+        source_counts = {}
+        for level, source, grouping_id, count in self.conn.execute(stats_query, params).fetchall():
+            if grouping_id == 0b01:
+                level_counts[level] = count
+            elif grouping_id == 0b10:
+                source_counts[source] = count
+            else:
+                total_count = count
         
         return {
             'total_events': total_count,
@@ -455,10 +779,25 @@ class LogStorage:
         """, (before_date,)).fetchone()
         count = count_result[0] if count_result else 0
         
-        # Delete
-        self.conn.execute("""
-            DELETE FROM events WHERE timestamp < ?
-        """, (before_date,))
+        # Delete, then recount the hour the cutoff falls in; earlier hours
+        # drop out of the rollup entirely
+        cutoff_hour = _to_naive_utc(before_date).replace(minute=0, second=0, microsecond=0)
+        self.conn.begin()
+        try:
+            self.conn.execute("""
+                DELETE FROM events WHERE timestamp < ?
+            """, (before_date,))
+            self.conn.execute("""
+                DELETE FROM events_hourly WHERE hour <= ?
+            """, (cutoff_hour,))
+            self._rollup_events(
+                "timestamp >= ? AND timestamp < ?",
+                (cutoff_hour, cutoff_hour + timedelta(hours=1))
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
         
         return count
     
@@ -503,15 +842,21 @@ class LogStorage:
 
 
 # Convenience function for quick access
-def create_storage(db_path: Union[str, Path] = "loglens.db") -> LogStorage:
+def create_storage(
+    db_path: Union[str, Path] = "loglens.db",
+    config: Optional[Dict[str, Any]] = None,
+    read_only: bool = False
+) -> LogStorage:
     """
     Create a new LogStorage instance.
     
     Args:
         db_path: Path to the database file
+        config: Optional DuckDB settings (see LogStorage)
+        read_only: Open an existing database for queries only (see LogStorage)
     
     Returns:
         LogStorage instance
     """
-    return LogStorage(db_path)
+    return LogStorage(db_path, config, read_only)
 
@@ -5,7 +5,7 @@ This module provides convenience functions for common storage patterns,
 such as automatically storing metrics as they are computed.
 """
 
-from typing import List, Optional
+from typing import List, Mapping, Optional
 from datetime import datetime
 
 from loglens.storage.database import LogStorage
@@ -39,7 +39,7 @@ class PersistentMetricProcessor:
         self.processor = MetricProcessor(metrics)
         self.auto_store = auto_store
     
-    def add_event(self, event: LogEvent) -> dict:
+    def add_event(self, event: LogEvent) -> Mapping[str, MetricResult]:
         """
         Add event and optionally store to database.
         
@@ -47,7 +47,9 @@ class PersistentMetricProcessor:
             event: LogEvent to process
         
         Returns:
-            Dictionary of updated metrics
+            Mapping of metric_name -> MetricResult for updated metrics, as
+            returned by MetricProcessor.add_event (a shared read-only empty
+            mapping when no metric matched the event)
         """
         # Store event
         self.storage.insert_event(event)
@@ -75,21 +77,12 @@ class PersistentMetricProcessor:
         # Store events
         self.storage.insert_events(events)
         
-        # Process metrics
-        all_updated = {}
-        for event in events:
-            updated = self.processor.add_event(event)
-            for metric_name, result in updated.items():
-                if metric_name not in all_updated:
-                    all_updated[metric_name] = result
-                else:
-                    # Update with latest result
-                    all_updated[metric_name] = result
+        # Process metrics as one batch, computing only the latest result per metric
+        all_updated = self.processor.add_events_latest(events)
         
         # Auto-store metrics if enabled
         if self.auto_store:
-            for metric_name, result in all_updated.items():
-                self._store_metric(result)
+            self.storage.insert_metrics(all_updated.values())
         
         return all_updated
     
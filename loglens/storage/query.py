@@ -6,10 +6,15 @@ analysts to write SQL queries over stored metrics and events.
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Union
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from enum import Enum
 
-from loglens.storage.database import LogStorage
+from loglens.analytics.metrics import (
+    AggregationType, FieldEq, FieldGe, FieldGt, FieldIn, FieldPredicate, Metric, MetricResult,
+)
+from loglens.models import LogLevel
+from loglens.storage.database import LogStorage, _to_naive_utc
 
 
 class TimeBucket(Enum):
@@ -22,6 +27,57 @@ class TimeBucket(Enum):
     MONTH = "month"
 
 
+# Buckets at least an hour wide can be computed from the events_hourly rollup
+_ROLLUP_BUCKETS = {TimeBucket.HOUR, TimeBucket.DAY, TimeBucket.WEEK, TimeBucket.MONTH}
+
+# LogEvent attributes stored as events columns, usable in pushed-down filters
+_EVENT_COLUMNS = {'timestamp', 'level', 'source', 'message'}
+
+# SQL operators for single-value declarative predicates
+_PREDICATE_OPERATORS = {FieldEq: '=', FieldGt: '>', FieldGe: '>='}
+
+
+def _predicate_sql(predicate: FieldPredicate) -> Tuple[str, List[Any]]:
+    """
+    Translate a declarative event filter into a WHERE condition on events.
+    
+    ``level_code`` is not stored, so predicates on it are evaluated against
+    every LogLevel up front and become a ``level IN (...)`` condition.
+    
+    Args:
+        predicate: FieldEq, FieldIn, FieldGt or FieldGe predicate
+    
+    Returns:
+        Tuple of (SQL condition, parameters)
+    
+    Raises:
+        ValueError: If the predicate's field or type has no SQL equivalent
+    """
+    if predicate.field == 'level_code':
+        levels = [level.name for level, keep in zip(LogLevel, predicate.mask(list(LogLevel)))
+                  if keep]
+        return _predicate_sql(FieldIn('level', levels))
+    
+    if predicate.field not in _EVENT_COLUMNS:
+        raise ValueError(f"Cannot filter on '{predicate.field}' in SQL")
+    
+    if isinstance(predicate, FieldIn):
+        values = sorted(predicate.value)
+        if not values:
+            return "FALSE", []
+        placeholders = ", ".join("?" * len(values))
+        return f"{predicate.field} IN ({placeholders})", values
+    
+    operator = _PREDICATE_OPERATORS.get(type(predicate))
+    if operator is None:
+        raise ValueError(f"Cannot translate {type(predicate).__name__} to SQL")
+    
+    value = predicate.value
+    if isinstance(value, datetime):
+        value = _to_naive_utc(value)
+    return f"{predicate.field} {operator} ?", [value]
+
+
 class MetricQuery:
     """
     SQL-style query builder for metrics and events.
@@ -39,6 +95,9 @@ class MetricQuery:
         """
         self.storage = storage
         self.conn = storage.conn
+        
+        # Parsed statements keyed by SQL text, so repeated queries skip the parser
+        self._parse_sql = lru_cache(maxsize=64)(self._parse_sql_uncached)
     
     def execute_sql(self, sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """
@@ -57,10 +116,11 @@ class MetricQuery:
                 ('error_count',)
             )
         """
+        statement = self._parse_sql(sql)
         if params:
-            result = self.conn.execute(sql, params)
+            result = self.conn.execute(statement, params)
         else:
-            result = self.conn.execute(sql)
+            result = self.conn.execute(statement)
         
         # Fetch all results
         rows = result.fetchall()
@@ -87,6 +147,137 @@ class MetricQuery:
         # Convert rows to dictionaries
         return [dict(zip(columns, row)) for row in rows]
     
+    def iter_sql(
+        self,
+        sql: str,
+        params: Optional[tuple] = None,
+        arraysize: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a raw SQL query and iterate over result rows as they are fetched.
+        
+        Rows are pulled ``arraysize`` at a time, so large results never sit
+        in memory as one list. The query runs on its own cursor, leaving the
+        storage connection free for other queries while the rows are consumed.
+        
+        Args:
+            sql: SQL query string
+            params: Optional parameters for parameterized queries
+            arraysize: Number of rows fetched per round trip
+        
+        Returns:
+            Iterator of one dictionary per result row
+        
+        Example:
+            for row in query.iter_sql("SELECT * FROM events"):
+                print(row['message'])
+        """
+        columns, rows = self.iter_rows(sql, params, arraysize)
+        return (dict(zip(columns, row)) for row in rows)
+    
+    def iter_rows(
+        self,
+        sql: str,
+        params: Optional[tuple] = None,
+        arraysize: int = 1000
+    ) -> Tuple[List[str], Iterator[tuple]]:
+        """
+        Execute a raw SQL query and iterate over its rows as plain tuples.
+        
+        Like iter_sql(), but rows are the tuples DuckDB returns, so loops that
+        unpack or format every cell skip building a dictionary per row.
+        
+        Args:
+            sql: SQL query string
+            params: Optional parameters for parameterized queries
+            arraysize: Number of rows fetched per round trip
+        
+        Returns:
+            Tuple of (column names, iterator of row tuples)
+        
+        Example:
+            columns, rows = query.iter_rows("SELECT level, COUNT(*) FROM events GROUP BY level")
+            for level, count in rows:
+                print(level, count)
+        """
+        statement = self._parse_sql(sql)
+        cursor = self.conn.cursor()
+        try:
+            if params:
+                result = cursor.execute(statement, params)
+            else:
+                result = cursor.execute(statement)
+        except Exception:
+            cursor.close()
+            raise
+        
+        if not result.description:
+            cursor.close()
+            return [], iter(())
+        
+        columns = [desc[0] for desc in result.description]
+        return columns, self._fetch_rows(cursor, arraysize)
+    
+    @staticmethod
+    def _fetch_rows(cursor: Any, arraysize: int) -> Iterator[tuple]:
+        """Yield a cursor's pending rows in batches, closing it once they run out."""
+        try:
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def execute_numpy(self, sql: str, params: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Execute a raw SQL query and return the result as columns.
+        
+        DuckDB fills one NumPy array per column, so no per-row dictionaries
+        are built; use this when the result feeds NumPy or matplotlib.
+        Columns containing NULLs come back as masked arrays. Requires NumPy
+        (installed with matplotlib).
+        
+        Args:
+            sql: SQL query string
+            params: Optional parameters for parameterized queries
+        
+        Returns:
+            Dictionary of column name -> NumPy array
+        
+        Example:
+            columns = query.execute_numpy(
+                "SELECT hour, SUM(event_count) AS n FROM events_hourly GROUP BY hour"
+            )
+            columns['hour']  # datetime64[us] array
+        """
+        statement = self._parse_sql(sql)
+        if params:
+            result = self.conn.execute(statement, params)
+        else:
+            result = self.conn.execute(statement)
+        
+        return result.fetchnumpy()
+    
+    def _parse_sql_uncached(self, sql: str) -> Any:
+        """
+        Parse a SQL string into a reusable DuckDB statement.
+        
+        Args:
+            sql: SQL query string
+        
+        Returns:
+            Parsed statement, or the original string if it cannot be
+            parsed up front (multiple statements, older DuckDB)
+        """
+        extract = getattr(self.conn, 'extract_statements', None)
+        if extract is None:
+            return sql
+        
+        statements = extract(sql)
+        return statements[0] if len(statements) == 1 else sql
+    
     def query_metrics_by_time_bucket(
         self,
         metric_name: str,
@@ -174,50 +365,23 @@ class MetricQuery:
             # Top 10 sources by event count
             top_sources = query.query_top_sources(limit=10)
         """
-        conditions = []
-        params = []
-        
-        if start_time:
-            conditions.append("timestamp >= ?")
-            params.append(start_time)
-        
-        if end_time:
-            conditions.append("timestamp <= ?")
-            params.append(end_time)
-        
-        where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
-        
-        if by == "event_count":
-            sql = f"""
-                SELECT 
-                    source,
-                    COUNT(*) AS event_count,
-                    COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-                    COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count
-                FROM events
-                {where_clause}
-                GROUP BY source
-                ORDER BY event_count DESC
-                LIMIT ?
-            """
-            params.append(limit)
-        elif by == "error_count":
-            sql = f"""
-                SELECT 
-                    source,
-                    COUNT(*) AS event_count,
-                    COUNT(CASE WHEN level = 'ERROR' THEN 1 END) AS error_count,
-                    COUNT(CASE WHEN level = 'WARNING' THEN 1 END) AS warning_count
-                FROM events
-                {where_clause}
-                GROUP BY source
-                ORDER BY error_count DESC
-                LIMIT ?
-            """
-            params.append(limit)
-        else:
+        if by not in ("event_count", "error_count"):
             raise ValueError(f"Unknown 'by' parameter: {by}")
         
+        counts_sql, params = self._event_counts(start_time, end_time)
+        sql = f"""
+            SELECT 
+                source,
+                SUM(event_count) AS event_count,
+                COALESCE(SUM(event_count) FILTER (WHERE level = 'ERROR'), 0) AS error_count,
+                COALESCE(SUM(event_count) FILTER (WHERE level = 'WARNING'), 0) AS warning_count
+            FROM ({counts_sql})
+            GROUP BY source
+            ORDER BY {by} DESC, source
+            LIMIT ?
+        """
+        params.append(limit)
+        
         return self.execute_sql(sql, tuple(params))
     
     def query_metrics_trend(
@@ -269,6 +433,23 @@ class MetricQuery:
         
         bucket_expr = self._get_time_bucket_expr(bucket_size, "timestamp")
         
+        if bucket_size in _ROLLUP_BUCKETS:
+            counts_sql, params = self._event_counts(start_time, end_time)
+            sql = f"""
+                SELECT 
+                    {bucket_expr} AS bucket_time,
+                    source,
+                    SUM(event_count) AS total_events,
+                    COALESCE(SUM(event_count) FILTER (
+                        WHERE level IN ('ERROR', 'CRITICAL', 'FATAL')
+                    ), 0) AS error_count,
+                    error_count * 100.0 / total_events AS error_rate
+                FROM ({counts_sql})
+                GROUP BY bucket_time, source
+                ORDER BY bucket_time, error_rate DESC
+            """
+            return self.execute_sql(sql, tuple(params))
+        
         conditions = []
         params = []
         
@@ -287,9 +468,8 @@ class MetricQuery:
                 {bucket_expr} AS bucket_time,
                 source,
                 COUNT(*) AS total_events,
-                COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS error_count,
-                CAST(COUNT(CASE WHEN level IN ('ERROR', 'CRITICAL', 'FATAL') THEN 1 END) AS DOUBLE) / 
-                    NULLIF(COUNT(*), 0) * 100.0 AS error_rate
+                COUNT_IF(level IN ('ERROR', 'CRITICAL', 'FATAL')) AS error_count,
+                error_count * 100.0 / total_events AS error_rate
             FROM events
             {where_clause}
             GROUP BY bucket_time, source
@@ -359,6 +539,79 @@ class MetricQuery:
         
         return expanded_results
     
+    def query_metric_windows(
+        self,
+        metric: Metric,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> List[MetricResult]:
+        """
+        Compute a count metric over stored events in SQL.
+        
+        Returns the same updates a MetricProcessor emits when fed the stored
+        events in timestamp order: one result per matching event, counting
+        the matching events in the window that ends at it. DuckDB evaluates
+        the sliding window, so no events are replayed through Python.
+        
+        Only ungrouped COUNT metrics whose filter is a declarative predicate
+        (FieldEq, FieldIn, FieldGt, FieldGe) can be pushed down; compute any
+        other metric with a MetricProcessor.
+        
+        Args:
+            metric: Metric definition
+            start_time: Only use events at or after this time
+            end_time: Only use events at or before this time
+        
+        Returns:
+            List of MetricResult updates, oldest first
+        
+        Raises:
+            ValueError: If the metric cannot be expressed in SQL
+        """
+        if metric.aggregation != AggregationType.COUNT or metric.group_by is not None:
+            raise ValueError(f"Metric '{metric.name}' is not an ungrouped count")
+        if not isinstance(metric.filter, FieldPredicate):
+            raise ValueError(f"Metric '{metric.name}' does not use a declarative filter")
+        
+        condition, params = _predicate_sql(metric.filter)
+        conditions = [condition]
+        
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(_to_naive_utc(start_time))
+        
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(_to_naive_utc(end_time))
+        
+        # The RANGE frame also counts later events with the same timestamp,
+        # which the processor has not seen yet; subtract them back out
+        sql = f"""
+            SELECT
+                timestamp,
+                COUNT(*) OVER (
+                    ORDER BY timestamp RANGE BETWEEN ? PRECEDING AND CURRENT ROW
+                ) - COUNT(*) OVER (
+                    PARTITION BY timestamp ORDER BY id
+                    ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                ) AS value
+            FROM events
+            WHERE {" AND ".join(conditions)}
+            ORDER BY timestamp, id
+        """
+        rows = self.conn.execute(sql, [metric.window] + params).fetchall()
+        
+        window = metric.window
+        return [
+            MetricResult(
+                metric_name=metric.name,
+                value=value,
+                window_start=timestamp - window,
+                window_end=timestamp
+            )
+            for timestamp, value in rows
+        ]
+    
     def query_custom(self, sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """
         Execute a custom SQL query.
@@ -389,6 +642,66 @@ class MetricQuery:
         """
         return self.execute_sql(sql, params)
     
+    def _event_counts(
+        self,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime]
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build a subquery of (timestamp, source, level, event_count) rows.
+        
+        Whole hours inside the range come from the events_hourly rollup, one
+        row per hour, source and level; only events in the partial hours at
+        either edge of the range are read from the events table.
+        
+        Args:
+            start_time: Start of time range (inclusive)
+            end_time: End of time range (inclusive)
+        
+        Returns:
+            Tuple of (SQL, parameters)
+        """
+        if start_time is None and end_time is None:
+            return "SELECT hour AS timestamp, source, level, event_count FROM events_hourly", []
+        
+        rollup_conditions, rollup_params = [], []
+        raw_conditions, raw_params = [], []
+        edges, edge_params = [], []
+        
+        if start_time is not None:
+            start_time = _to_naive_utc(start_time)
+            first_hour = start_time.replace(minute=0, second=0, microsecond=0)
+            if first_hour < start_time:
+                first_hour += timedelta(hours=1)
+            rollup_conditions.append("hour >= ?")
+            rollup_params.append(first_hour)
+            raw_conditions.append("timestamp >= ?")
+            raw_params.append(start_time)
+            edges.append("timestamp < ?")
+            edge_params.append(first_hour)
+        
+        if end_time is not None:
+            end_time = _to_naive_utc(end_time)
+            end_hour = end_time.replace(minute=0, second=0, microsecond=0)
+            rollup_conditions.append("hour < ?")
+            rollup_params.append(end_hour)
+            raw_conditions.append("timestamp <= ?")
+            raw_params.append(end_time)
+            edges.append("timestamp >= ?")
+            edge_params.append(end_hour)
+        
+        raw_conditions.append("(" + " OR ".join(edges) + ")")
+        sql = f"""
+            SELECT hour AS timestamp, source, level, event_count
+            FROM events_hourly
+            WHERE {" AND ".join(rollup_conditions)}
+            UNION ALL
+            SELECT timestamp, source, level, 1 AS event_count
+            FROM events
+            WHERE {" AND ".join(raw_conditions)}
+        """
+        return sql, rollup_params + raw_params + edge_params
+    
     def _get_time_bucket_expr(
         self,
         bucket_size: TimeBucket,
@@ -5,7 +5,10 @@ Supports YAML configuration files for defining metrics, time windows,
 and alert thresholds without code changes.
 """
 
-import yaml
+import hashlib
+import json
+import os
+import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
@@ -15,6 +18,96 @@ from loglens.analytics import Metric, AggregationType
 from loglens.analytics.anomaly_detector import AnomalyDetector
 
 
+def _cache_dir() -> Optional[Path]:
+    """Directory for cached parsed config files, or None if caching is disabled."""
+    if os.environ.get('LOGLENS_NO_CONFIG_CACHE'):
+        return None
+    base = os.environ.get('XDG_CACHE_HOME') or Path('~/.cache').expanduser()
+    return Path(base) / 'loglens'
+
+
+def _load_yaml(config_path: Path) -> Any:
+    """
+    Parse a YAML file, reusing the result of an earlier parse when possible.
+    
+    Parsed data is stored as JSON under the user's cache directory, keyed by
+    the file's resolved path and checked against its modification time and
+    size, so repeated CLI runs against an unchanged config skip the YAML
+    parser (and importing PyYAML at all). Data that JSON cannot represent
+    exactly (e.g. dates) is not cached. Cache failures (e.g. a read-only home
+    directory) fall back to parsing. Setting LOGLENS_NO_CONFIG_CACHE to a
+    non-empty value disables the cache.
+    
+    Args:
+        config_path: Path to YAML file
+    
+    Returns:
+        Parsed YAML data
+    """
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return _parse_yaml(config_path)
+    
+    stat = config_path.stat()
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    key = hashlib.sha1(str(config_path.resolve()).encode()).hexdigest()
+    cache_path = cache_dir / f"{key}.json"
+    
+    try:
+        with open(cache_path, 'r') as f:
+            entry = json.load(f)
+        if entry['stamp'] == stamp:
+            return entry['data']
+    except (FileNotFoundError, NotADirectoryError):
+        # No entry yet, or no usable cache directory to hold one
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        # Rewritten below, so a corrupt entry is reported once
+        warnings.warn(f"Ignoring unreadable config cache {cache_path}: {e}")
+    
+    data = _parse_yaml(config_path)
+    
+    try:
+        text = json.dumps({'stamp': stamp, 'data': data})
+    except (TypeError, ValueError):
+        return data
+    if json.loads(text)['data'] == data:
+        _write_cache(cache_path, text)
+    
+    return data
+
+
+def _parse_yaml(config_path: Path) -> Any:
+    """Parse a YAML file with PyYAML's safe loader."""
+    # Imported here so CLI runs without a config, or with a cached one, skip it
+    import yaml
+    
+    # libyaml's loader is several times faster than the pure-Python one
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=loader)
+
+
+def _write_cache(cache_path: Path, text: str) -> None:
+    """
+    Atomically replace a cache file, ignoring failures.
+    
+    The text goes to a temporary file first so concurrent runs never read a
+    partial entry; the temporary file is removed if the write fails.
+    """
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
 @dataclass
 class MetricConfig:
     """Configuration for a single metric."""
@@ -46,6 +139,7 @@ class StorageConfig:
     
     db_path: str = "loglens.db"
     retention_days: Optional[int] = None  # Auto-delete events older than this
+    settings: Dict[str, Any] = field(default_factory=dict)  # DuckDB connection settings
 
 
 @dataclass
@@ -77,8 +171,7 @@ class LogLensConfig:
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
         
-        with open(config_path, 'r') as f:
-            data = yaml.safe_load(f)
+        data = _load_yaml(config_path)
         
         return cls.from_dict(data)
     
@@ -318,6 +411,8 @@ def create_default_config(config_path: Union[str, Path] = "loglens.yaml") -> Non
         ]
     }
     
+    import yaml
+    
     with open(config_path, 'w') as f:
         yaml.dump(default_config, f, default_flow_style=False, sort_keys=False)
     
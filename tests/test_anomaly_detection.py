@@ -5,9 +5,12 @@ Focuses on correctness and edge cases for spike and drop detection.
 """
 
 import pytest
+from dataclasses import asdict
 from datetime import datetime, timedelta
 
-from loglens.analytics import AnomalyDetector, AnomalyType, create_detector
+from loglens.analytics import (
+    Anomaly, AnomalyDetector, AnomalyType, create_detector, create_multi_detector
+)
 
 
 class TestAnomalyDetection:
@@ -170,6 +173,29 @@ class TestAnomalyEdgeCases:
         assert "error_rate" in anomaly.explanation
         assert "spiked" in anomaly.explanation.lower() or "above" in anomaly.explanation.lower()
     
+    def test_explanation_built_on_access(self):
+        """Test that explanation and severity are derived from the stored numbers."""
+        anomaly = Anomaly(
+            metric_name='latency', timestamp=datetime(2024, 1, 1, 12, 0, 0),
+            value=5.0, baseline_mean=20.0, baseline_std=4.0, z_score=-3.75,
+            anomaly_type=AnomalyType.DROP
+        )
+        
+        assert vars(anomaly)['_explanation'] is None
+        assert anomaly.explanation == \
+            "latency dropped 4.0x below baseline (5.00 vs 20.00 average)"
+        assert anomaly.severity == "high"
+        assert anomaly.to_dict()['severity'] == "high"
+        assert asdict(anomaly)['explanation'] == anomaly.explanation
+        
+        # Values passed in are kept as given
+        given = Anomaly(
+            metric_name='latency', timestamp=datetime(2024, 1, 1, 12, 0, 0),
+            value=5.0, baseline_mean=20.0, baseline_std=4.0, z_score=-3.75,
+            anomaly_type=AnomalyType.DROP, explanation='custom', severity='low'
+        )
+        assert (given.explanation, given.severity) == ('custom', 'low')
+    
     def test_baseline_statistics(self):
         """Test baseline statistics calculation."""
         detector = create_detector('error_count', window_size=10, threshold=2.0)
@@ -207,6 +233,19 @@ class TestAnomalyEdgeCases:
         stats = detector.get_baseline_stats()
         assert stats['sample_count'] == 0
     
+    def test_values_are_read_only(self):
+        """Test that values is an ordered snapshot that rejects in-place changes."""
+        detector = create_detector('error_count', window_size=3, threshold=2.0)
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(5):
+            detector.add_value(10 + i, base_time + timedelta(minutes=i))
+        
+        assert detector.values == (12.0, 13.0, 14.0)
+        with pytest.raises(AttributeError):
+            detector.values.append(15.0)
+        assert detector.values == (12.0, 13.0, 14.0)
+    
     def test_negative_values(self):
         """Test handling of negative values."""
         detector = create_detector('metric', window_size=10, threshold=2.0)
@@ -271,4 +310,172 @@ class TestAnomalyEdgeCases:
         anomaly2 = detector2.add_value(12, base_time + timedelta(minutes=50))
         # Should not detect (< threshold)
         assert anomaly2 is None
-
+    
+    def test_rolling_statistics_after_eviction(self):
+        """Test that running statistics track the window as old values are evicted."""
+        detector = create_detector('error_count', window_size=5, threshold=2.0)
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        
+        values = [3, 100, 7, 1, 12, 9, 4, 15, 6, 2, 8, 11]
+        for i, value in enumerate(values):
+            detector.add_value(value, base_time + timedelta(minutes=i*5))
+        
+        window = values[-5:]
+        expected_mean = sum(window) / len(window)
+        expected_std = (sum((x - expected_mean) ** 2 for x in window) / len(window)) ** 0.5
+        
+        stats = detector.get_baseline_stats()
+        assert stats['sample_count'] == 5
+        assert stats['mean'] == pytest.approx(expected_mean)
+        assert stats['std'] == pytest.approx(expected_std)
+    
+    def test_rolling_statistics_do_not_drift(self):
+        """Test that large evicted values leave no rounding error in the baseline."""
+        detector = create_detector('latency', window_size=4, threshold=2.0)
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [1e12, 3e12, 2e12, 5e12] + [1.0, 2.0, 3.0, 4.0] * 3
+        for i, value in enumerate(values):
+            detector.add_value(value, base_time + timedelta(minutes=i))
+        
+        stats = detector.get_baseline_stats()
+        assert stats['mean'] == 2.5
+        assert stats['std'] == pytest.approx(1.25 ** 0.5, rel=1e-12)
+    
+    def test_add_values_matches_add_value(self):
+        """Test that batch ingestion flags the same anomalies as per-value calls."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [10, 12, 11, 13, 10, 12, 11, 10, 12, 11, 30, 11, 12, 1, 10]
+        timestamps = [base_time + timedelta(minutes=i*5) for i in range(len(values))]
+        
+        single = create_detector('error_count', window_size=10, threshold=2.0)
+        expected = [single.add_value(v, ts) for v, ts in zip(values, timestamps)]
+        expected = [a for a in expected if a is not None]
+        
+        batch = create_detector('error_count', window_size=10, threshold=2.0)
+        anomalies = batch.add_values(values, timestamps)
+        
+        assert [a.timestamp for a in anomalies] == [a.timestamp for a in expected]
+        assert [a.z_score for a in anomalies] == pytest.approx([a.z_score for a in expected])
+        # Each anomaly keeps the baseline it was scored against, not the final one
+        assert [(a.baseline_mean, a.baseline_std) for a in anomalies] == \
+            [(a.baseline_mean, a.baseline_std) for a in expected]
+        assert batch.get_baseline_stats() == single.get_baseline_stats()
+        
+        with pytest.raises(ValueError):
+            batch.add_values([1, 2, 3], timestamps[:2])
+    
+    def test_detect_batch_mask_and_scores(self):
+        """Test that detect_batch flags the same positions as add_value."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [10, 12, 11, 13, 10, 12, 11, 10, 12, 11, 30, 11, 12, 1, 10]
+        timestamps = [base_time + timedelta(minutes=i*5) for i in range(len(values))]
+        
+        single = create_detector('error_count', window_size=10, threshold=2.0)
+        expected = [single.add_value(v, ts) is not None for v, ts in zip(values, timestamps)]
+        
+        batch = create_detector('error_count', window_size=10, threshold=2.0)
+        mask, z_scores = batch.detect_batch(values, timestamps)
+        
+        assert mask == expected
+        assert len(z_scores) == len(values)
+        # No z-score before min_samples values have been seen
+        assert z_scores[:batch.min_samples - 1] == [0.0] * (batch.min_samples - 1)
+        assert z_scores[10] > 2.0
+    
+    def test_detect_batch_in_chunks_matches_add_value(self):
+        """Test that chunked detect_batch calls track add_value across window wraps."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [10 + (i * 7) % 5 + (25 if i % 17 == 0 else 0) for i in range(60)]
+        timestamps = [base_time + timedelta(minutes=i) for i in range(len(values))]
+        
+        single = create_detector('error_count', window_size=8, threshold=2.0)
+        expected = [single.add_value(v, ts) is not None for v, ts in zip(values, timestamps)]
+        
+        batch = create_detector('error_count', window_size=8, threshold=2.0)
+        mask = []
+        for start in range(0, len(values), 13):
+            mask.extend(batch.detect_batch(values[start:start + 13],
+                                           timestamps[start:start + 13])[0])
+        
+        assert mask == expected
+        assert batch.values == single.values
+        assert list(batch.timestamps) == list(single.timestamps)
+        assert batch.get_baseline_stats() == pytest.approx(single.get_baseline_stats())
+    
+    def test_multi_metric_values_per_timestep(self):
+        """Test that per-timestep multi-metric updates match per-metric detectors."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        multi = create_multi_detector(window_size=10, threshold=2.0)
+        singles = {
+            name: create_detector(name, window_size=10, threshold=2.0)
+            for name in ('errors', 'latency')
+        }
+        
+        for i in range(12):
+            timestamp = base_time + timedelta(minutes=i*5)
+            values = {'errors': 10 + i % 3, 'latency': 100 + i % 4}
+            if i == 11:
+                values = {'errors': 40, 'latency': 101}
+            
+            anomalies = multi.add_metric_values(values, timestamp)
+            expected = [
+                singles[name].add_value(value, timestamp) for name, value in values.items()
+            ]
+            assert [a.metric_name for a in anomalies] == \
+                [a.metric_name for a in expected if a is not None]
+        
+        assert [a.metric_name for a in anomalies] == ['errors']
+        assert multi.get_baseline_stats()['latency'] == singles['latency'].get_baseline_stats()
+    
+    def test_state_round_trip(self, tmp_path):
+        """Test that a saved baseline is restored by a new detector."""
+        state_path = tmp_path / 'detectors.json'
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        
+        detector = create_detector('error_count', window_size=10, threshold=2.0)
+        detector.add_values(
+            [10, 12, 11, 13, 10, 12, 11, 10, 12, 11, 13, 10],
+            [base_time + timedelta(minutes=i*5) for i in range(12)]
+        )
+        detector.save_state(state_path)
+        create_detector('other_metric').save_state(state_path)
+        
+        restored = create_detector('error_count', window_size=10, threshold=2.0,
+                                   state_path=state_path)
+        
+        assert restored.get_baseline_stats() == pytest.approx(detector.get_baseline_stats())
+        assert list(restored.timestamps) == list(detector.timestamps)
+        # Baseline is warm: the very first new value can be flagged
+        assert restored.add_value(100, base_time + timedelta(minutes=60)) is not None
+        
+        fresh = AnomalyDetector('missing_metric')
+        assert fresh.load_state(state_path) is False
+        assert fresh.load_state(tmp_path / 'absent.json') is False
+    
+    def test_multi_metric_series_matches_per_timestep(self):
+        """Test that metric-major batch updates match per-timestep updates."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        timestamps = [base_time + timedelta(minutes=i*5) for i in range(14)]
+        series = {
+            'errors': [10, 12, 11, 13, 10, 12, 11, 10, 12, 11, 40, 11, 12, 0],
+            'latency': [100, 101, 99, 100, 102, 100, 101, 99, 100, 100, 100, 180, 101, 100],
+        }
+        
+        per_timestep = create_multi_detector(window_size=10, threshold=2.0)
+        expected = []
+        for i, timestamp in enumerate(timestamps):
+            expected.extend(per_timestep.add_metric_values(
+                {name: values[i] for name, values in series.items()}, timestamp
+            ))
+        
+        batch = create_multi_detector(window_size=10, threshold=2.0)
+        anomalies = batch.add_metrics_series(series, timestamps)
+        
+        assert [(a.metric_name, a.timestamp) for a in anomalies] == \
+            [(a.metric_name, a.timestamp) for a in expected]
+        assert len(anomalies) >= 2
+        
+        with pytest.raises(ValueError):
+            batch.add_metrics_series({'errors': [1, 2], 'latency': [1]}, timestamps[:2])
@@ -0,0 +1,189 @@
+"""
+Unit tests for configuration loading.
+
+Focuses on the parsed-config cache (when it is reused, invalidated, skipped
+or bypassed) and on keeping PyYAML out of runs that need no parsing.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import warnings
+from pathlib import Path
+
+import pytest
+
+from loglens.utils import config as config_module
+from loglens.utils.config import LogLensConfig
+
+
+CONFIG_YAML = """\
+default_source: app
+metrics:
+  - name: error_count
+    filter: "event.level == 'ERROR'"
+    aggregation: count
+    window: 5m
+"""
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """Count calls to the YAML parser."""
+    calls = []
+    parse_yaml = config_module._parse_yaml
+    
+    def counting_parse(config_path):
+        calls.append(config_path)
+        return parse_yaml(config_path)
+    
+    monkeypatch.setattr(config_module, '_parse_yaml', counting_parse)
+    return calls
+
+
+@pytest.fixture
+def cache_home(tmp_path, monkeypatch):
+    """Point the config cache at a temporary directory."""
+    cache_home = tmp_path / 'cache'
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cache_home))
+    monkeypatch.delenv('LOGLENS_NO_CONFIG_CACHE', raising=False)
+    return cache_home
+
+
+def write_config(tmp_path, text=CONFIG_YAML):
+    """Write a config file and return its path."""
+    config_path = tmp_path / 'loglens.yaml'
+    config_path.write_text(text)
+    return config_path
+
+
+def cache_files(cache_home):
+    """Cache entries currently on disk."""
+    cache_dir = cache_home / 'loglens'
+    return sorted(cache_dir.glob('*.json')) if cache_dir.exists() else []
+
+
+class TestConfigCache:
+    """Tests for the parsed-config cache."""
+    
+    def test_second_load_uses_cache(self, tmp_path, cache_home, parse_calls):
+        """Test that an unchanged file is parsed only once."""
+        config_path = write_config(tmp_path)
+        
+        first = LogLensConfig.from_file(config_path)
+        second = LogLensConfig.from_file(config_path)
+        
+        assert len(parse_calls) == 1
+        assert len(cache_files(cache_home)) == 1
+        assert second.default_source == first.default_source == 'app'
+        assert second.metrics == first.metrics
+    
+    def test_touched_file_is_reparsed(self, tmp_path, cache_home, parse_calls):
+        """Test that a new modification time invalidates the cache entry."""
+        config_path = write_config(tmp_path)
+        LogLensConfig.from_file(config_path)
+        
+        stat = config_path.stat()
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        LogLensConfig.from_file(config_path)
+        LogLensConfig.from_file(config_path)
+        
+        assert len(parse_calls) == 2
+    
+    def test_resized_file_is_reparsed(self, tmp_path, cache_home, parse_calls):
+        """Test that a size change invalidates the entry even with the same mtime."""
+        config_path = write_config(tmp_path)
+        LogLensConfig.from_file(config_path)
+        
+        stat = config_path.stat()
+        config_path.write_text(CONFIG_YAML.replace('app', 'web-frontend'))
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        config = LogLensConfig.from_file(config_path)
+        
+        assert len(parse_calls) == 2
+        assert config.default_source == 'web-frontend'
+    
+    def test_corrupt_entry_warns_and_is_rewritten(self, tmp_path, cache_home, parse_calls):
+        """Test that an unreadable entry is reported, reparsed and replaced."""
+        config_path = write_config(tmp_path)
+        LogLensConfig.from_file(config_path)
+        (cache_path,) = cache_files(cache_home)
+        cache_path.write_text('{not json')
+        
+        with pytest.warns(UserWarning, match='unreadable config cache'):
+            config = LogLensConfig.from_file(config_path)
+        
+        assert config.default_source == 'app'
+        assert json.loads(cache_path.read_text())['data']['default_source'] == 'app'
+        assert len(parse_calls) == 2
+        
+        LogLensConfig.from_file(config_path)
+        assert len(parse_calls) == 2
+    
+    @pytest.mark.parametrize('text', [
+        "default_source: app\ncreated: 2024-01-01\n",
+        "default_source: app\nstorage:\n  settings:\n    1: threads\n",
+    ])
+    def test_inexact_data_is_not_cached(self, tmp_path, cache_home, parse_calls, text):
+        """Test that dates and non-string keys, which JSON would change, skip the cache."""
+        config_path = write_config(tmp_path, text)
+        
+        LogLensConfig.from_file(config_path)
+        LogLensConfig.from_file(config_path)
+        
+        assert cache_files(cache_home) == []
+        assert len(parse_calls) == 2
+    
+    def test_unwritable_cache_falls_back_to_parsing(self, tmp_path, monkeypatch, parse_calls):
+        """Test that a cache directory that cannot be created is ignored."""
+        blocker = tmp_path / 'not-a-directory'
+        blocker.write_text('')
+        monkeypatch.setenv('XDG_CACHE_HOME', str(blocker))
+        monkeypatch.delenv('LOGLENS_NO_CONFIG_CACHE', raising=False)
+        config_path = write_config(tmp_path)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            first = LogLensConfig.from_file(config_path)
+            second = LogLensConfig.from_file(config_path)
+        
+        assert first.default_source == second.default_source == 'app'
+        assert len(parse_calls) == 2
+        assert list(tmp_path.glob('**/*.tmp')) == []
+    
+    def test_cache_can_be_disabled(self, tmp_path, cache_home, monkeypatch, parse_calls):
+        """Test that LOGLENS_NO_CONFIG_CACHE bypasses the cache entirely."""
+        monkeypatch.setenv('LOGLENS_NO_CONFIG_CACHE', '1')
+        config_path = write_config(tmp_path)
+        
+        LogLensConfig.from_file(config_path)
+        LogLensConfig.from_file(config_path)
+        
+        assert len(parse_calls) == 2
+        assert not cache_home.exists()
+
+
+class TestLazyYamlImport:
+    """Tests that PyYAML is only imported when a file is parsed."""
+    
+    def test_cli_without_config_skips_yaml(self, tmp_path):
+        """Test that importing the CLI and loading the default config never imports yaml."""
+        env = dict(os.environ, HOME=str(tmp_path), XDG_CACHE_HOME=str(tmp_path / 'cache'))
+        repo_root = Path(__file__).resolve().parent.parent
+        env['PYTHONPATH'] = os.pathsep.join(
+            filter(None, [str(repo_root), env.get('PYTHONPATH')])
+        )
+        script = (
+            "import sys\n"
+            "from loglens.cli.main import load_config\n"
+            "load_config()\n"
+            "print('yaml' in sys.modules)\n"
+        )
+        
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=tmp_path, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        
+        assert result.stdout.strip() == 'False'
@@ -11,7 +11,7 @@ from pathlib import Path
 import tempfile
 
 from loglens.ingestion import LogIngestor
-from loglens.models import LogEvent
+from loglens.models import LogEvent, LogLevel
 
 
 class TestJSONIngestion:
@@ -198,6 +198,19 @@ class TestIngestionEdgeCases:
         assert "测试" in events[0].message
         assert "🚀" in events[0].message
     
+    def test_json_file_with_invalid_utf8(self, tmp_path):
+        """Test that JSON files decode invalid UTF-8 with replacement characters."""
+        ingestor = LogIngestor()
+        log_file = tmp_path / "logs.json"
+        log_file.write_bytes(
+            '{"source": "app1", "message": "Test: 测试"}\n'.encode('utf-8')
+            + b'{"source": "app1", "message": "caf\xe9"}\n'
+        )
+        
+        events = list(ingestor.ingest_file(log_file))
+        
+        assert [e.message for e in events] == ["Test: 测试", "caf\ufffd"]
+    
     def test_very_long_message(self):
         """Test handling of very long log messages."""
         ingestor = LogIngestor()
@@ -222,4 +235,22 @@ class TestIngestionEdgeCases:
         stream2 = StringIO('{"timestamp": "2024-01-01T12:00:00Z", "level": "INFO", "source": "app1", "message": "Test"}')
         events2 = list(ingestor.ingest_stream(stream2, format="json"))
         assert isinstance(events2[0].timestamp, datetime)
-
+    
+    def test_level_normalization(self):
+        """Test that levels are normalized to shared uppercase names."""
+        timestamp = datetime(2024, 1, 1, 12, 0, 0)
+        
+        lower = LogEvent(timestamp=timestamp, level='error', source=''.join(['app', '1']),
+                         message='Test')
+        enum = LogEvent(timestamp=timestamp, level=LogLevel.ERROR, source='app1', message='Test')
+        
+        assert lower.level == enum.level == 'ERROR'
+        # Normalized levels and sources are shared string objects
+        assert lower.level is enum.level
+        assert lower.source is enum.source
+        assert LogLevel.WARNING < LogLevel.ERROR < LogLevel.FATAL
+        assert lower.level_code is enum.level_code is LogLevel.ERROR
+        assert lower == enum
+        
+        with pytest.raises(ValueError, match="level"):
+            LogEvent(timestamp=timestamp, level='LOUD', source='app1', message='Test')
@@ -7,8 +7,11 @@ Focuses on correctness and edge cases for different aggregation types.
 import pytest
 from datetime import datetime, timedelta
 
-from loglens.models import LogEvent
-from loglens.analytics import Metric, MetricProcessor, AggregationType
+from loglens.models import LogEvent, LogLevel
+from loglens.analytics import (
+    Metric, MetricProcessor, AggregationType, FieldEq, FieldIn, FieldGt, FieldGe,
+    events_by_level_metric, events_by_source_metric
+)
 
 
 class TestMetricAggregation:
@@ -172,6 +175,87 @@ class TestMetricAggregation:
         max_result = processor_max.get_metric('max_value')
         assert max_result.value == 200
     
+    def test_rolling_aggregates_track_expiring_window(self):
+        """Test that rolling aggregates follow the window as values expire."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [5, 3, 3, 8, 1, 9, 9, 2, 7, 4, 6, 0, 5]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i * 10), level='INFO',
+                     source='app1', message=f'Event {i}', metadata={'value': value})
+            for i, value in enumerate(values)
+        ]
+        
+        processor = MetricProcessor([
+            Metric(name=aggregation, filter=lambda e: True, aggregation=aggregation,
+                   window='30s', value_extractor=lambda e: e.metadata['value'])
+            for aggregation in ('min', 'max', 'sum', 'average', 'unique_count')
+        ] + [
+            Metric(name=f'p{percentile}', filter=lambda e: True, aggregation='percentile',
+                   window='30s', percentile=percentile,
+                   value_extractor=lambda e: e.metadata['value'])
+            for percentile in (50, 90)
+        ])
+        updates = processor.process_events(events)
+        
+        # A 30s window holds the current event and the three before it
+        windows = [values[max(0, i - 3):i + 1] for i in range(len(values))]
+        assert [r.value for r in updates['min']] == [min(w) for w in windows]
+        assert [r.value for r in updates['max']] == [max(w) for w in windows]
+        assert [r.value for r in updates['sum']] == [sum(w) for w in windows]
+        assert [r.value for r in updates['average']] == [sum(w) / len(w) for w in windows]
+        assert [r.value for r in updates['unique_count']] == [len(set(w)) for w in windows]
+        for percentile in (50, 90):
+            assert [r.value for r in updates[f'p{percentile}']] == [
+                sorted(w)[int(percentile / 100 * (len(w) - 1))] for w in windows
+            ]
+        
+        processor.clear()
+        processor.add_event(events[0])
+        assert processor.get_metric('max').value == 5
+    
+    def test_running_sum_does_not_drift(self):
+        """Test that a long-running float sum stays equal to the window's sum."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [1e16 if i % 7 == 0 else 0.1 * i for i in range(200)]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i), level='INFO',
+                     source='app1', message=f'Event {i}', metadata={'value': value})
+            for i, value in enumerate(values)
+        ]
+        
+        processor = MetricProcessor([
+            Metric(name='total', filter=lambda e: True, aggregation='sum',
+                   window='5s', value_extractor=lambda e: e.metadata['value'])
+        ])
+        processor.process_events(events)
+        
+        assert processor.get_metric('total').value == sum(values[-6:])
+    
+    def test_percentile_and_unique_count(self):
+        """Test percentile and unique count aggregations."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level='INFO',
+                     source='app1',
+                     message=f'Event {i}',
+                     metadata={'value': [50, 100, 25, 200, 75][i],
+                               'user': ['a', 'b', 'a', 'c', 'b'][i]})
+            for i in range(5)
+        ]
+        
+        processor = MetricProcessor([
+            Metric(name='p50_value', filter=lambda e: True, aggregation='percentile',
+                   window='5m', percentile=50,
+                   value_extractor=lambda e: e.metadata['value']),
+            Metric(name='unique_users', filter=lambda e: True, aggregation='unique_count',
+                   window='5m', value_extractor=lambda e: e.metadata['user']),
+        ])
+        processor.add_events(events)
+        
+        assert processor.get_metric('p50_value').value == 75
+        assert processor.get_metric('unique_users').value == 3
+    
     def test_grouped_aggregation(self):
         """Test grouped metrics."""
         metric = Metric(
@@ -202,6 +286,275 @@ class TestMetricAggregation:
         # Should have 3 groups (app1, app2, app3) with 3 events each
         assert len(result.grouped_values) == 3
         assert all(count == 3 for count in result.grouped_values.values())
+    
+    def test_builtin_grouped_metrics(self):
+        """Test the built-in by-source and by-level metrics, batched and streamed."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level=('INFO', 'ERROR')[i % 2],
+                     source=f'app{i%3+1}',
+                     message=f'Event {i}')
+            for i in range(6)
+        ]
+        
+        batch = MetricProcessor([events_by_source_metric(), events_by_level_metric()])
+        streamed = MetricProcessor(batch.metrics)
+        batch.add_events(events)
+        for event in events:
+            streamed.add_event(event)
+        
+        for processor in (batch, streamed):
+            assert processor.get_metric('events_by_source').grouped_values == \
+                {'app1': 2, 'app2': 2, 'app3': 2}
+            assert processor.get_metric('events_by_level').grouped_values == \
+                {'INFO': 3, 'ERROR': 3}
+    
+    def test_grouped_value_aggregations(self):
+        """Test that grouped value aggregations reduce each group's values."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        values = [4, 9, 1, 7, 3, 8, 2, 6]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10), level='INFO',
+                     source=f'app{i%2+1}', message=f'Event {i}', metadata={'value': value})
+            for i, value in enumerate(values)
+        ]
+        
+        processor = MetricProcessor([
+            Metric(name=aggregation, filter=lambda e: True, aggregation=aggregation,
+                   window='5m', group_by=lambda e: e.source,
+                   value_extractor=lambda e: e.metadata['value'])
+            for aggregation in ('sum', 'average', 'min', 'max', 'unique_count')
+        ] + [
+            Metric(name='median', filter=lambda e: True, aggregation='percentile',
+                   percentile=50, window='5m', group_by=lambda e: e.source,
+                   value_extractor=lambda e: e.metadata['value']),
+        ])
+        processor.add_events(events)
+        
+        groups = {'app1': values[0::2], 'app2': values[1::2]}
+        expected = {
+            'sum': sum, 'average': lambda v: sum(v) / len(v), 'min': min, 'max': max,
+            'unique_count': lambda v: len(set(v)), 'median': lambda v: sorted(v)[1],
+        }
+        for name, reduce in expected.items():
+            assert processor.get_metric(name).grouped_values == {
+                source: reduce(group) for source, group in groups.items()
+            }
+    
+    def test_grouped_windows_track_expiring_groups(self):
+        """Test that grouped aggregates follow the window as groups come and go."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        sources = ['a', 'a', 'b', 'a', 'c', 'c', 'c', 'b', 'a', 'b', 'b', 'a']
+        values = [5, 3, 3, 8, 1, 9, 9, 2, 7, 4, 6, 0]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i * 10), level='INFO',
+                     source=source, message=f'Event {i}', metadata={'value': value})
+            for i, (source, value) in enumerate(zip(sources, values))
+        ]
+        
+        processor = MetricProcessor([
+            Metric(name='count', filter=lambda e: True, aggregation='count',
+                   window='30s', group_by=lambda e: e.source),
+        ] + [
+            Metric(name=aggregation, filter=lambda e: True, aggregation=aggregation,
+                   window='30s', group_by=lambda e: e.source,
+                   value_extractor=lambda e: e.metadata['value'])
+            for aggregation in ('sum', 'max')
+        ])
+        updates = processor.process_events(events)
+        
+        # A 30s window holds the current event and the three before it
+        for i in range(len(events)):
+            groups = {}
+            for j in range(max(0, i - 3), i + 1):
+                groups.setdefault(sources[j], []).append(values[j])
+            assert updates['count'][i].grouped_values == {k: len(v) for k, v in groups.items()}
+            assert updates['sum'][i].grouped_values == {k: sum(v) for k, v in groups.items()}
+            assert updates['max'][i].grouped_values == {k: max(v) for k, v in groups.items()}
+    
+    def test_add_events_batch(self):
+        """Test that add_events returns every update in event order."""
+        metrics = [
+            Metric(name='error_count', filter=lambda e: e.level == 'ERROR',
+                   aggregation='count', window='5m'),
+            Metric(name='total_count', filter=lambda e: True,
+                   aggregation='count', window='5m'),
+        ]
+        
+        processor = MetricProcessor(metrics)
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level='ERROR' if i % 2 == 0 else 'INFO',
+                     source='app1',
+                     message=f'Event {i}')
+            for i in range(4)
+        ]
+        
+        results = processor.add_events(events)
+        
+        # 2 ERROR events update both metrics, 2 INFO events update one
+        assert [r.metric_name for r in results] == [
+            'error_count', 'total_count', 'total_count',
+            'error_count', 'total_count', 'total_count',
+        ]
+        assert processor.get_metric('error_count').value == 2
+        assert processor.get_metric('total_count').value == 4
+    
+    def test_add_events_latest(self):
+        """Test that add_events_latest returns add_events' final results."""
+        metrics = [
+            Metric(name='errors', filter=FieldEq('level', 'ERROR'),
+                   aggregation='count', window='30s'),
+            Metric(name='max_value', filter=lambda e: True, aggregation='max',
+                   window='30s', value_extractor=lambda e: e.metadata['value']),
+            Metric(name='by_source', filter=lambda e: True, aggregation='count',
+                   window='30s', group_by=lambda e: e.source),
+            Metric(name='debug', filter=FieldEq('level', 'DEBUG'),
+                   aggregation='count', window='30s'),
+        ]
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level=('INFO', 'ERROR')[i % 2],
+                     source=f'app{i%3+1}',
+                     message=f'Event {i}',
+                     metadata={'value': (i * 7) % 5})
+            for i in range(10)
+        ]
+        
+        latest = MetricProcessor(metrics)
+        every = MetricProcessor(metrics)
+        for batch in (events[:6], events[6:]):
+            results = latest.add_events_latest(batch)
+            expected = {r.metric_name: r for r in every.add_events(batch)}
+            assert list(results) == list(expected)
+            assert [(r.value, r.grouped_values, r.window_start, r.window_end)
+                    for r in results.values()] == \
+                [(r.value, r.grouped_values, r.window_start, r.window_end)
+                 for r in expected.values()]
+        
+        for metric in metrics:
+            assert list(latest.metric_windows[metric.name]) == \
+                list(every.metric_windows[metric.name])
+    
+    def test_process_events_groups_updates_by_metric(self):
+        """Test that process_events matches streaming add_event per metric."""
+        metrics = [
+            Metric(name='errors', filter=FieldEq('level', 'ERROR'),
+                   aggregation='count', window='30s'),
+            Metric(name='warnings', filter=FieldEq('level', 'WARNING'),
+                   aggregation='count', window='30s'),
+            Metric(name='by_source', filter=lambda e: e.level != 'DEBUG',
+                   aggregation='count', window='30s', group_by=lambda e: e.source),
+        ]
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level=('INFO', 'ERROR', 'DEBUG')[i % 3],
+                     source=f'app{i%2+1}',
+                     message=f'Event {i}')
+            for i in range(8)
+        ]
+        
+        batch = MetricProcessor(metrics).process_events(iter(events))
+        streamed = MetricProcessor(metrics)
+        expected = {}
+        for event in events:
+            for name, result in streamed.add_event(event).items():
+                expected.setdefault(name, []).append(result)
+        
+        # Metrics without a matching event are left out
+        assert set(batch) == {'errors', 'by_source'}
+        for name, results in expected.items():
+            assert [(r.value, r.grouped_values, r.window_end) for r in batch[name]] == \
+                [(r.value, r.grouped_values, r.window_end) for r in results]
+    
+    def test_declarative_predicates(self):
+        """Test that predicate filters match their lambda equivalents."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level=('INFO', 'WARNING', 'ERROR')[i % 3],
+                     source=f'app{i%2+1}',
+                     message=f'Event {i}')
+            for i in range(9)
+        ]
+        
+        predicates = [
+            (FieldEq('level', 'ERROR'), lambda e: e.level == 'ERROR'),
+            (FieldIn('level', ['WARNING', 'ERROR']), lambda e: e.level in ('WARNING', 'ERROR')),
+            (FieldGt('timestamp', base_time + timedelta(seconds=40)),
+             lambda e: e.timestamp > base_time + timedelta(seconds=40)),
+            (FieldGe('level_code', LogLevel.WARNING), lambda e: e.level in ('WARNING', 'ERROR')),
+        ]
+        
+        for predicate, equivalent in predicates:
+            expected = [equivalent(e) for e in events]
+            assert [predicate(e) for e in events] == expected
+            assert [predicate.compile()(e) for e in events] == expected
+            assert predicate.mask([getattr(e, predicate.field) for e in events]) == expected
+        
+        batch = MetricProcessor([
+            Metric(name='errors', filter=FieldEq('level', 'ERROR'),
+                   aggregation='count', window='5m'),
+            Metric(name='by_source', filter=FieldIn('level', ['INFO', 'ERROR']),
+                   aggregation='count', window='5m', group_by=lambda e: e.source),
+        ])
+        streamed = MetricProcessor(batch.metrics)
+        
+        batch_results = batch.add_events(events)
+        streamed_results = [r for e in events for r in streamed.add_event(e).values()]
+        
+        assert [(r.metric_name, r.value, r.grouped_values) for r in batch_results] == \
+            [(r.metric_name, r.value, r.grouped_values) for r in streamed_results]
+    
+    def test_shared_filters_evaluated_once(self):
+        """Test that metrics sharing a filter evaluate it once per event or batch."""
+        calls = []
+        
+        def has_latency(event):
+            calls.append(event)
+            return 'latency' in event.metadata
+        
+        processor = MetricProcessor([
+            Metric(name='slow_count', filter=has_latency,
+                   aggregation='count', window='5m'),
+            Metric(name='max_latency', filter=has_latency, aggregation='max',
+                   window='5m', value_extractor=lambda e: e.metadata['latency']),
+            Metric(name='errors', filter=FieldIn('level', ['ERROR']),
+                   aggregation='count', window='5m'),
+            Metric(name='errors_by_source', filter=FieldIn('level', ['ERROR']),
+                   aggregation='count', window='5m', group_by=lambda e: e.source),
+        ])
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i*10),
+                     level='ERROR' if i % 2 else 'INFO',
+                     source='app1',
+                     message=f'Event {i}',
+                     metadata={'latency': i * 10} if i % 3 == 0 else {})
+            for i in range(6)
+        ]
+        
+        streamed = MetricProcessor(processor.metrics)
+        processor.add_events(events)
+        
+        assert len(calls) == len(events)
+        assert processor.get_metric('slow_count').value == 2
+        assert processor.get_metric('max_latency').value == 30
+        assert processor.get_metric('errors').value == 3
+        assert processor.get_metric('errors_by_source').grouped_values == {'app1': 3}
+        
+        calls.clear()
+        for event in events:
+            streamed.add_event(event)
+        
+        assert len(calls) == len(events)
+        assert streamed.get_all_metrics().keys() == processor.get_all_metrics().keys()
 
 
 class TestMetricEdgeCases:
@@ -226,8 +579,10 @@ class TestMetricEdgeCases:
             for i in range(5)
         ]
         
-        for event in events:
-            processor.add_event(event)
+        updates = [processor.add_event(event) for event in events]
+        # Unmatched events share one read-only empty mapping
+        assert all(update is updates[0] for update in updates)
+        assert dict(updates[0]) == {}
         
         result = processor.get_metric('no_matches')
         # Should return 0 for count when no matches
@@ -262,6 +617,79 @@ class TestMetricEdgeCases:
         assert result is not None
         assert result.value >= 1  # At least the last event
     
+    def test_window_expires_burst_after_gap(self):
+        """Test that a gap in the stream expires every event it leaves behind."""
+        processor = MetricProcessor([
+            Metric(name='count', filter=lambda e: True, aggregation='count', window='1m'),
+            Metric(name='max', filter=lambda e: True, aggregation='max', window='1m',
+                   value_extractor=lambda e: e.metadata['value']),
+        ])
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        offsets = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 150, 151, 400]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=offset), level='INFO',
+                     source='app1', message=f'Event {offset}', metadata={'value': -offset})
+            for offset in offsets
+        ]
+        updates = processor.process_events(events)
+        
+        expected = [
+            sum(1 for other in offsets[:i + 1] if other >= offset - 60)
+            for i, offset in enumerate(offsets)
+        ]
+        assert [r.value for r in updates['count']] == expected
+        assert [r.value for r in updates['max']] == [
+            -min(other for other in offsets[:i + 1] if other >= offset - 60)
+            for i, offset in enumerate(offsets)
+        ]
+        assert len(processor.metric_windows['count']) == 1
+    
+    def test_out_of_order_events_expire_from_the_front(self):
+        """Test that a late event does not let later in-window events be evicted."""
+        def make_processor():
+            return MetricProcessor([
+                Metric(name='count', filter=lambda e: True, aggregation='count',
+                       window='150s'),
+                Metric(name='sum', filter=lambda e: True, aggregation='sum', window='150s',
+                       value_extractor=lambda e: e.metadata['value']),
+            ])
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        offsets = [1, 2, 3, 4, 100, 6, 7, 8, 9, 200]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=offset), level='INFO',
+                     source='app1', message=f'Event {offset}', metadata={'value': offset})
+            for offset in offsets
+        ]
+        
+        # Expiry pops from the front only, so 100 shields the events behind it
+        single = make_processor()
+        for event in events:
+            single.add_event(event)
+        assert single.get_metric('count').value == 6
+        assert single.get_metric('sum').value == 100 + 6 + 7 + 8 + 9 + 200
+        
+        batch = make_processor()
+        updates = batch.process_events(events)
+        assert updates['count'][-1].value == 6
+        
+        latest = make_processor().add_events_latest(events)
+        assert latest['count'].value == 6
+        assert latest['sum'].value == single.get_metric('sum').value
+        
+        # Expiring after every event, not just the last, evicts 1 when 200
+        # arrives; expiring once against the late 100 would keep it
+        offsets = [1, 200, 100]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=offset), level='INFO',
+                     source='app1', message=f'Event {offset}', metadata={'value': offset})
+            for offset in offsets
+        ]
+        latest = make_processor().add_events_latest(events)
+        assert latest['count'].value == 2
+        assert latest['sum'].value == 200 + 100
+    
     def test_missing_value_extractor(self):
         """Test that aggregations requiring value_extractor raise error."""
         metric = Metric(
@@ -310,6 +738,28 @@ class TestMetricEdgeCases:
         # 5 events * 4 characters = 20
         assert result.value == 20
     
+    def test_custom_aggregation_gets_window_as_list(self):
+        """Test that custom aggregations receive the unexpired window as a list."""
+        seen = []
+        
+        def last_two_sources(events):
+            seen.append(type(events))
+            return [e.source for e in events[-2:]]
+        
+        processor = MetricProcessor([
+            Metric(name='recent_sources', filter=lambda e: True,
+                   aggregation=last_two_sources, window='1m')
+        ])
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(5):
+            processor.add_event(LogEvent(timestamp=base_time + timedelta(seconds=i * 40),
+                                         level='INFO', source=f'app{i}', message='Test'))
+        
+        assert processor.get_metric('recent_sources').value == ['app3', 'app4']
+        assert len(processor.metric_windows['recent_sources']) == 2
+        assert set(seen) == {list}
+    
     def test_rate_with_single_event(self):
         """Test rate calculation with single event."""
         metric = Metric(
@@ -0,0 +1,421 @@
+"""
+Unit tests for the storage layer.
+
+Focuses on batch insert paths and the SQL query interface.
+"""
+
+import duckdb
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from loglens.models import LogEvent
+from loglens.analytics import FieldEq, FieldGe, Metric, MetricProcessor, MetricResult
+from loglens.models import LogLevel
+from loglens.storage import LogStorage, PersistentMetricProcessor, create_query
+
+
+@pytest.fixture
+def storage():
+    """In-memory storage, closed after the test."""
+    storage = LogStorage(":memory:")
+    yield storage
+    storage.close()
+
+
+class TestBatchInserts:
+    """Tests for batch event and metric inserts."""
+    
+    def test_insert_events_matches_single_inserts(self, storage):
+        """Test that batch-inserted events round-trip with sequential IDs."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        first_id = storage.insert_event(
+            LogEvent(timestamp=base_time, level='INFO', source='app1', message='First')
+        )
+        
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=i),
+                     level='error' if i % 2 else 'INFO',
+                     source=f'app{i}',
+                     message=f'Event "{i}"',
+                     metadata={'request_id': i} if i % 2 else {})
+            for i in range(1, 4)
+        ]
+        ids = storage.insert_events(events)
+        
+        assert first_id == 1
+        assert ids == [2, 3, 4]
+        
+        rows = {row['id']: row for row in storage.query_events()}
+        assert rows[2]['level'] == 'ERROR'
+        assert rows[2]['message'] == 'Event "1"'
+        assert rows[2]['metadata'] == {'request_id': 1}
+        assert rows[3]['metadata'] == {}
+        assert rows[4]['timestamp'] == base_time + timedelta(seconds=3)
+    
+    def test_insert_event_columns(self, storage):
+        """Test columnar inserts, including timezone-aware timestamps."""
+        aware = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone(timedelta(hours=2)))
+        ids = storage.insert_event_columns(
+            timestamps=[aware, datetime(2024, 1, 1, 11, 0, 0)],
+            levels=['warning', 'INFO'],
+            sources=['app1', 'app2'],
+            messages=['Slow request', 'Started']
+        )
+        
+        assert ids == [1, 2]
+        rows = {row['id']: row for row in storage.query_events()}
+        assert rows[1]['timestamp'] == datetime(2024, 1, 1, 10, 0, 0)
+        assert rows[1]['level'] == 'WARNING'
+        assert rows[2]['metadata'] == {}
+    
+    def test_insert_event_columns_validation(self, storage):
+        """Test that mismatched columns and unknown levels are rejected."""
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        
+        with pytest.raises(ValueError, match="same length"):
+            storage.insert_event_columns([now, now], ['INFO'], ['app1'], ['msg'])
+        
+        with pytest.raises(ValueError, match="level"):
+            storage.insert_event_columns([now], ['LOUD'], ['app1'], ['msg'])
+        
+        assert storage.insert_events([]) == []
+    
+    def test_insert_metrics(self, storage):
+        """Test inserting a batch of metric results."""
+        start = datetime(2024, 1, 1, 12, 0, 0)
+        end = start + timedelta(minutes=5)
+        results = [
+            MetricResult(metric_name='error_count', value=3,
+                         window_start=start, window_end=end),
+            MetricResult(metric_name='events_by_source', value=None,
+                         window_start=start, window_end=end,
+                         grouped_values={'app1': 2, 'app2': 1}),
+        ]
+        
+        assert storage.insert_metrics(results) == [1, 2]
+        assert storage.insert_metrics([]) == []
+        
+        rows = {row['id']: row for row in storage.query_metrics()}
+        assert rows[1]['value'] == 3
+        assert rows[2]['grouped_values'] == {'app1': 2, 'app2': 1}
+    
+    def test_query_metric_values(self, storage):
+        """Test that a metric series comes back oldest first, skipping empty windows."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        window = timedelta(minutes=5)
+        storage.insert_metrics([
+            MetricResult(metric_name='error_count', value=None if i == 2 else i,
+                         window_start=base_time + window * i,
+                         window_end=base_time + window * (i + 1))
+            for i in range(5)
+        ] + [
+            MetricResult(metric_name='event_count', value=10,
+                         window_start=base_time, window_end=base_time + window)
+        ])
+        
+        timestamps, values = storage.query_metric_values('error_count')
+        assert values == [0, 1, 3, 4]
+        assert timestamps == [base_time + window * i for i in (0, 1, 3, 4)]
+        
+        timestamps, values = storage.query_metric_values('error_count', limit=2)
+        assert values == [3, 4]
+        assert storage.query_metric_values('missing') == ([], [])
+    
+    def test_time_bucket_columns(self, storage):
+        """Test that hour_of_day and day are filled by both insert paths."""
+        storage.insert_event(
+            LogEvent(timestamp=datetime(2024, 1, 1, 13, 5), level='INFO',
+                     source='app1', message='Single')
+        )
+        storage.insert_events([
+            LogEvent(timestamp=datetime(2024, 1, 2, 23, 59), level='INFO',
+                     source='app1', message='Batch')
+        ])
+        
+        rows = storage.conn.execute(
+            "SELECT id, hour_of_day, day FROM events ORDER BY id"
+        ).fetchall()
+        assert rows == [
+            (1, 13, datetime(2024, 1, 1).date()),
+            (2, 23, datetime(2024, 1, 2).date()),
+        ]
+    
+    def test_insert_events_from_generator_in_batches(self, storage):
+        """Test that generators are consumed in batches with contiguous IDs."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = (
+            LogEvent(timestamp=base_time + timedelta(seconds=i), level='INFO',
+                     source='app1', message=f'Event {i}')
+            for i in range(7)
+        )
+        
+        ids = storage.insert_events(events, batch_size=3)
+        
+        assert ids == list(range(1, 8))
+        assert storage.get_event_stats()['total_events'] == 7
+        
+        with pytest.raises(ValueError, match="batch_size"):
+            storage.insert_events([], batch_size=0)
+    
+    def test_ids_continue_after_reopen(self, tmp_path):
+        """Test that sequences resume after existing IDs, including legacy files."""
+        db_path = tmp_path / "logs.db"
+        event = LogEvent(timestamp=datetime(2024, 1, 1, 12, 0, 0), level='INFO',
+                         source='app1', message='Event')
+        
+        with LogStorage(db_path) as storage:
+            assert storage.insert_events([event, event]) == [1, 2]
+            # Simulate a database written before the ID sequences existed
+            storage.conn.execute("DROP SEQUENCE events_id_seq")
+        
+        with LogStorage(db_path) as storage:
+            assert storage.insert_event(event) == 3
+        
+        with LogStorage(db_path) as storage:
+            assert storage.insert_event_columns(
+                [event.timestamp], ['INFO'], ['app1'], ['Event']
+            ) == [4]
+    
+    def test_connection_config(self, tmp_path):
+        """Test that DuckDB settings are applied when the database is opened."""
+        with LogStorage(tmp_path / "logs.db", config={'threads': 1}) as storage:
+            assert storage.conn.execute(
+                "SELECT current_setting('threads')"
+            ).fetchone()[0] == 1
+    
+    def test_read_only(self, tmp_path):
+        """Test that read-only storage queries an existing database but cannot write."""
+        db_path = tmp_path / "logs.db"
+        event = LogEvent(timestamp=datetime(2024, 1, 1, 12, 0, 0), level='ERROR',
+                         source='app1', message='Event')
+        with LogStorage(db_path) as storage:
+            storage.insert_event(event)
+        
+        readers = [LogStorage(db_path, read_only=True) for _ in range(2)]
+        try:
+            for reader in readers:
+                assert [e['message'] for e in reader.query_events()] == ['Event']
+            with pytest.raises(duckdb.Error):
+                readers[0].insert_event(event)
+        finally:
+            for reader in readers:
+                reader.close()
+    
+    def test_event_stats(self, storage):
+        """Test total, per-level and per-source counts, with and without a range."""
+        assert storage.get_event_stats() == {
+            'total_events': 0, 'by_level': {}, 'by_source': {}
+        }
+        
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        storage.insert_event_columns(
+            [base_time + timedelta(minutes=i) for i in range(6)],
+            ['INFO', 'INFO', 'ERROR', 'INFO', 'WARNING', 'ERROR'],
+            ['app1', 'app2', 'app1', 'app1', 'app2', 'app1'],
+            [f'Event {i}' for i in range(6)]
+        )
+        
+        stats = storage.get_event_stats()
+        assert stats['total_events'] == 6
+        assert list(stats['by_level'].items()) == [('INFO', 3), ('ERROR', 2), ('WARNING', 1)]
+        assert list(stats['by_source'].items()) == [('app1', 4), ('app2', 2)]
+        
+        stats = storage.get_event_stats(start_time=base_time + timedelta(minutes=4))
+        assert stats == {
+            'total_events': 2,
+            'by_level': {'WARNING': 1, 'ERROR': 1},
+            'by_source': {'app2': 1, 'app1': 1}
+        }
+    
+    def test_persistent_processor_batch(self, storage):
+        """Test that a batch stores its events and the latest result per metric."""
+        processor = PersistentMetricProcessor(storage, [
+            Metric(name='error_count', filter=lambda e: e.level == 'ERROR',
+                   aggregation='count', window='5m'),
+            Metric(name='event_count', filter=lambda e: True,
+                   aggregation='count', window='5m'),
+        ])
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=30 * i),
+                     level='ERROR' if i % 2 else 'INFO',
+                     source='app1', message=f'Event {i}')
+            for i in range(4)
+        ]
+        
+        updated = processor.add_events(events)
+        
+        assert list(updated) == ['event_count', 'error_count']
+        assert updated['event_count'].value == 4
+        assert updated['error_count'].value == 2
+        assert storage.get_event_stats()['total_events'] == 4
+        assert sorted((m['metric_name'], m['value']) for m in storage.query_metrics()) == \
+            [('error_count', 2), ('event_count', 4)]
+
+
+class TestMetricQuery:
+    """Tests for the SQL query interface."""
+    
+    def test_repeated_sql_reuses_parsed_statement(self, storage):
+        """Test that repeated queries are parsed once and still bind new params."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        storage.insert_event_columns(
+            [base_time, base_time], ['INFO', 'ERROR'], ['app1', 'app1'], ['a', 'b']
+        )
+        query = create_query(storage)
+        
+        sql = "SELECT COUNT(*) AS n FROM events WHERE level = ?"
+        assert query.execute_sql(sql, ('INFO',)) == [{'n': 1}]
+        assert query.execute_sql(sql, ('DEBUG',)) == [{'n': 0}]
+        
+        cache = query._parse_sql.cache_info()
+        assert cache.misses == 1
+        assert cache.hits == 1
+    
+    def test_iter_sql_streams_rows(self, storage):
+        """Test that iter_sql and iter_rows stream the rows of execute_sql across fetch batches."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        storage.insert_event_columns(
+            [base_time + timedelta(seconds=i) for i in range(5)],
+            ['INFO'] * 5, ['app1'] * 5, [f'event {i}' for i in range(5)]
+        )
+        query = create_query(storage)
+        
+        sql = "SELECT message, timestamp FROM events WHERE level = ? ORDER BY timestamp"
+        rows = query.iter_sql(sql, ('INFO',), arraysize=2)
+        assert next(rows) == {'message': 'event 0', 'timestamp': base_time}
+        # The storage connection stays usable while rows are still pending
+        assert query.execute_sql("SELECT COUNT(*) AS n FROM events") == [{'n': 5}]
+        assert [next(rows)] + list(rows) == query.execute_sql(sql, ('INFO',))[1:]
+        
+        assert list(query.iter_sql(sql, ('DEBUG',))) == []
+        
+        columns, rows = query.iter_rows(sql, ('INFO',), arraysize=2)
+        assert columns == ['message', 'timestamp']
+        assert [message for message, _ in rows] == [f'event {i}' for i in range(5)]
+    
+    def test_execute_numpy(self, storage):
+        """Test that execute_numpy returns one array per column."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        storage.insert_event_columns(
+            [base_time, base_time + timedelta(hours=1), base_time + timedelta(hours=1)],
+            ['INFO', 'ERROR', 'INFO'], ['app1', 'app1', 'app2'], ['a', 'b', 'c']
+        )
+        query = create_query(storage)
+        
+        columns = query.execute_numpy(
+            "SELECT hour, SUM(event_count)::BIGINT AS n FROM events_hourly "
+            "GROUP BY hour ORDER BY hour"
+        )
+        
+        assert list(columns) == ['hour', 'n']
+        assert columns['hour'].tolist() == [base_time, base_time + timedelta(hours=1)]
+        assert columns['n'].tolist() == [1, 2]
+    
+    def test_metric_windows_match_processor(self, storage):
+        """Test that SQL-computed count windows match MetricProcessor updates."""
+        base_time = datetime(2024, 1, 1, 12, 0, 0)
+        # Several events share a timestamp, and some sit exactly on a window edge
+        offsets = [0, 0, 30, 60, 60, 60, 90, 300, 330, 600, 601, 900]
+        events = [
+            LogEvent(timestamp=base_time + timedelta(seconds=offset),
+                     level=('INFO', 'ERROR', 'CRITICAL')[i % 3],
+                     source=f'app{i % 2}', message=f'Event {i}')
+            for i, offset in enumerate(offsets)
+        ]
+        storage.insert_events(events)
+        query = create_query(storage)
+        
+        metrics = [
+            Metric(name='errors', filter=FieldGe('level_code', LogLevel.ERROR),
+                   aggregation='count', window='5m'),
+            Metric(name='app1_events', filter=FieldEq('source', 'app1'),
+                   aggregation='count', window='1m'),
+        ]
+        for metric in metrics:
+            expected = MetricProcessor([metric]).add_events(events)
+            results = query.query_metric_windows(metric)
+            
+            assert [(r.value, r.window_start, r.window_end) for r in results] == \
+                [(r.value, r.window_start, r.window_end) for r in expected]
+        
+        start = base_time + timedelta(minutes=5)
+        results = query.query_metric_windows(metrics[0], start_time=start)
+        assert [r.value for r in results] == [1, 2, 2, 2]
+    
+    def test_metric_windows_reject_python_metrics(self, storage):
+        """Test that metrics needing Python callables are not pushed down."""
+        query = create_query(storage)
+        
+        with pytest.raises(ValueError, match="declarative"):
+            query.query_metric_windows(
+                Metric(name='errors', filter=lambda e: e.level == 'ERROR',
+                       aggregation='count', window='5m')
+            )
+        
+        with pytest.raises(ValueError, match="ungrouped count"):
+            query.query_metric_windows(
+                Metric(name='by_source', filter=FieldEq('level', 'ERROR'),
+                       aggregation='count', window='5m', group_by=lambda e: e.source)
+            )
+    
+    def test_rollup_queries_match_raw_counts(self, storage):
+        """Test that rollup-backed queries match counts taken from raw events."""
+        base_time = datetime(2024, 1, 1, 0, 0, 0)
+        count = 300
+        storage.insert_event_columns(
+            [base_time + timedelta(minutes=7 * i) for i in range(count)],
+            [('INFO', 'WARNING', 'ERROR', 'CRITICAL')[i % 4] for i in range(count)],
+            [f'app{i % 3}' for i in range(count)],
+            [f'Event {i}' for i in range(count)]
+        )
+        storage.insert_event(
+            LogEvent(timestamp=base_time + timedelta(hours=3), level='ERROR',
+                     source='app1', message='Exactly on the hour')
+        )
+        query = create_query(storage)
+        
+        ranges = [
+            (None, None),
+            (base_time + timedelta(minutes=50), base_time + timedelta(hours=20, minutes=5)),
+            (base_time + timedelta(hours=3), base_time + timedelta(hours=9)),
+            (base_time + timedelta(hours=4, minutes=10),
+             base_time + timedelta(hours=4, minutes=40)),
+            (None, base_time + timedelta(hours=3)),
+        ]
+        for start, end in ranges:
+            raw = storage.conn.execute("""
+                SELECT source, COUNT(*), COUNT_IF(level = 'ERROR')
+                FROM events
+                WHERE (? IS NULL OR timestamp >= ?) AND (? IS NULL OR timestamp <= ?)
+                GROUP BY source
+            """, (start, start, end, end)).fetchall()
+            top = query.query_top_sources(start_time=start, end_time=end)
+            assert sorted((r['source'], r['event_count'], r['error_count']) for r in top) == \
+                sorted(raw)
+            
+            by_hour = query.query_error_rate_by_source(start_time=start, end_time=end)
+            by_minute = query.query_error_rate_by_source(
+                start_time=start, end_time=end, bucket_size='minute'
+            )
+            assert sum(r['total_events'] for r in by_hour) == \
+                sum(r['total_events'] for r in by_minute) == sum(r[1] for r in raw)
+    
+    def test_rollup_after_delete(self, storage):
+        """Test that deleting old events keeps the hourly rollup in step."""
+        base_time = datetime(2024, 1, 1, 0, 0, 0)
+        storage.insert_events(
+            LogEvent(timestamp=base_time + timedelta(minutes=20 * i), level='INFO',
+                     source='app1', message=f'Event {i}')
+            for i in range(9)
+        )
+        
+        assert storage.delete_old_events(base_time + timedelta(hours=1, minutes=30)) == 5
+        
+        rows = storage.conn.execute(
+            "SELECT hour, event_count FROM events_hourly ORDER BY hour"
+        ).fetchall()
+        assert rows == [
+            (base_time + timedelta(hours=1), 1),
+            (base_time + timedelta(hours=2), 3),
+        ]